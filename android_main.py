@@ -33,6 +33,7 @@ import logging
 import os
 import sys
 import threading
+import time
 from typing import Any
 
 # --- Android crypto-совместимость (ДО импорта huawei_lte_api) ---
@@ -67,10 +68,11 @@ try:
 except ImportError:
     sys.meta_path.insert(0, _CryptodomeAliasFinder())
 
+import requests
 from huawei_lte_api.Client import Client
 from huawei_lte_api.Connection import Connection
 from kivy.app import App
-from kivy.clock import mainthread
+from kivy.clock import Clock, mainthread
 from kivy.core.text import LabelBase
 from kivy.lang import Builder
 from kivy.properties import ListProperty, StringProperty
@@ -79,11 +81,15 @@ from kivy.uix.screenmanager import Screen, ScreenManager
 
 # Общая логика и переводы — тот же пакет, что у десктопа.
 from core import (
+    ADAPTIVE_INTERVAL_MAX,
+    ANTENNA_GETTERS,
     ANTENNA_MODES,
     BANDS,
+    CAPABILITIES_FILE,
     CONTROL_HOSTS_NEUTRAL,
     DIRECTION_LOOKBACK,
-    JITTER_WINDOW,
+    GRAPH_HISTORY,
+    LABEL_TEXTURE_CACHE,
     LANGUAGES,
     LTEBAND_AUTO_ALL,
     NETBAND_AUTO_MASK,
@@ -91,24 +97,38 @@ from core import (
     NETMODE_LTE_ONLY,
     PARAM_RANGES,
     PLMN_MAP,
-    RECONNECT_DELAY_INITIAL,
-    RECONNECT_DELAY_MAX,
+    STATUS_RECONNECTED,
+    STATUS_RECONNECTING,
     WHITELIST_HOSTS_RU,
+    AdaptiveInterval,
+    AsyncRunner,
+    CapabilityCache,
+    DeviceCapabilities,
+    LRUCache,
+    MinMaxDecimator,
+    Poller,
+    RingBuffer,
+    RouterSession,
+    Sample,
+    ViewModel,
     analyze_whitelist_results,
     bands_from_mask,
     current_language,
+    direction_delta,
+    enrich_data,
     evaluate_signal,
-    extract_number,
-    first_present,
+    fast_client_factory,
     format_band_label,
     format_bytes_mb,
     format_mimo,
     format_modulation,
     format_rate_mbps,
     is_valid_ip,
+    jitter,
     parse_antenna_response,
     parse_antenna_value,
-    parse_cell_id,
+    parse_cell_id,  # noqa: F401  (разбор cell_id теперь в core.poller)
+    probe_first,
     set_language,
     t,
     tcp_reachable,
@@ -135,8 +155,23 @@ def _unit(param: str) -> str:
     return "dBm" if param in ('rsrp', 'rssi') else "dB"
 
 
-def _first_present(data, keys):
-    return first_present(data, keys)
+# Текстуры подписей графиков: растеризация текста (CoreLabel.refresh) —
+# самая дорогая часть отрисовки, а подписи оси Y, заголовок и подпись
+# оси X почти не меняются между тиками.
+_TEXTURE_CACHE: LRUCache[Any] = LRUCache(LABEL_TEXTURE_CACHE)
+
+
+def _label_texture(txt, size=12, color=(0.62, 0.68, 0.74, 1), bold=False):
+    """Текстура подписи из кеша; растеризуется только при промахе."""
+    text = str(txt)
+
+    def render():
+        from kivy.core.text import Label as CoreLabel
+        lbl = CoreLabel(text=text, font_size=size, bold=bold, color=color)
+        lbl.refresh()
+        return lbl.texture
+    return _TEXTURE_CACHE.get_or_create((text, size, tuple(color), bold),
+                                        render)
 
 
 def _hex_to_rgba(hexcolor: str):
@@ -163,6 +198,13 @@ def _hex_to_rgba(hexcolor: str):
 # Виджет графика на Kivy canvas (аналог CanvasGraph из десктопа)
 # =========================================================
 
+from kivy.graphics import (  # noqa: E402
+    Color,
+    Ellipse,
+    InstructionGroup,
+    Line,
+    Rectangle,
+)
 from kivy.uix.widget import Widget  # noqa: E402
 
 
@@ -172,105 +214,166 @@ class SignalGraph(Widget):
     Рисует историю значений выбранного параметра с сеткой и подписью
     последнего значения. Используется и на мониторе, и в полноэкранном
     Popup.
+
+    Инструкции canvas создаются один раз: группа фона, группа сетки с
+    подписями оси Y и динамическая часть (линия, маркер, подписи
+    значения и оси X). Фон и сетка перестраиваются только при смене
+    размера, положения или осей, а новая точка лишь обновляет
+    ``Line.points``, маркер и текстуры подписей — без ``canvas.clear()``
+    и создания инструкций Kivy на каждом тике.
+
+    История длиннее ширины графика рисуется огибающей min/max по
+    столбцам (``core.MinMaxDecimator``), которая догоняет буфер на
+    каждом тике, а не пересчитывается целиком.
     """
+
+    PADDING = (46, 12, 22, 22)   # left, right, top, bottom (px)
+
     def __init__(self, **kw):
         super().__init__(**kw)
-        self._values: list = []
+        self._values: Any = []
+        self._lod: MinMaxDecimator | None = None
         self._y_min = -120.0
         self._y_max = -50.0
         self._title = "RSRP"
         self._unit = "dBm"
-        self.bind(pos=lambda *a: self._redraw(),
-                  size=lambda *a: self._redraw())
+        # Геометрия, под которую построена статика; None — не построена.
+        self._layout: tuple[float, ...] | None = None
+        self._bg = InstructionGroup()
+        self._grid = InstructionGroup()
+        self.canvas.add(self._bg)
+        self.canvas.add(self._grid)
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self._caption = Rectangle(size=(0, 0))
+            Color(0.0, 0.72, 0.58, 1)
+            self._line = Line(points=[], width=1.0)
+            self._marker = Ellipse(size=(0, 0))
+            Color(1, 1, 1, 1)
+            self._value = Rectangle(size=(0, 0))
+        # pos и size при раскладке приходят по отдельности — статику
+        # перестраиваем один раз за кадр.
+        self._trigger_rebuild = Clock.create_trigger(
+            lambda dt: self._rebuild())
+        self.bind(pos=self._trigger_rebuild, size=self._trigger_rebuild)
 
     def set_data(self, values, y_min, y_max, title, unit) -> None:
-        self._values = list(values)
-        self._y_min, self._y_max = float(y_min), float(y_max)
-        self._title, self._unit = title, unit
-        self._redraw()
-
-    def _redraw(self) -> None:
-        from kivy.core.text import Label as CoreLabel
-        from kivy.graphics import Color, Ellipse, Line, Rectangle
-        self.canvas.clear()
+        # RingBuffer берём по ссылке — без копии истории на каждом тике.
+        self._values = values
+        axes = (float(y_min), float(y_max), title, unit)
+        if axes != (self._y_min, self._y_max, self._title, self._unit):
+            self._y_min, self._y_max, self._title, self._unit = axes
+            self._rebuild()
+        else:
+            self._update()
+
+    def _rebuild(self) -> None:
+        """Фон, сетка, подписи оси Y и заголовок — под текущий размер."""
+        self._bg.clear()
+        self._grid.clear()
+        self._layout = None
         w, h = self.width, self.height
-        if w < 60 or h < 60:
-            return
-
-        def _text(txt, size=12, color=(0.62, 0.68, 0.74, 1), bold=False):
-            lbl = CoreLabel(text=str(txt), font_size=size, bold=bold,
-                            color=color)
-            lbl.refresh()
-            return lbl.texture
-
         # Отступы: слева — под подписи оси Y, сверху — под заголовок,
         # снизу — под подпись оси X.
-        pl, pr, pt, pb = 46, 12, 22, 22
+        pl, pr, pt, pb = self.PADDING
         plot_w, plot_h = w - pl - pr, h - pt - pb
-        if plot_w <= 10 or plot_h <= 10:
+        if w < 60 or h < 60 or plot_w <= 10 or plot_h <= 10:
+            self._update()
             return
         x0, y0 = self.x + pl, self.y + pb
-
-        with self.canvas:
-            # Фон
-            Color(0.1, 0.12, 0.16, 1)
-            Rectangle(pos=(self.x, self.y), size=(w, h))
-
-            # Сетка + подписи значений оси Y (5 уровней)
-            for i in range(5):
-                gy = y0 + plot_h * i / 4
-                Color(0.2, 0.23, 0.27, 1)
-                Line(points=[x0, gy, x0 + plot_w, gy], width=1)
-                val = self._y_min + (self._y_max - self._y_min) * i / 4
-                tex = _text(f"{val:g}", size=12)
-                Color(1, 1, 1, 1)
-                Rectangle(texture=tex,
-                          pos=(x0 - tex.width - 6, gy - tex.height / 2),
-                          size=tex.size)
-
-            # Ось X (базовая линия)
-            Color(0.35, 0.4, 0.45, 1)
-            Line(points=[x0, y0, x0 + plot_w, y0], width=1)
-
-            # Заголовок графика (верх-лево)
-            tex = _text(f"{self._title} ({self._unit})", size=14,
-                        color=(0.9, 0.93, 0.96, 1), bold=True)
-            Color(1, 1, 1, 1)
-            Rectangle(texture=tex,
-                      pos=(x0, self.y + h - pt + 3), size=tex.size)
-
-            # Подпись оси X (низ-центр)
-            tex = _text(t("последние {n} точек").format(n=len(self._values)),
-                        size=11, color=(0.5, 0.55, 0.6, 1))
-            Color(1, 1, 1, 1)
-            Rectangle(texture=tex,
-                      pos=(x0 + (plot_w - tex.width) / 2,
-                           self.y + 4), size=tex.size)
-
-            if len(self._values) < 2:
+        top = self.y + h - pt + 3
+
+        # Фон
+        bg = self._bg
+        bg.add(Color(0.1, 0.12, 0.16, 1))
+        bg.add(Rectangle(pos=(self.x, self.y), size=(w, h)))
+
+        # Сетка + подписи значений оси Y (5 уровней)
+        grid = self._grid
+        for i in range(5):
+            gy = y0 + plot_h * i / 4
+            grid.add(Color(0.2, 0.23, 0.27, 1))
+            grid.add(Line(points=[x0, gy, x0 + plot_w, gy], width=1))
+            val = self._y_min + (self._y_max - self._y_min) * i / 4
+            tex = _label_texture(f"{val:g}", size=12)
+            grid.add(Color(1, 1, 1, 1))
+            grid.add(Rectangle(texture=tex,
+                               pos=(x0 - tex.width - 6, gy - tex.height / 2),
+                               size=tex.size))
+
+        # Ось X (базовая линия)
+        grid.add(Color(0.35, 0.4, 0.45, 1))
+        grid.add(Line(points=[x0, y0, x0 + plot_w, y0], width=1))
+
+        # Заголовок графика (верх-лево)
+        tex = _label_texture(f"{self._title} ({self._unit})", size=14,
+                             color=(0.9, 0.93, 0.96, 1), bold=True)
+        grid.add(Color(1, 1, 1, 1))
+        grid.add(Rectangle(texture=tex, pos=(x0, top), size=tex.size))
+
+        self._line.width = min(1.8, max(1.0, h / 300.0))
+        self._layout = (x0, y0, plot_w, plot_h, self.x + w - pr, top)
+        self._update()
+
+    def _update(self) -> None:
+        """Новая точка: ``Line.points``, маркер и подписи — на месте."""
+        layout = self._layout
+        values = self._values
+        if layout is None or len(values) < 2:
+            self._line.points = []
+            self._marker.size = (0, 0)
+            self._value.size = (0, 0)
+            if layout is None:
+                self._caption.size = (0, 0)
                 return
+        x0, y0, plot_w, plot_h, right, top = layout
+
+        # Подпись оси X (низ-центр)
+        tex = _label_texture(
+            t("последние {n} точек").format(n=len(values)),
+            size=11, color=(0.5, 0.55, 0.6, 1))
+        cap = self._caption
+        cap.texture = tex
+        cap.pos = (x0 + (plot_w - tex.width) / 2, self.y + 4)
+        cap.size = tex.size
+        if len(values) < 2:
+            return
 
-            # Линия графика
-            rng = max(self._y_max - self._y_min, 1e-9)
-            span = max(len(self._values) - 1, 1)
-            pts = []
-            for i, v in enumerate(self._values):
-                px = x0 + plot_w * i / span
-                v_cl = max(self._y_min, min(self._y_max, v))
-                py = y0 + plot_h * (v_cl - self._y_min) / rng
-                pts.extend([px, py])
-            Color(0.0, 0.72, 0.58, 1)
-            Line(points=pts, width=min(1.8, max(1.0, h / 300.0)))
-
-            # Маркер и значение последней точки (верх-право)
-            lx, ly = pts[-2], pts[-1]
-            Ellipse(pos=(lx - 4, ly - 4), size=(8, 8))
-            tex = _text(f"{self._values[-1]:g} {self._unit}", size=14,
-                        color=(0.0, 0.85, 0.68, 1), bold=True)
-            Color(1, 1, 1, 1)
-            Rectangle(texture=tex,
-                      pos=(self.x + w - pr - tex.width,
-                           self.y + h - pt + 3), size=tex.size)
+        # Линия графика
+        y_min, y_max = self._y_min, self._y_max
+        span = max(len(values) - 1, 1)
+        x_step = plot_w / span
+        y_scale = plot_h / max(y_max - y_min, 1e-9)
+        pts: list[float] = []
+        for i, v in self._series(int(plot_w)):
+            v_cl = max(y_min, min(y_max, v))
+            pts.append(x0 + x_step * i)
+            pts.append(y0 + y_scale * (v_cl - y_min))
+        self._line.points = pts
+
+        # Маркер и значение последней точки (верх-право)
+        lx, ly = pts[-2], pts[-1]
+        self._marker.pos = (lx - 4, ly - 4)
+        self._marker.size = (8, 8)
+        tex = _label_texture(f"{values[-1]:g} {self._unit}",
+                             size=14, color=(0.0, 0.85, 0.68, 1),
+                             bold=True)
+        val = self._value
+        val.texture = tex
+        val.pos = (right - tex.width, top)
+        val.size = tex.size
+
+    def _series(self, columns: int):
+        """(позиция, значение) для линии: история целиком или огибающая."""
+        values = self._values
+        if not isinstance(values, RingBuffer) or len(values) <= columns:
+            return enumerate(values)
+        lod = self._lod
+        if (lod is None or lod.columns != columns
+                or lod.capacity != values.capacity):
+            lod = self._lod = MinMaxDecimator(values.capacity, columns)
+        lod.sync(values)
+        return lod.points()
 
 
 class RotatedBox(Widget):
@@ -392,6 +495,9 @@ ScreenManager:
     name: 'connection'
     ip_input: ip_input
     pw_input: pw_input
+    interval_spinner: interval_spinner
+    adaptive_check: adaptive_check
+    fastpath_check: fastpath_check
     status_lbl: status_lbl
     ScrollView:
         bar_width: dp(8)
@@ -462,6 +568,58 @@ ScreenManager:
                 size_hint_y: None
                 height: dp(48)
 
+            # Интервал опроса; при адаптивном опросе — его потолок.
+            BoxLayout:
+                size_hint_y: None
+                height: dp(44)
+                spacing: dp(8)
+                Label:
+                    text: root.lbl_interval
+                    color: 0.85, 0.88, 0.9, 1
+                    font_size: dp(15)
+                    halign: 'left'
+                    valign: 'middle'
+                    text_size: self.size
+                Spinner:
+                    id: interval_spinner
+                    text: '5'
+                    values: ['0.25', '0.5', '1', '2', '5']
+                    font_size: dp(16)
+                    size_hint_x: None
+                    width: dp(96)
+            BoxLayout:
+                size_hint_y: None
+                height: dp(44)
+                spacing: dp(8)
+                CheckBox:
+                    id: adaptive_check
+                    active: True
+                    size_hint_x: None
+                    width: dp(40)
+                Label:
+                    text: root.lbl_adaptive
+                    color: 0.85, 0.88, 0.9, 1
+                    font_size: dp(14)
+                    halign: 'left'
+                    valign: 'middle'
+                    text_size: self.size
+            BoxLayout:
+                size_hint_y: None
+                height: dp(44)
+                spacing: dp(8)
+                CheckBox:
+                    id: fastpath_check
+                    active: True
+                    size_hint_x: None
+                    width: dp(40)
+                Label:
+                    text: root.lbl_fastpath
+                    color: 0.85, 0.88, 0.9, 1
+                    font_size: dp(14)
+                    halign: 'left'
+                    valign: 'middle'
+                    text_size: self.size
+
             RoundButton:
                 text: root.lbl_connect
                 on_release: root.on_connect()
@@ -891,6 +1049,9 @@ class ConnectionScreen(Screen):
     subtitle = StringProperty("")
     lbl_ip = StringProperty("")
     lbl_pw = StringProperty("")
+    lbl_interval = StringProperty("")
+    lbl_adaptive = StringProperty("")
+    lbl_fastpath = StringProperty("")
     lbl_connect = StringProperty("")
     lbl_lang = StringProperty("")
     lbl_demo = StringProperty("")
@@ -913,6 +1074,11 @@ class ConnectionScreen(Screen):
         self.subtitle = t("Портативный монитор LTE Huawei")
         self.lbl_ip = t("IP адрес:")
         self.lbl_pw = t("Пароль:")
+        self.lbl_interval = t("Опрос (сек):")
+        self.lbl_adaptive = t("Адаптивный опрос (чаще при юстировке, "
+                              "интервал выше — потолок)")
+        self.lbl_fastpath = t("Быстрый разбор signal и трафика (выкл. — "
+                              "стандартный клиент huawei_lte_api)")
         self.lbl_connect = t("Подключиться")
         self.lbl_lang = t("Язык:")
         self.lbl_demo = t("Тестовый режим (без модема)")
@@ -957,7 +1123,13 @@ class ConnectionScreen(Screen):
                 "Неверный IP-адрес: {ip}\nПример: 192.168.8.1").format(ip=ip)
             return
         self.status_lbl.text = t("Подключение...")
-        app.connect(ip, self.pw_input.text)
+        try:
+            interval = float(self.interval_spinner.text)
+        except ValueError:
+            interval = ADAPTIVE_INTERVAL_MAX
+        app.connect(ip, self.pw_input.text, interval=interval,
+                    adaptive=self.adaptive_check.active,
+                    fastpath=self.fastpath_check.active)
 
 
 class MonitorScreen(Screen):
@@ -1144,19 +1316,39 @@ class Hua4GMonApp(App):
         self.title = f"{APP_NAME} v{__version__}"
         self._stop_event = threading.Event()
         self._thread: threading.Thread | None = None
-        self.client: Client | None = None
+        # Фоновый опрос (backoff, переподключение) — core.Poller; он и
+        # разовые операции с роутером — задачи одного цикла asyncio.
+        self.poller: Poller | None = None
+        self.aio = AsyncRunner(
+            post=lambda fn: Clock.schedule_once(lambda dt: fn()))
+        self.aio.start()
+        # Один HTTP-сеанс (keep-alive) на всё время работы приложения.
+        self.http = requests.Session()
+        self.router: RouterSession | None = None
+        # Что умеет модель роутера — в приватной папке приложения, чтобы
+        # не перебирать неподдерживаемые запросы при каждом подключении.
+        self.capability_cache = CapabilityCache(
+            os.path.join(self.user_data_dir, CAPABILITIES_FILE))
+        self.capabilities: DeviceCapabilities | None = None
         self._cached_ip = ""
         self._cached_pw = ""
         self.connected = False
         self.auto_reconnect = True
         self.demo_mode = False
-        self.reconnect_delay = RECONNECT_DELAY_INITIAL
-        self.dir_history: list = []
+        # Выбор на экране подключения (ConnectionScreen.on_connect)
+        self.poll_interval = ADAPTIVE_INTERVAL_MAX
+        self.adaptive_poll = True
+        self.fastpath = True
+        self.dir_history = RingBuffer(DIRECTION_LOOKBACK * 2)
         self.peak_values: dict[str, Any] = dict.fromkeys(DYNAMIC_PARAMS, '-')
-        self.values: dict[str, list] = {p: [] for p in DYNAMIC_PARAMS}
+        self.values: dict[str, RingBuffer] = {
+            p: RingBuffer(GRAPH_HISTORY) for p in DYNAMIC_PARAMS}
         self.device_info: dict[str, Any] = {}
-        self.last_data: dict[str, Any] = {}
+        self.last_sample: Sample | None = None
         self._data_lock = threading.Lock()
+        # Что уже показано на мониторе: _update_ui выставляет свойства
+        # Kivy только для изменившихся значений.
+        self.view = ViewModel()
         self.graph_param = 'rsrp'
         self._fs_graph = None
 
@@ -1167,32 +1359,48 @@ class Hua4GMonApp(App):
 
     # ---- Подключение ----
 
+    @property
+    def client(self) -> Client | None:
+        """Текущий клиент опроса (после переподключения — новый)."""
+        poller = self.poller
+        return poller.client if poller is not None else None
+
+    def _busy(self) -> bool:
+        """Идёт подключение, демо или опрос — второй запуск не нужен."""
+        return ((self._thread is not None and self._thread.is_alive())
+                or (self.poller is not None and self.poller.is_running))
+
     def _reset_session(self) -> None:
         self.dir_history.clear()
         self.peak_values = dict.fromkeys(DYNAMIC_PARAMS, '-')
-        self.values = {p: [] for p in DYNAMIC_PARAMS}
+        for vals in self.values.values():
+            vals.clear()
         with self._data_lock:
-            self.last_data = {}
+            self.last_sample = None
 
-    def connect(self, ip: str, password: str) -> None:
+    def connect(self, ip: str, password: str, *,
+                interval: float = ADAPTIVE_INTERVAL_MAX,
+                adaptive: bool = True, fastpath: bool = True) -> None:
         # Защита от повторного нажатия: иначе поднимется второй воркер,
-        # и два потока начнут наперегонки переустанавливать self.client.
-        if self._thread is not None and self._thread.is_alive():
+        # и два потока начнут наперегонки переустанавливать клиента.
+        if self._busy():
             logger.info("Connect ignored: worker already running")
             return
         self.demo_mode = False
         self._cached_ip = ip
         self._cached_pw = password
+        self.poll_interval = interval
+        self.adaptive_poll = adaptive
+        self.fastpath = fastpath
         self._stop_event.clear()
         self.auto_reconnect = True
-        self.reconnect_delay = RECONNECT_DELAY_INITIAL
         self._reset_session()
         self._thread = threading.Thread(target=self._worker, daemon=True)
         self._thread.start()
 
     def start_demo(self) -> None:
         """Тестовый режим: демо-данные без реального модема (для эмулятора)."""
-        if self._thread is not None and self._thread.is_alive():
+        if self._busy():
             logger.info("Demo ignored: worker already running")
             return
         self.demo_mode = True
@@ -1243,12 +1451,7 @@ class Hua4GMonApp(App):
                 'CurrentMonthDownload': 1048576 * 1024 * 8,
                 'CurrentMonthUpload': 1048576 * 1024,
             }
-            enodeb, sector = parse_cell_id(data['cell_id'])
-            data['enodeb'] = enodeb
-            data['sector'] = sector
-            data['aggregation'] = ("Активна" if "+" in data['band']
-                                   else "Нет (Single)")
-            self._update_ui(data)
+            self._update_ui(Sample(time.time(), enrich_data(data)))
             self._set_status(t("ДЕМО"), (0.9, 0.6, 0.2, 1))
             i += 1
             if self._stop_event.wait(1.0):
@@ -1263,12 +1466,13 @@ class Hua4GMonApp(App):
                 and threading.current_thread() is not self._thread):
             self._thread.join(timeout=3.0)
         self._thread = None
-        if self.client is not None:
-            try:
-                self.client.user.logout()
-            except Exception:
-                logger.debug("Logout failed (ignored)", exc_info=True)
-            self.client = None
+        if self.poller is not None:
+            self.poller.stop()              # отмена сразу, без ожидания тика
+            self.poller = None
+        self.aio.cancel_group('session')
+        if self.router is not None:
+            self.router.close()             # logout; сокет остаётся
+            self.router = None
         self.device_info = {}
         self._goto_connection()
 
@@ -1278,82 +1482,53 @@ class Hua4GMonApp(App):
 
     # ---- Фоновый поток опроса ----
 
+    def _login(self) -> tuple[Client, dict[str, Any]]:
+        """Вход + проверка (device.information()) на общем HTTP-сеансе."""
+        self.router = RouterSession(
+            f"http://{self._cached_ip}", 'admin', self._cached_pw,
+            connection_cls=Connection,
+            client_cls=(fast_client_factory(Client) if self.fastpath
+                        else Client),
+            http_session=self.http, timeout=4)
+        client = self.router.open()
+        return client, client.device.information() or {}
+
     def _worker(self) -> None:
         try:
-            self.client = Client(Connection(
-                f"http://{self._cached_ip}", username='admin',
-                password=self._cached_pw, timeout=4))
-            self.device_info = self.client.device.information() or {}
-            self.connected = True
-            self._goto_monitor()
+            client, self.device_info = self._login()
+            self.capabilities = self.capability_cache.for_device(
+                self.device_info)
         except Exception as e:
             logger.warning("Connect failed: %s", e)
             self._show_conn_error(str(e))
             return
+        if self._stop_event.is_set():     # отключились, пока шёл вход
+            return
+        # Адаптивный опрос (по умолчанию включён): 5 Гц, пока крутят
+        # антенну, и до выбранного интервала на закреплённой мачте —
+        # бережём батарею. Без него — ровно выбранный интервал.
+        interval = self.poll_interval
+        poller = Poller(self.router.recover, interval=interval,
+                        auto_reconnect=self.auto_reconnect,
+                        adaptive=(AdaptiveInterval(ceiling=interval)
+                                  if self.adaptive_poll else None),
+                        capabilities=self.capabilities)
+        poller.subscribe(self._on_sample)
+        poller.subscribe_status(self._on_poller_status)
+        self.poller = poller
+        self.connected = True
+        self._goto_monitor()
+        poller.start(client, runner=self.aio)
 
-        tick = 0
-        month_cache: dict[str, Any] = {}
-        while not self._stop_event.is_set():
-            client = self.client
-            if client is None:
-                break
-            try:
-                sig = client.device.signal()
-                plmn = client.net.current_plmn()
-                status = client.monitoring.status()
-                traffic = client.monitoring.traffic_statistics()
-                # Месячная статистика меняется медленно и есть не на всех
-                # моделях (USB-стики часто без неё) — опрашиваем редко и
-                # молча игнорируем, если endpoint недоступен.
-                if tick % 30 == 0:
-                    try:
-                        ms = client.monitoring.month_statistics()
-                        if ms:
-                            month_cache = ms
-                    except Exception:
-                        # Нет на части моделей (USB-стики) — это нормально.
-                        logger.debug("month_statistics unavailable",
-                                     exc_info=True)
-                tick += 1
-                data = {**(sig or {}), **(plmn or {}),
-                        **(status or {}), **(traffic or {}), **month_cache}
-                data['plmn'] = (plmn or {}).get('Numeric',
-                                                data.get('plmn', ''))
-                enodeb, sector = parse_cell_id(data.get('cell_id'))
-                if enodeb is not None:
-                    data['enodeb'] = enodeb
-                    data['sector'] = sector
-                band_str = str(data.get('band', ''))
-                data['aggregation'] = ("Активна"
-                                       if ("+" in band_str or "CA" in band_str)
-                                       else "Нет (Single)")
-                self._update_ui(data)
-                self.reconnect_delay = RECONNECT_DELAY_INITIAL
-            except Exception as e:
-                logger.warning("Monitor tick failed: %s", e)
-                if self.auto_reconnect and not self._stop_event.is_set():
-                    self._try_reconnect()
-                else:
-                    break
-            if self._stop_event.wait(1.0):
-                break
+    def _on_sample(self, sample: Sample) -> None:
+        self._update_ui(sample)
 
-    def _try_reconnect(self) -> None:
-        delay = min(self.reconnect_delay, RECONNECT_DELAY_MAX)
-        self._set_status(t("Переподключение через {d:.0f}с...").format(
-            d=delay), (0.9, 0.5, 0.2, 1))
-        if self._stop_event.wait(delay):
-            return
-        try:
-            self.client = Client(Connection(
-                f"http://{self._cached_ip}", username='admin',
-                password=self._cached_pw, timeout=4))
-            self.client.device.information()
-            self.reconnect_delay = RECONNECT_DELAY_INITIAL
+    def _on_poller_status(self, event: str, payload: Any) -> None:
+        if event == STATUS_RECONNECTING:
+            self._set_status(t("Переподключение через {d:.0f}с...").format(
+                d=payload), (0.9, 0.5, 0.2, 1))
+        elif event == STATUS_RECONNECTED:
             self._set_status(t("Подключено"), (0.2, 0.8, 0.4, 1))
-        except Exception:
-            self.reconnect_delay = min(self.reconnect_delay * 2,
-                                       RECONNECT_DELAY_MAX)
 
     # ---- Обновление UI (главный поток Kivy) ----
 
@@ -1372,20 +1547,20 @@ class Hua4GMonApp(App):
     @mainthread
     def _set_status(self, text: str, color) -> None:
         scr = self.sm.get_screen('monitor')
-        scr.status_lbl.text = text
-        scr.status_lbl.color = color
+        self.view.assign(scr.status_lbl, text=text, color=color)
 
     @mainthread
-    def _update_ui(self, data: dict[str, Any]) -> None:
+    def _update_ui(self, sample: Sample) -> None:
         with self._data_lock:
-            self.last_data = dict(data)
+            self.last_sample = sample
         scr = self.sm.get_screen('monitor')
+        show = self.view.assign
         if not self.demo_mode:
-            scr.status_lbl.text = t("Подключено")
-            scr.status_lbl.color = (0.2, 0.8, 0.4, 1)
+            show(scr.status_lbl, text=t("Подключено"),
+                 color=(0.2, 0.8, 0.4, 1))
 
         current_vals: dict[str, float | None] = {
-            p: extract_number(data.get(p)) for p in DYNAMIC_PARAMS}
+            p: getattr(sample, p) for p in DYNAMIC_PARAMS}
 
         box_by_param = {'rsrp': scr.rsrp_box, 'rssi': scr.rssi_box,
                         'sinr': scr.sinr_box, 'rsrq': scr.rsrq_box}
@@ -1393,41 +1568,33 @@ class Hua4GMonApp(App):
             val = current_vals[p]
             box = box_by_param[p]
             if val is None:
-                box.metric_value = '-'
-                box.metric_status = t("Нет данных")
-                box.metric_color = (0.5, 0.5, 0.5, 1)
+                show(box, metric_value='-', metric_status=t("Нет данных"),
+                     metric_color=(0.5, 0.5, 0.5, 1))
                 continue
             status_text, hexcolor, _ = evaluate_signal(p, val)
-            box.metric_value = f"{val:g}"
-            box.metric_status = t(status_text)
-            box.metric_color = _hex_to_rgba(hexcolor)
             if self.peak_values[p] == '-' or val > self.peak_values[p]:
                 self.peak_values[p] = val
-            box.metric_peak = t("Пик: {v}").format(v=self.peak_values[p])
+            show(box, metric_value=f"{val:g}", metric_status=t(status_text),
+                 metric_color=_hex_to_rgba(hexcolor),
+                 metric_peak=t("Пик: {v}").format(v=self.peak_values[p]))
             self.values[p].append(val)
-            if len(self.values[p]) > 100:
-                self.values[p].pop(0)
 
         # Стрелка тенденции (по RSRP)
         rsrp = current_vals.get('rsrp')
         if rsrp is not None:
             self.dir_history.append(rsrp)
-            if len(self.dir_history) > DIRECTION_LOOKBACK * 2:
-                self.dir_history.pop(0)
             arrow, hexcolor, text = self._direction()
-            scr.dir_lbl.text = arrow
-            scr.dir_lbl.color = _hex_to_rgba(hexcolor)
-            scr.dir_text_lbl.text = text
+            show(scr.dir_lbl, text=arrow, color=_hex_to_rgba(hexcolor))
+            show(scr.dir_text_lbl, text=text)
 
         # Джиттер
-        if len(self.values['rsrp']) >= JITTER_WINDOW:
-            recent = self.values['rsrp'][-JITTER_WINDOW:]
-            jitter = max(recent) - min(recent)
-            jcol = ('green' if jitter < 3
-                    else 'orange' if jitter < 7 else 'red')
-            scr.jitter_lbl.text = t(
-                "Джиттер: {j:.1f} dB").format(j=jitter)
-            scr.jitter_lbl.color = _hex_to_rgba(jcol)
+        spread = jitter(self.values['rsrp'])
+        if spread is not None:
+            jcol = ('green' if spread < 3
+                    else 'orange' if spread < 7 else 'red')
+            show(scr.jitter_lbl,
+                 text=t("Джиттер: {j:.1f} dB").format(j=spread),
+                 color=_hex_to_rgba(jcol))
 
         # График выбранного параметра (на мониторе и в fullscreen, если открыт)
         self._draw_graph(scr.signal_graph)
@@ -1489,9 +1656,13 @@ class Hua4GMonApp(App):
         """Заполняет экран Информация из последних данных и device_info."""
         scr = self.sm.get_screen('info')
         with self._data_lock:
-            data = dict(self.last_data)
+            sample = self.last_sample
+        if sample is None:
+            sample = Sample(0.0, {})
+        # Sample не меняется после публикации — читаем без копии.
+        data = sample.data
 
-        earfcn_raw = data.get('earfcn', data.get('Earfcn', '-'))
+        earfcn_raw = sample.earfcn if sample.earfcn is not None else '-'
         plmn = str(data.get('plmn', '-'))
         op = ''
         if plmn != '-' and len(plmn) >= 5:
@@ -1522,7 +1693,7 @@ class Hua4GMonApp(App):
             f"{t('Cell (Локальный сектор)')}: {g('sector')}",
         ]
         # TAC (Tracking Area Code) — зона, в которой работает сота
-        tac = _first_present(data, ('tac', 'TAC'))
+        tac = sample.tac
         if tac is not None:
             tower_lines.append(f"{t('TAC (зона)')}: {tac}")
         scr.tower_block.text = "\n".join(tower_lines)
@@ -1546,53 +1717,54 @@ class Hua4GMonApp(App):
 
         # Состояние
         import datetime
-        up = g('CurrentConnectTime', g('ConnectionTime', 0))
-        try:
-            up_i = int(up)
-            uptime = str(datetime.timedelta(seconds=up_i)) if up_i > 0 else '-'
-        except (TypeError, ValueError):
-            uptime = '-'
-        rsrp_v = self.values.get('rsrp', [])
-        sinr_v = self.values.get('sinr', [])
+        up_i = int(sample.uptime or 0)
+        uptime = str(datetime.timedelta(seconds=up_i)) if up_i > 0 else '-'
+        rsrp_v = self.values['rsrp']
+        sinr_v = self.values['sinr']
+        if data.get('tick_ms') is None:
+            tick_text = '-'
+        elif data.get('stale'):
+            tick_text = t("{ms} мс (устарело: {names})").format(
+                ms=data['tick_ms'], names=", ".join(data['stale']))
+        else:
+            tick_text = t("{ms} мс").format(ms=data['tick_ms'])
         status_lines = [
             f"{t('Время сессии')}: {uptime}",
             f"{t('Температура чипа')}: {g('Temperature', nd)}",
+            f"{t('Время опроса роутера')}: {tick_text}",
             f"{t('Скорость (Download)')}: "
-            f"{format_rate_mbps(g('CurrentDownloadRate', 0))}",
+            f"{format_rate_mbps(sample.dl_rate or 0)}",
             f"{t('Скорость (Upload)')}: "
-            f"{format_rate_mbps(g('CurrentUploadRate', 0))}",
+            f"{format_rate_mbps(sample.ul_rate or 0)}",
             f"{t('Скачано за сессию')}: "
             f"{format_bytes_mb(g('TotalDownload', 0))}",
             f"{t('Отдано за сессию')}: "
             f"{format_bytes_mb(g('TotalUpload', 0))}",
             f"{t('RSRP мин / макс')}: "
-            + (f"{min(rsrp_v):g} / {max(rsrp_v):g} dBm" if rsrp_v else '-'),
+            + (f"{rsrp_v.min():g} / {rsrp_v.max():g} dBm" if rsrp_v else '-'),
             f"{t('SINR мин / макс')}: "
-            + (f"{min(sinr_v):g} / {max(sinr_v):g} dB" if sinr_v else '-'),
+            + (f"{sinr_v.min():g} / {sinr_v.max():g} dB" if sinr_v else '-'),
         ]
         # Модуляция DL/UL — двусторонняя. Показываем обе стороны, если
         # роутер их отдаёт (имена полей варьируются между прошивками).
         # Модуляция передаётся как MCS-индекс — расшифровываем в тип QAM.
-        dl = _first_present(data, ('dl_mcs', 'dlmcs', 'dlMcs'))
-        ul = _first_present(data, ('ul_mcs', 'ulmcs', 'ulMcs'))
-        dl_mod = format_modulation(dl)
-        ul_mod = format_modulation(ul)
+        dl_mod = format_modulation(sample.dl_mcs)
+        ul_mod = format_modulation(sample.ul_mcs)
         if dl_mod is not None:
             status_lines.append(f"{t('Модуляция DL')}: {dl_mod}")
         if ul_mod is not None:
             status_lines.append(f"{t('Модуляция UL')}: {ul_mod}")
         # Мощность передатчика модема (txpower) — косвенный индикатор
         # качества UL: чем выше, тем сильнее модем «вынужден кричать».
-        txp = _first_present(data, ('txpower', 'TxPower', 'tx_power'))
+        txp = sample.txpower
         if txp is not None:
             status_lines.append(f"{t('Мощность передатчика')}: {txp}")
         # Режим MIMO (число потоков)
-        mimo = _first_present(data, ('transmode', 'TransMode', 'mimo'))
+        mimo = sample.mimo
         if mimo is not None:
             status_lines.append(f"{t('Режим MIMO')}: {format_mimo(mimo)}")
         # Месячный трафик (если роутер отдаёт month_statistics)
-        m_dl = _first_present(data, ('CurrentMonthDownload',))
-        m_ul = _first_present(data, ('CurrentMonthUpload',))
+        m_dl, m_ul = sample.month_dl, sample.month_ul
         if m_dl is not None or m_ul is not None:
             status_lines.append(
                 f"{t('Трафик за месяц (↓/↑)')}: "
@@ -1600,11 +1772,9 @@ class Hua4GMonApp(App):
         scr.status_block.text = "\n".join(status_lines)
 
     def _direction(self):
-        if len(self.dir_history) < DIRECTION_LOOKBACK * 2:
+        delta = direction_delta(self.dir_history)
+        if delta is None:
             return "—", "#888888", t("Накапливаю данные...")
-        recent = self.dir_history[-DIRECTION_LOOKBACK:]
-        older = self.dir_history[-DIRECTION_LOOKBACK * 2:-DIRECTION_LOOKBACK]
-        delta = (sum(recent) / len(recent)) - (sum(older) / len(older))
         if delta >= 1.0:
             return ("↑", "#00b894",
                     t("Сигнал улучшается — продолжайте в том же направлении"))
@@ -1616,8 +1786,8 @@ class Hua4GMonApp(App):
 
     # ---- Инструменты: Band Lock / антенна / reboot / белые списки ----
 
-    def _run_bg(self, fn) -> None:
-        threading.Thread(target=fn, daemon=True).start()
+    def _run_bg(self, fn, group: str | None = None) -> None:
+        self.aio.run(fn, group=group)
 
     def _block_in_demo(self) -> bool:
         if self.demo_mode:
@@ -1770,7 +1940,8 @@ class Hua4GMonApp(App):
             self._deliver_router_config([], "Авто", "")
             return
         client = self.client
-        if client is None:
+        caps = self.capabilities
+        if client is None or caps is None:
             self._deliver_router_config(
                 None, None, t("Нет подключения к роутеру."))
             return
@@ -1781,34 +1952,22 @@ class Hua4GMonApp(App):
             antenna_label = None
 
             # --- Band Lock: net/net-mode (GET) ---
-            try:
-                nm = client.net.net_mode() or {}
-                band_names = bands_from_mask(nm.get('LTEBand'))
-                if band_names is None:
-                    warns.append(t("Band Lock: не удалось прочитать"))
-            except Exception:
+            if caps.is_unsupported('net.net_mode'):
                 warns.append(t("Band Lock: не поддерживается моделью"))
-
-            # --- Антенна: device/antenna_settings или antenna_type (GET) ---
+            else:
+                try:
+                    nm = client.net.net_mode() or {}
+                    band_names = bands_from_mask(nm.get('LTEBand'))
+                    if band_names is None:
+                        warns.append(t("Band Lock: не удалось прочитать"))
+                except Exception as e:
+                    caps.record_error('net.net_mode', e)
+                    warns.append(t("Band Lock: не поддерживается моделью"))
+
+            # --- Антенна: перебор геттеров с учётом кеша возможностей ---
             try:
-                code = None
-                for getter in ('get_antenna_settings', 'antenna_type',
-                               'antenna_status', 'antenna_set_type'):
-                    fn = getattr(client.device, getter, None)
-                    if fn is None:
-                        continue
-                    try:
-                        res = fn()
-                    except Exception:
-                        logger.debug("Antenna getter %s failed", getter,
-                                     exc_info=True)
-                        continue
-                    # Логируем сырой ответ — помогает подогнать разбор
-                    # под конкретную модель, если что-то не считалось.
-                    logger.info("Antenna %s -> %r", getter, res)
-                    code = parse_antenna_response(res)
-                    if code is not None:
-                        break
+                code = probe_first(caps, client, ANTENNA_GETTERS,
+                                   parse_antenna_response)
                 if code is not None:
                     rev = {v: k for k, v in ANTENNA_MODES.items()}
                     antenna_label = rev.get(code)
@@ -1819,7 +1978,7 @@ class Hua4GMonApp(App):
 
             self._deliver_router_config(band_names, antenna_label,
                                         "\n".join(warns))
-        self._run_bg(task)
+        self._run_bg(task, group='session')
 
     @mainthread
     def _deliver_router_config(self, band_names, antenna_label,
@@ -1858,6 +2017,10 @@ class Hua4GMonApp(App):
 
     def on_stop(self):
         self._stop_event.set()
+        if self.poller is not None:
+            self.poller.stop()
+        self.aio.stop()
+        self.http.close()
 
 
 def main() -> None:
@@ -8,27 +8,99 @@ Hua4GMon core: чистая логика, общая для всех frontend-о
                           (IP, числа, cell_id, LTE-band, EARFCN, скорости).
     signal_analysis    — оценка качества сигнала (RSRP/SINR/RSSI/RSRQ).
     whitelist          — TCP-пробы для определения режима «белых списков».
+    aio                — один цикл asyncio в фоновом потоке для всех
+                          фоновых задач; мост в главный поток UI.
+    breaker            — circuit breaker для отдельных endpoint.
+    capabilities       — что умеет модель/прошивка: негативный кеш
+                          endpoint (опционально — на диске).
+    connection         — долгоживущая сессия роутера: один HTTP-сеанс,
+                          ленивое восстановление CSRF/входа.
+    decimate           — огибающая min/max по столбцам для длинной
+                          истории графика.
+    fastpath           — быстрый разбор XML горячих endpoint (signal,
+                          traffic-statistics) сразу в числа.
+    fleet              — несколько роутеров в одном процессе: общий цикл
+                          опроса и пул соединений, выборки по устройствам.
+    headless           — запись выборок потоком JSON Lines без UI.
+    lru                — небольшой LRU-кеш (текстуры подписей графика).
+    metrics            — метрики в формате Prometheus и сервер /metrics.
+    poller             — движок опроса роутера (поток или задача
+                          asyncio, backoff,
+                          параллельная выборка тика, публикация Sample).
+    recorder           — потоковая запись сессии на диск (пачками,
+                          fsync, ротация, восстановление после сбоя).
+    ringbuffer         — кольцевой буфер float (array('d')) с O(1)
+                          min/max/sum для истории графиков.
+    schedule           — расписание опроса (период и срок годности
+                          данных для каждого endpoint) и часы тиков.
+    session            — колоночный лог сессии в памяти (типизированные
+                          массивы, словарное кодирование строк).
+    sessiondb          — база сессий SQLite (WAL, индексы по времени,
+                          соте и band) и агрегаты по ним.
+    sessionfile        — двоичный файл сессии .h4gs: сжатые блоки, индекс
+                          по времени, чтение через mmap.
+    viewmodel          — слой представления: в UI уходят только
+                          изменившиеся свойства виджетов.
 
 Ни один модуль здесь НЕ импортирует tkinter, kivy или какую-либо
 библиотеку UI. Можно безопасно использовать из любого frontend:
     * main.py            — desktop (Tkinter)
     * android_main.py    — будущий Android UI (Kivy)
+    * headless.py        — запись без UI (JSON Lines)
     * любые скрипты автоматизации и тесты
 
 Эквивалентные пути импорта:
     from core import evaluate_signal, format_band_label, PLMN_MAP   # короткий
     from core.signal_analysis import evaluate_signal                # явный
 """
+from core.aio import AsyncRunner
+from core.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+)
+from core.capabilities import (
+    CAPABILITIES_FILE,
+    CapabilityCache,
+    DeviceCapabilities,
+    device_key,
+    is_unsupported_error,
+    probe_first,
+)
+from core.connection import (
+    CSRF_ERRORS,
+    ERROR_CSRF,
+    ERROR_LOGIN_REQUIRED,
+    ERROR_NOT_SUPPORTED,
+    ERROR_SYSTEM_BUSY,
+    ERROR_WRONG_SESSION_TOKEN,
+    SESSION_ERRORS,
+    RouterSession,
+    error_code,
+)
 from core.constants import (
+    ADAPTIVE_INTERVAL_MAX,
+    ADAPTIVE_INTERVAL_MIN,
+    AIO_WORKERS,
+    ANTENNA_GETTERS,
     ANTENNA_MODES,
     BAND_FREQ_MAP,
     BANDS,
+    BREAKER_COOLDOWN,
+    BREAKER_COOLDOWN_MAX,
+    BREAKER_THRESHOLD,
     CONTROL_HOSTS_NEUTRAL,
     DIRECTION_LOOKBACK,
     EARFCN_RANGES,
+    FETCH_WORKERS,
+    FLEET_HISTORY,
+    FLEET_WORKERS,
     GRAPH_HISTORY,
     JITTER_WINDOW,
+    LABEL_TEXTURE_CACHE,
     LTEBAND_AUTO_ALL,
+    METRICS_BUCKETS,
     NETBAND_AUTO_MASK,
     NETMODE_AUTO,
     NETMODE_LTE_ONLY,
@@ -36,11 +108,37 @@ from core.constants import (
     PLMN_MAP,
     RECONNECT_DELAY_INITIAL,
     RECONNECT_DELAY_MAX,
-    SESSION_LOG_MAX,
+    RECORD_FLUSH_INTERVAL,
+    RECORD_FSYNC_INTERVAL,
+    RECORD_ROTATE_BYTES,
+    SESSION_CHUNK,
+    SESSION_FILE_BLOCK,
     SIGNAL_THRESHOLDS,
+    TICK_BUDGET,
+    UI_BACKLOG,
     WHITELIST_HOSTS_RU,
     WL_CHECK_TIMEOUT,
 )
+from core.decimate import MinMaxDecimator
+from core.fastpath import (
+    BadResponseError,
+    FastPathClient,
+    FastReader,
+    RouterApiError,
+    fast_client_factory,
+    parse_flat_response,
+)
+from core.fleet import (
+    STATUS_CONNECTED,
+    Fleet,
+    FleetDevice,
+    RouterTarget,
+)
+from core.headless import (
+    JsonLinesWriter,
+    run_headless,
+    sample_record,
+)
 from core.i18n import (
     LANGUAGES,
     available_languages,
@@ -48,6 +146,11 @@ from core.i18n import (
     set_language,
     t,
 )
+from core.lru import LRUCache
+from core.metrics import (
+    MetricsServer,
+    MonitorMetrics,
+)
 from core.parsers import (
     bands_from_mask,
     earfcn_to_band,
@@ -64,10 +167,49 @@ from core.parsers import (
     parse_antenna_value,
     parse_cell_id,
 )
+from core.poller import (
+    SAMPLE_ALIASES,
+    STATUS_ERROR,
+    STATUS_RECONNECTED,
+    STATUS_RECONNECTING,
+    STATUS_STOPPED,
+    AsyncTickFetcher,
+    FetchResult,
+    Poller,
+    Sample,
+    TickFetcher,
+    enrich_data,
+    merge_tick,
+)
+from core.recorder import SessionRecorder, recover_recording
+from core.ringbuffer import RingBuffer
+from core.schedule import (
+    DEFAULT_SCHEDULE,
+    AdaptiveInterval,
+    Endpoint,
+    Schedule,
+    TickClock,
+)
+from core.session import (
+    SESSION_FIELDS,
+    SESSION_NUMERIC,
+    SESSION_STRINGS,
+    SessionStore,
+)
+from core.sessiondb import GroupStats, SessionDatabase, SessionSink
+from core.sessionfile import (
+    SESSION_FILE_SUFFIX,
+    SessionFile,
+    SessionFileWriter,
+    write_session_file,
+)
 from core.signal_analysis import (
     calculate_overall_health,
+    direction_delta,
     evaluate_signal,
+    jitter,
 )
+from core.viewmodel import ViewModel
 from core.whitelist import (
     analyze_whitelist_results,
     tcp_reachable,
@@ -75,12 +217,44 @@ from core.whitelist import (
 
 __all__ = [
     # constants
-    "ANTENNA_MODES", "BAND_FREQ_MAP", "BANDS", "CONTROL_HOSTS_NEUTRAL",
-    "DIRECTION_LOOKBACK", "EARFCN_RANGES", "GRAPH_HISTORY", "JITTER_WINDOW",
-    "LTEBAND_AUTO_ALL", "NETBAND_AUTO_MASK", "NETMODE_AUTO", "NETMODE_LTE_ONLY",
+    "ADAPTIVE_INTERVAL_MAX", "ADAPTIVE_INTERVAL_MIN",
+    "AIO_WORKERS", "ANTENNA_GETTERS", "ANTENNA_MODES", "BAND_FREQ_MAP", "BANDS",
+    "BREAKER_COOLDOWN", "BREAKER_COOLDOWN_MAX", "BREAKER_THRESHOLD",
+    "CONTROL_HOSTS_NEUTRAL",
+    "DIRECTION_LOOKBACK", "EARFCN_RANGES", "FETCH_WORKERS", "FLEET_HISTORY",
+    "FLEET_WORKERS", "GRAPH_HISTORY",
+    "JITTER_WINDOW", "LABEL_TEXTURE_CACHE",
+    "LTEBAND_AUTO_ALL", "METRICS_BUCKETS", "NETBAND_AUTO_MASK", "NETMODE_AUTO", "NETMODE_LTE_ONLY",
     "PARAM_RANGES", "PLMN_MAP", "RECONNECT_DELAY_INITIAL",
-    "RECONNECT_DELAY_MAX", "SESSION_LOG_MAX", "SIGNAL_THRESHOLDS",
+    "RECONNECT_DELAY_MAX", "RECORD_FLUSH_INTERVAL", "RECORD_FSYNC_INTERVAL",
+    "RECORD_ROTATE_BYTES", "SESSION_CHUNK", "SESSION_FILE_BLOCK",
+    "SIGNAL_THRESHOLDS",
+    "TICK_BUDGET", "UI_BACKLOG",
     "WHITELIST_HOSTS_RU", "WL_CHECK_TIMEOUT",
+    # aio
+    "AsyncRunner",
+    # breaker
+    "CLOSED", "HALF_OPEN", "OPEN", "CircuitBreaker",
+    # capabilities
+    "CAPABILITIES_FILE", "CapabilityCache", "DeviceCapabilities",
+    "device_key", "is_unsupported_error", "probe_first",
+    # connection
+    "CSRF_ERRORS", "ERROR_CSRF", "ERROR_LOGIN_REQUIRED", "ERROR_NOT_SUPPORTED",
+    "ERROR_SYSTEM_BUSY", "ERROR_WRONG_SESSION_TOKEN", "SESSION_ERRORS",
+    "RouterSession", "error_code",
+    # decimate
+    "MinMaxDecimator",
+    # fastpath
+    "BadResponseError", "FastPathClient", "FastReader", "RouterApiError",
+    "fast_client_factory", "parse_flat_response",
+    # fleet
+    "STATUS_CONNECTED", "Fleet", "FleetDevice", "RouterTarget",
+    # headless
+    "JsonLinesWriter", "run_headless", "sample_record",
+    # lru
+    "LRUCache",
+    # metrics
+    "MetricsServer", "MonitorMetrics",
     # parsers
     "bands_from_mask", "earfcn_to_band", "extract_number", "first_present",
     "format_band_label", "format_bytes_mb", "format_mimo",
@@ -88,8 +262,30 @@ __all__ = [
     "format_rate_mbps",
     "is_valid_ip", "mcs_to_modulation",
     "parse_antenna_response", "parse_antenna_value", "parse_cell_id",
+    # poller
+    "SAMPLE_ALIASES", "STATUS_ERROR", "STATUS_RECONNECTED", "STATUS_RECONNECTING",
+    "STATUS_STOPPED",
+    "AsyncTickFetcher", "FetchResult", "Poller", "Sample", "TickFetcher",
+    "enrich_data", "merge_tick",
+    # recorder
+    "SessionRecorder", "recover_recording",
+    # ringbuffer
+    "RingBuffer",
+    # schedule
+    "DEFAULT_SCHEDULE", "AdaptiveInterval", "Endpoint", "Schedule",
+    "TickClock",
+    # session
+    "SESSION_FIELDS", "SESSION_NUMERIC", "SESSION_STRINGS", "SessionStore",
+    # sessiondb
+    "GroupStats", "SessionDatabase", "SessionSink",
+    # sessionfile
+    "SESSION_FILE_SUFFIX", "SessionFile", "SessionFileWriter",
+    "write_session_file",
     # signal_analysis
-    "calculate_overall_health", "evaluate_signal",
+    "calculate_overall_health", "direction_delta", "evaluate_signal",
+    "jitter",
+    # viewmodel
+    "ViewModel",
     # whitelist
     "analyze_whitelist_results", "tcp_reachable",
     # i18n
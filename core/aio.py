@@ -0,0 +1,198 @@
+"""
+Один цикл asyncio в одном фоновом потоке для всего фонового I/O.
+
+Раньше каждое действие заводило свой ``threading.Thread``: подключение,
+проверка белых списков, Band Lock, антенна, reboot, чтение настроек
+модема и даже каждый щелчок «счётчика Гейгера» (``winsound.Beep``).
+Плюс поток опроса, который ``disconnect()`` ждал через
+``join(timeout=interval+2)`` — UI замирал на секунды.
+
+``AsyncRunner`` держит один event loop в потоке ``hua4gmon-aio``:
+
+* ``submit(coro)`` — корутина как задача цикла (так работает
+  ``Poller.start(client, runner=...)``);
+* ``run(fn, *args)`` — блокирующий вызов (huawei_lte_api синхронный) на
+  ограниченном пуле исполнителей цикла: число потоков больше не растёт с
+  числом нажатий;
+* ``on_done``/``on_error`` доставляются в главный поток UI через
+  переданный ``post`` — ``root.after(0, ...)`` в Tk,
+  ``Clock.schedule_once`` в Kivy;
+* ``cancel_group(name)`` отменяет сразу все задачи группы (например,
+  сессии роутера при ``disconnect()``): ожидание прерывается мгновенно,
+  а ответ уже отправленного HTTP-запроса просто отбрасывается — его
+  ``on_done`` не вызывается.
+
+Модуль не знает ни об UI, ни о huawei_lte_api.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import logging
+import threading
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from core.constants import AIO_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRunner:
+    """Фоновый цикл asyncio с мостом в главный поток UI.
+
+    Использование::
+
+        aio = AsyncRunner(post=lambda fn: root.after(0, fn))
+        aio.start()
+        aio.run(read_config, on_done=apply_config, group='session')
+        poller.start(client, runner=aio)
+        ...
+        aio.cancel_group('session')     # disconnect()
+        aio.stop()                      # выход из программы
+
+    ``post`` — как выполнить функцию без аргументов в главном потоке;
+    None — колбэки вызываются прямо в потоке цикла.
+    """
+
+    def __init__(self, post: Callable[[Callable[[], None]], Any] | None = None,
+                 *, max_workers: int = AIO_WORKERS):
+        self._post = post
+        self._max_workers = max_workers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._groups: dict[str, set[Future]] = {}
+
+    # ---- Жизненный цикл ----
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Поднимает поток с циклом; возвращается, когда цикл готов."""
+        if self.is_running:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                            thread_name_prefix="hua4gmon-io")
+        loop = self._loop = asyncio.new_event_loop()
+        loop.set_default_executor(self._executor)
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(loop, ready),
+                                        daemon=True, name="hua4gmon-aio")
+        self._thread.start()
+        ready.wait()
+
+    @staticmethod
+    def _serve(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def stop(self, timeout: float | None = 2.0) -> None:
+        """Отменяет все задачи и останавливает цикл.
+
+        Зависшие HTTP-запросы в пуле не ждём: их потоки дорабатывают
+        сами (у huawei_lte_api свой таймаут), результат выбрасывается.
+        """
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        with self._lock:
+            self._groups.clear()
+        done = asyncio.run_coroutine_threadsafe(self._cancel_all(), loop)
+        with contextlib.suppress(Exception):
+            done.result(timeout=timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        if threading.current_thread() is not thread:
+            thread.join(timeout=timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._loop = self._thread = self._executor = None
+
+    @staticmethod
+    async def _cancel_all() -> None:
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---- Задачи ----
+
+    def submit(self, coro: Coroutine[Any, Any, Any], *,
+               group: str | None = None) -> Future:
+        """Запускает корутину задачей цикла; потокобезопасно.
+
+        Возвращает ``concurrent.futures.Future``: его ``cancel()``
+        отменяет задачу в цикле.
+        """
+        loop = self._loop
+        if loop is None or not self.is_running:
+            coro.close()
+            raise RuntimeError("AsyncRunner is not running")
+        fut = asyncio.run_coroutine_threadsafe(coro, loop)
+        if group is not None:
+            with self._lock:
+                self._groups.setdefault(group, set()).add(fut)
+            fut.add_done_callback(functools.partial(self._forget, group))
+        return fut
+
+    def run(self, fn: Callable[..., Any], *args: Any,
+            group: str | None = None,
+            on_done: Callable[[Any], None] | None = None,
+            on_error: Callable[[Exception], None] | None = None) -> Future:
+        """Блокирующий ``fn(*args)`` на пуле цикла.
+
+        Результат (или исключение) уходит в ``on_done`` (``on_error``) в
+        главном потоке; отменённая задача не вызывает ни того, ни
+        другого. Без ``on_error`` исключение пишется в лог.
+        """
+        return self.submit(self._call(fn, args, on_done, on_error),
+                           group=group)
+
+    async def _call(self, fn: Callable[..., Any], args: tuple[Any, ...],
+                    on_done: Callable[[Any], None] | None,
+                    on_error: Callable[[Exception], None] | None) -> Any:
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(None, functools.partial(fn, *args))
+        except Exception as e:
+            if on_error is None:
+                logger.error("Background task %s failed",
+                             getattr(fn, '__name__', fn), exc_info=True)
+            else:
+                self._deliver(on_error, e)
+            raise
+        if on_done is not None:
+            self._deliver(on_done, result)
+        return result
+
+    def _deliver(self, callback: Callable[[Any], None], value: Any) -> None:
+        call = functools.partial(callback, value)
+        try:
+            if self._post is None:
+                call()
+            else:
+                self._post(call)
+        except Exception:
+            logger.exception("Task callback failed")
+
+    def cancel_group(self, group: str) -> int:
+        """Отменяет все незавершённые задачи группы; сколько отменили."""
+        with self._lock:
+            futures = self._groups.pop(group, set())
+        return sum(1 for fut in futures if fut.cancel())
+
+    def _forget(self, group: str, fut: Future) -> None:
+        with self._lock:
+            futures = self._groups.get(group)
+            if futures is not None:
+                futures.discard(fut)
@@ -0,0 +1,89 @@
+"""
+Circuit breaker для отдельных endpoint роутера.
+
+Раньше любая ошибка тика — даже второстепенного ``status()`` —
+запускала полное переподключение: новый вход, новая сессия. Роутер,
+у которого один endpoint стабильно отвечает ошибкой, получал «шторм»
+логинов и упирался в лимит (108003/108006).
+
+Теперь у каждого endpoint свой автомат:
+
+* CLOSED    — опрашиваем как обычно, считаем ошибки подряд;
+* OPEN      — после ``threshold`` ошибок подряд endpoint не опрашиваем
+              ``cooldown`` секунд (его значение устаревает и пропадает
+              из UI по ``stale_after``);
+* HALF_OPEN — по истечении паузы одна пробная попытка: успех закрывает
+              цепь, ошибка снова открывает её с удвоенной паузой (до
+              ``max_cooldown``).
+
+Полное переподключение остаётся только для ошибок входа/CSRF и для
+самого сигнала (``required`` endpoint) — см. ``core.poller.Poller``.
+"""
+from __future__ import annotations
+
+import logging
+
+from core.constants import (
+    BREAKER_COOLDOWN,
+    BREAKER_COOLDOWN_MAX,
+    BREAKER_THRESHOLD,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Автомат CLOSED → OPEN → HALF_OPEN для одного endpoint.
+
+    Время — ``time.monotonic()`` вызывающего. Не потокобезопасен —
+    используется только из потока опроса.
+    """
+
+    def __init__(self, name: str = "", *, threshold: int = BREAKER_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN,
+                 max_cooldown: float = BREAKER_COOLDOWN_MAX):
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.trips = 0          # сколько раз цепь размыкалась
+
+    def allow(self, now: float) -> bool:
+        """Можно ли опросить endpoint на тике в момент ``now``."""
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            logger.info("Endpoint %s: half-open probe", self.name)
+        return self.state != OPEN
+
+    def success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Endpoint %s: circuit closed", self.name)
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+
+    def failure(self, now: float) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open(now)
+        elif self.state == CLOSED and self.failures >= self.threshold:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+        logger.warning("Endpoint %s: circuit open for %.0f s after %d "
+                       "failures", self.name, self.cooldown, self.failures)
+
+    def reset(self) -> None:
+        self.success()
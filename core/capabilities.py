@@ -0,0 +1,246 @@
+"""
+Что умеет конкретный роутер: негативный кеш endpoint по модели и
+прошивке.
+
+USB-стики и старые CPE не отдают часть API: ``month_statistics()``,
+геттеры антенны, иногда ``net_mode()``. Раньше цикл опроса раз в
+несколько минут снова и снова платил за такой запрос ошибкой или
+таймаутом, а «Прочитать с роутера» каждый раз перебирал четыре геттера
+антенны.
+
+``CapabilityCache`` запоминает результат по ключу модели/прошивки из
+``device.information()`` (DeviceName + HardwareVersion +
+SoftwareVersion): endpoint, ответивший «не поддерживается» (100002),
+больше не вызывается — ни в этом подключении, ни в следующих. Удачные
+вызовы тоже отмечаются, чтобы при переборе альтернатив (геттеры
+антенны) сразу идти к работающему. После обновления прошивки ключ
+меняется, и всё проверяется заново.
+
+Ошибочно «выключить» endpoint навсегда дорого (на Android кеш лежит на
+диске), поэтому:
+
+* «не поддерживается» — только по коду API 100002; сетевые ошибки и
+  неразобранные ответы (``core.BadResponseError``) не считаются;
+* запоминается после ``confirmations`` таких ответов подряд (удачный
+  вызов счёт сбрасывает) — один сбой прошивки не в счёт;
+* запись «не поддерживается» живёт ``ttl`` секунд, потом endpoint
+  пробуется снова.
+
+По умолчанию кеш живёт только в памяти (desktop-версия ничего не пишет
+на диск). Если передан ``path``, он читается при создании и
+перезаписывается атомарно (``os.replace``) при каждом изменении.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from core.connection import ERROR_NOT_SUPPORTED, error_code
+from core.schedule import Endpoint
+
+logger = logging.getLogger(__name__)
+
+CAPABILITIES_FILE = "capabilities.json"
+# Сколько ответов 100002 подряд нужно, чтобы запомнить «не умеет».
+UNSUPPORTED_CONFIRMATIONS = 2
+# Через сколько секунд «не умеет» проверяется заново (неделя).
+UNSUPPORTED_TTL = 7 * 24 * 3600.0
+
+
+def device_key(info: dict[str, Any] | None) -> str:
+    """Ключ модели/прошивки из ответа ``device.information()``."""
+    info = info or {}
+    parts = (info.get('DeviceName'), info.get('HardwareVersion'),
+             info.get('SoftwareVersion'))
+    return "|".join(str(p or '?') for p in parts)
+
+
+def is_unsupported_error(exc: BaseException) -> bool:
+    """Ошибка означает «модель этого не умеет», а не сбой связи."""
+    return error_code(exc) == ERROR_NOT_SUPPORTED
+
+
+class DeviceCapabilities:
+    """Возможности одного роутера (вид на ``CapabilityCache``).
+
+    Имена — пути API клиента, как в ``core.schedule.Endpoint.path``:
+    ``'monitoring.month_statistics'``, ``'device.antenna_type'``, …
+    """
+
+    def __init__(self, cache: CapabilityCache, key: str):
+        self._cache = cache
+        self.key = key
+
+    def supports(self, path: str) -> bool | None:
+        """True/False — уже проверено; None — ещё не пробовали."""
+        return self._cache.lookup(self.key, path)
+
+    def is_unsupported(self, path: str) -> bool:
+        return self.supports(path) is False
+
+    def record(self, path: str, supported: bool) -> None:
+        self._cache.record(self.key, path, supported)
+
+    def record_error(self, path: str, exc: BaseException) -> bool:
+        """Учитывает ответ «не поддерживается»; после ``confirmations``
+        таких ответов подряд запоминает endpoint как неподдерживаемый.
+
+        Возвращает True, если запомнили. Сетевые и прочие ошибки не
+        кешируются — они могут быть временными.
+        """
+        if is_unsupported_error(exc):
+            return self._cache.strike(self.key, path)
+        return False
+
+    def ordered(self, paths: Iterable[str]) -> list[str]:
+        """Альтернативы для перебора: рабочие — первыми, «нет» — долой."""
+        known, unknown = [], []
+        for path in paths:
+            state = self.supports(path)
+            if state is True:
+                known.append(path)
+            elif state is None:
+                unknown.append(path)
+        return known + unknown
+
+
+class CapabilityCache:
+    """Кеш возможностей всех встреченных роутеров; потокобезопасен.
+
+    На диске: ``{ключ модели: {путь: [поддерживается, время проверки]}}``.
+    """
+
+    def __init__(self, path: str | os.PathLike[str] | None = None, *,
+                 confirmations: int = UNSUPPORTED_CONFIRMATIONS,
+                 ttl: float = UNSUPPORTED_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.path = os.fspath(path) if path is not None else None
+        self.confirmations = max(1, confirmations)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: dict[str, dict[str, tuple[bool, float]]] = {}
+        # Ответы 100002 подряд, ещё не ставшие записью (только в памяти).
+        self._strikes: dict[tuple[str, str], int] = {}
+        if self.path is not None:
+            self._load()
+
+    def for_device(self, info: dict[str, Any] | None) -> DeviceCapabilities:
+        return DeviceCapabilities(self, device_key(info))
+
+    def lookup(self, key: str, path: str) -> bool | None:
+        with self._lock:
+            state = self._data.get(key, {}).get(path)
+        if state is None:
+            return None
+        supported, checked = state
+        if not supported and self._clock() - checked >= self.ttl:
+            return None                     # пора проверить заново
+        return supported
+
+    def record(self, key: str, path: str, supported: bool) -> None:
+        with self._lock:
+            if supported:
+                self._strikes.pop((key, path), None)
+            entry = self._data.setdefault(key, {})
+            old = entry.get(path)
+            if old is not None and old[0] is supported and (
+                    supported or self._clock() - old[1] < self.ttl):
+                return
+            entry[path] = (supported, self._clock())
+            logger.info("Capability %s: %s = %s", key, path, supported)
+            # Изменения редки (раз на модель), пишем прямо под замком —
+            # так снимки не обгонят друг друга на диске.
+            self._save()
+
+    def strike(self, key: str, path: str) -> bool:
+        """Ещё один ответ «не поддерживается»; True — теперь запомнен."""
+        with self._lock:
+            n = self._strikes.get((key, path), 0) + 1
+            if n < self.confirmations:
+                self._strikes[(key, path)] = n
+                return False
+            self._strikes.pop((key, path), None)
+        self.record(key, path, False)
+        return True
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Capability cache %s unreadable, starting empty",
+                           self.path, exc_info=True)
+            return
+        if isinstance(raw, dict):
+            self._data = {
+                str(k): {str(p): _load_state(v) for p, v in entry.items()}
+                for k, entry in raw.items() if isinstance(entry, dict)}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({k: {p: list(v) for p, v in entry.items()}
+                           for k, entry in self._data.items()},
+                          f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.warning("Cannot save capability cache to %s", self.path,
+                           exc_info=True)
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+
+def _load_state(raw: Any) -> tuple[bool, float]:
+    """Запись файла → (поддерживается, время проверки).
+
+    Старый формат — просто bool, без времени: такое «не умеет» считается
+    просроченным и проверяется заново.
+    """
+    if isinstance(raw, (list, tuple)) and len(raw) == 2:
+        try:
+            return bool(raw[0]), float(raw[1])
+        except (TypeError, ValueError):
+            pass
+    return bool(raw), 0.0
+
+
+def probe_first(caps: DeviceCapabilities, client: Any, paths: Iterable[str],
+                parse: Callable[[Any], Any]) -> Any:
+    """Перебирает альтернативные геттеры, пока ``parse`` не даст не-None.
+
+    Известные как рабочие идут первыми, неподдерживаемые пропускаются;
+    итог каждой попытки запоминается в ``caps``. Геттера нет в этой
+    версии huawei_lte_api — он просто пропускается (это не свойство
+    модели, в кеш не пишется).
+    """
+    for path in caps.ordered(paths):
+        try:
+            fn = Endpoint(path, path).resolve(client)
+        except AttributeError:
+            continue
+        try:
+            res = fn()
+        except Exception as e:
+            caps.record_error(path, e)
+            logger.debug("Getter %s failed", path, exc_info=True)
+            continue
+        # Логируем сырой ответ — помогает подогнать разбор под модель.
+        logger.info("Getter %s -> %r", path, res)
+        value = parse(res)
+        if value is not None:
+            caps.record(path, True)
+            return value
+    return None
@@ -0,0 +1,169 @@
+"""
+Долгоживущее подключение к роутеру: один HTTP-сеанс на всё время
+работы и «ленивое» восстановление после обрыва.
+
+Раньше каждая попытка переподключения строила новый
+``Client(Connection(...))``: новое TCP-соединение, GET главной
+страницы за CSRF-токеном, ``user/state-login``, SHA256-хеширование
+пароля, ``user/login`` и ещё ``device.information()`` для проверки.
+После секундного провала Wi-Fi это пять-шесть round-trip, а на
+некоторых прошивках ещё и лишняя сессия в лимите 108003.
+
+``RouterSession`` держит один ``requests.Session`` (пул keep-alive
+сокетов и cookie ``SessionID``) и одно ``Connection``. Восстановление
+идёт от дешёвого к дорогому:
+
+1. пробный ``device.signal()`` — если роутер его отдаёт, сессия жива
+   (короткий провал связи): один round-trip, и всё;
+2. роутер отверг CSRF-токен (125002/125003) — перечитать токен
+   (``Connection.reload()``) и повторить пробу;
+3. роутер требует вход (100003) — перечитать токен и войти заново на
+   ТОМ ЖЕ HTTP-сеансе;
+4. любая другая ошибка API — новое ``Connection`` на том же сеансе.
+
+Сетевые ошибки (таймаут, обрыв) пробрасываются как есть: роутер
+недоступен, ждать дальше — забота backoff в ``core.poller.Poller``.
+
+Модуль не импортирует huawei_lte_api и requests: классы и HTTP-сеанс
+передаёт frontend — так ядро тестируется на поддельных клиентах.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Коды ошибок API Huawei (huawei_lte_api.enums.client.ResponseCodeEnum).
+# Исключения huawei_lte_api несут код в атрибуте ``.code``.
+ERROR_NOT_SUPPORTED = 100002
+ERROR_LOGIN_REQUIRED = 100003
+ERROR_SYSTEM_BUSY = 100004
+ERROR_CSRF = 125002
+ERROR_WRONG_SESSION_TOKEN = 125003
+
+CSRF_ERRORS = frozenset({ERROR_CSRF, ERROR_WRONG_SESSION_TOKEN})
+# Сессия на роутере недействительна — нужен recover(), а не повтор.
+SESSION_ERRORS = CSRF_ERRORS | {ERROR_LOGIN_REQUIRED}
+
+
+def error_code(exc: BaseException | None) -> int | None:
+    """Код ошибки API роутера из исключения; None — не ошибка API."""
+    code = getattr(exc, 'code', None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RouterSession:
+    """Подключение к одному роутеру, переживающее обрывы связи.
+
+    Использование::
+
+        router = RouterSession(f"http://{ip}", 'admin', password,
+                               connection_cls=Connection, client_cls=Client,
+                               http_session=requests.Session(), timeout=4)
+        client = router.open()              # полный вход
+        poller = Poller(router.recover)     # восстановление — лениво
+        ...
+        router.close()                      # logout, сокеты остаются
+
+    ``http_session`` принадлежит вызывающему: ``close()`` его не
+    закрывает, и следующий ``open()`` к тому же роутеру идёт по уже
+    открытому keep-alive соединению.
+    """
+
+    def __init__(self, url: str, username: str, password: str | None, *,
+                 connection_cls: Callable[..., Any],
+                 client_cls: Callable[[Any], Any],
+                 http_session: Any = None,
+                 timeout: float | None = None):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.http_session = http_session
+        self.timeout = timeout
+        self._connection_cls = connection_cls
+        self._client_cls = client_cls
+        self._lock = threading.Lock()
+        self.connection: Any = None
+        self.client: Any = None
+        # Статистика восстановлений: что понадобилось (для логов/метрик).
+        self.recoveries: dict[str, int] = {
+            'probe': 0, 'csrf': 0, 'login': 0, 'reopen': 0}
+
+    # ---- Полный вход ----
+
+    def open(self) -> Any:
+        """Новое ``Connection`` (CSRF + вход) на общем HTTP-сеансе."""
+        with self._lock:
+            return self._open_locked()
+
+    def _open_locked(self) -> Any:
+        self.connection = self._connection_cls(
+            self.url, username=self.username, password=self.password,
+            timeout=self.timeout, requests_session=self.http_session)
+        self.client = self._client_cls(self.connection)
+        return self.client
+
+    # ---- Ленивое восстановление ----
+
+    def recover(self) -> Any:
+        """Возвращает рабочий клиент, делая минимум запросов к роутеру.
+
+        Подходит как фабрика ``connect`` для ``core.poller.Poller``.
+        """
+        with self._lock:
+            if self.client is None:
+                self.recoveries['reopen'] += 1
+                return self._open_locked()
+            try:
+                self._probe()
+                self.recoveries['probe'] += 1
+                return self.client
+            except Exception as e:
+                code = error_code(e)
+                if code is None:
+                    raise                   # сеть: роутер недоступен
+                logger.info("Session probe rejected (%s), recovering", code)
+                if code in CSRF_ERRORS:
+                    return self._refresh_token()
+                if code == ERROR_LOGIN_REQUIRED:
+                    return self._relogin()
+                self.recoveries['reopen'] += 1
+                return self._open_locked()
+
+    def _probe(self) -> None:
+        self.client.device.signal()
+
+    def _refresh_token(self) -> Any:
+        self.connection.reload()
+        try:
+            self._probe()
+        except Exception as e:
+            if error_code(e) != ERROR_LOGIN_REQUIRED:
+                raise
+            return self._relogin()
+        self.recoveries['csrf'] += 1
+        return self.client
+
+    def _relogin(self) -> Any:
+        # Свежий CSRF-токен нужен и для хеша пароля (SHA256 с токеном).
+        self.connection.reload()
+        self.client.user.login(self.username, self.password)
+        self.recoveries['login'] += 1
+        return self.client
+
+    # ---- Завершение ----
+
+    def close(self, logout: bool = True) -> None:
+        """Завершает сессию на роутере; HTTP-сеанс остаётся открытым."""
+        with self._lock:
+            client, self.client, self.connection = self.client, None, None
+        if client is not None and logout:
+            with contextlib.suppress(Exception):
+                client.user.logout()
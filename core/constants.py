@@ -56,6 +56,13 @@ ANTENNA_MODES: dict[str, int] = {
     "Смешанная": 2,
 }
 
+# Геттеры режима антенны: у разных моделей/версий huawei_lte_api свой
+# (перебираются по порядку, см. core.capabilities.probe_first).
+ANTENNA_GETTERS: tuple[str, ...] = (
+    'device.get_antenna_settings', 'device.antenna_type',
+    'device.antenna_status', 'device.antenna_set_type',
+)
+
 # Расшифровка LTE-бандов: номер → краткое обозначение полосы
 BAND_FREQ_MAP: dict[int, str] = {
     1: "2100", 2: "1900PCS", 3: "1800+", 4: "AWS-1", 5: "850",
@@ -148,8 +155,31 @@ PARAM_RANGES: dict[str, tuple[int, int]] = {
 # =========================================================
 
 GRAPH_HISTORY: int = 100
+UI_BACKLOG: int = 600               # выборок в очереди до отрисовки UI
+LABEL_TEXTURE_CACHE: int = 64       # текстур подписей графика (Android)
 JITTER_WINDOW: int = 5
-SESSION_LOG_MAX: int = 10800        # ~3 часа при тике 1 с
+SESSION_CHUNK: int = 4096           # строк в блоке core.SessionStore
+SESSION_FILE_BLOCK: int = 1024      # записей в сжатом блоке .h4gs
+# Запись сессии на диск (core.recorder.SessionRecorder)
+RECORD_FLUSH_INTERVAL: float = 2.0  # как часто дописывать очередь, с
+RECORD_FSYNC_INTERVAL: float = 30.0 # как часто os.fsync, с
+RECORD_ROTATE_BYTES: int = 32 * 1024 * 1024   # новый файл после 32 МБ
 RECONNECT_DELAY_INITIAL: float = 2.0
 RECONNECT_DELAY_MAX: float = 30.0
 DIRECTION_LOOKBACK: int = 3         # сколько тиков сравнивать для стрелки
+FETCH_WORKERS: int = 4              # параллельных запросов к роутеру за тик
+AIO_WORKERS: int = 8                # пул блокирующих задач core.AsyncRunner
+FLEET_WORKERS: int = 32             # пул core.Fleet на десятки роутеров
+FLEET_HISTORY: int = 600            # выборок на устройство в core.Fleet
+# Корзины гистограммы длительности запроса к роутеру (core.metrics), с
+METRICS_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0)
+TICK_BUDGET: float = 1.5            # сколько тик ждёт второстепенные endpoint, с
+BREAKER_THRESHOLD: int = 3          # ошибок endpoint подряд до паузы
+BREAKER_COOLDOWN: float = 30.0      # пауза перед пробным запросом, с
+BREAKER_COOLDOWN_MAX: float = 300.0 # предел удвоения паузы, с
+# Адаптивный интервал опроса (core.schedule.AdaptiveInterval)
+ADAPTIVE_INTERVAL_MIN: float = 0.2  # 5 Гц, пока антенну крутят
+ADAPTIVE_INTERVAL_MAX: float = 5.0  # потолок по умолчанию на стабильной связи
+ADAPTIVE_STEADY_TICKS: int = 10     # спокойных тиков до удвоения интервала
+ADAPTIVE_DELTA_DB: float = 1.0      # порог direction_delta (как у стрелки)
+ADAPTIVE_JITTER_DB: float = 3.0     # порог джиттера (граница «зелёного»)
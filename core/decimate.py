@@ -0,0 +1,177 @@
+"""
+Прореживание длинной истории графика: огибающая min/max по столбцам
+пикселей.
+
+График рисует по вершине на значение. Час выборок при 4 Гц — 14 400
+вершин на график шириной в несколько сотен пикселей: лишние вершины
+ложатся в один столбец и только тратят время отрисовки. Простое
+прореживание («каждая N-я точка») теряет короткие провалы RSRP — ровно
+то, что ищут при настройке антенны.
+
+``MinMaxDecimator`` делит окно из ``capacity`` последних значений на
+``columns`` корзин (по столбцу пикселей) и хранит для каждой минимум и
+максимум с их позициями. Корзина считается на ходу, по мере поступления
+значений: ``append`` — O(1), ``points()`` — O(columns) вершин, сколько
+бы ни было значений в окне. Провал любой длины остаётся на графике
+своим минимумом.
+
+Окно скользит, поэтому самая старая корзина обычно уже наполовину
+вне окна, и её min/max может принадлежать ушедшему значению. Эту
+корзину ``points()`` пересчитывает по самим значениям окна (буфер
+``sync`` или свой ``RingBuffer`` для ``append``) — O(bucket).
+
+Если окно помещается в ширину (``capacity <= columns``), корзина — одно
+значение, и точки совпадают с исходными.
+"""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+
+from core.ringbuffer import RingBuffer
+
+
+class MinMaxDecimator:
+    """Огибающая min/max окна из ``capacity`` значений на ``columns``
+    столбцов.
+
+    Не потокобезопасен — живёт в главном потоке UI.
+    """
+
+    __slots__ = ('capacity', 'columns', 'bucket', '_done', '_count',
+                 '_open_n', '_lo_i', '_lo', '_hi_i', '_hi',
+                 '_source', '_seen', '_window')
+
+    def __init__(self, capacity: int, columns: int):
+        if capacity < 1:
+            raise ValueError("MinMaxDecimator capacity must be >= 1")
+        self.capacity = capacity
+        self.columns = max(1, columns)
+        self.bucket = max(1, -(-capacity // self.columns))
+        # Закрытые корзины: (позиция min, min, позиция max, max); позиция —
+        # порядковый номер значения с начала записи.
+        self._done: deque[tuple[int, float, int, float]] = deque(
+            maxlen=-(-capacity // self.bucket))
+        self._count = 0
+        self._open_n = 0
+        self._lo_i = self._hi_i = 0
+        self._lo = self._hi = 0.0
+        self._source: RingBuffer | None = None
+        self._seen = 0
+        # Значения окна для пересчёта старой корзины, если пишут через
+        # append/extend, а не sync (там окно — сам буфер).
+        self._window: RingBuffer | None = None
+
+    # ---- Запись ----
+
+    def append(self, value: float) -> None:
+        if self._source is None:
+            if self._window is None:
+                self._window = RingBuffer(self.capacity)
+            self._window.append(value)
+        self._add(float(value))
+
+    def _add(self, value: float) -> None:
+        i = self._count
+        self._count += 1
+        if self._open_n == 0:
+            self._lo_i = self._hi_i = i
+            self._lo = self._hi = value
+        else:
+            if value < self._lo:
+                self._lo_i, self._lo = i, value
+            if value > self._hi:
+                self._hi_i, self._hi = i, value
+        self._open_n += 1
+        if self._open_n == self.bucket:
+            self._done.append((self._lo_i, self._lo, self._hi_i, self._hi))
+            self._open_n = 0
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.append(value)
+
+    def clear(self) -> None:
+        self._done.clear()
+        self._count = self._open_n = 0
+        self._source = None
+        self._seen = 0
+        if self._window is not None:
+            self._window.clear()
+
+    def sync(self, source: RingBuffer) -> None:
+        """Догоняет ``source``: добавляет только новые значения.
+
+        Если буфер другой, очищен или ушёл вперёд больше чем на своё окно
+        с прошлого вызова — пересобирает огибающую по буферу целиком.
+        """
+        new = source.total - self._seen
+        if source is not self._source or new < 0 or new > len(source):
+            self.clear()
+            self._window = None
+            self._source = source
+            for value in source:
+                self._add(value)
+        elif new:
+            for value in source[len(source) - new:]:
+                self._add(value)
+        self._seen = source.total
+
+    # ---- Чтение ----
+
+    def __len__(self) -> int:
+        """Сколько значений представлено огибающей."""
+        return min(self._count, self.capacity)
+
+    def points(self) -> list[tuple[int, float]]:
+        """Вершины огибающей: (позиция от начала окна, значение).
+
+        Позиция 0 — самое старое значение окна; на корзину — одна-две
+        вершины в порядке появления.
+        """
+        count = self._count
+        origin = count - len(self)
+        bucket = self.bucket
+        buckets = list(self._done)
+        if self._open_n:
+            buckets.append((self._lo_i, self._lo, self._hi_i, self._hi))
+        out: list[tuple[int, float]] = []
+        for lo_i, lo, hi_i, hi in buckets:
+            start = lo_i - lo_i % bucket
+            if start + bucket <= origin:
+                continue                    # корзина целиком вне окна
+            if start < origin:
+                rescanned = self._rescan(origin, start + bucket)
+                if rescanned is None:
+                    continue
+                lo_i, lo, hi_i, hi = rescanned
+            if lo_i == hi_i:
+                pairs: tuple[tuple[int, float], ...] = ((lo_i, lo),)
+            elif lo_i < hi_i:
+                pairs = ((lo_i, lo), (hi_i, hi))
+            else:
+                pairs = ((hi_i, hi), (lo_i, lo))
+            for i, v in pairs:
+                out.append((i - origin, v))
+        return out
+
+    def _rescan(self, first: int, stop: int
+                ) -> tuple[int, float, int, float] | None:
+        """min/max (с позициями) значений окна на позициях [first, stop)."""
+        window = self._source if self._source is not None else self._window
+        if window is None:
+            return None
+        stop = min(stop, self._count)
+        base = self._count - len(window)    # позиция window[0]
+        first = max(first, base)
+        if first >= stop:
+            return None
+        lo_i = hi_i = first
+        lo = hi = window[first - base]
+        for i in range(first + 1, stop):
+            v = window[i - base]
+            if v < lo:
+                lo_i, lo = i, v
+            if v > hi:
+                hi_i, hi = i, v
+        return lo_i, lo, hi_i, hi
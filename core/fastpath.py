@@ -0,0 +1,222 @@
+"""
+Быстрый путь для «горячих» endpoint: ``api/device/signal`` и
+``api/monitoring/traffic-statistics``.
+
+huawei_lte_api разбирает каждый ответ через xmltodict в универсальный
+словарь, а UI потом ещё раз прогоняет каждое поле через
+``extract_number``. Для двух запросов, которые уходят каждый тик (при
+юстировке — 5 раз в секунду), это заметная доля CPU на слабых Android.
+
+Здесь тот же GET идёт по уже авторизованному HTTP-сеансу
+(``requests.Session`` и CSRF-токен из ``Connection``), а маленький
+плоский XML (``<response><rsrp>-95dBm</rsrp>…</response>``) разбирается
+``xml.etree`` (без xmltodict) сразу в словарь с типизированными числами:
+RSRP/RSRQ/RSSI/SINR — float, счётчики трафика — int. Остальные поля
+(band, cell_id, pci, …) остаются строками, как у huawei_lte_api.
+
+Ошибка API (``<error><code>…</code></error>``) поднимается как
+``RouterApiError`` с ``.code`` — ``core.connection`` обрабатывает её так
+же, как исключения huawei_lte_api. Ответ не-2xx, пустой, оборванный или
+HTML (роутер занят, captive-страница) — это ``BadResponseError``
+(транспортная ошибка, без кода API): «не поддерживается» по нему не
+запоминается, следующий тик просто пробует снова.
+
+Подключается через фабрику клиента ``core.RouterSession``::
+
+    RouterSession(..., client_cls=fast_client_factory(Client))
+
+Frontend-ы включают его по умолчанию и дают вернуться к стандартному
+клиенту (``client_cls=Client``): флажок на экране подключения,
+``--stock-client`` в headless.py.
+
+Модуль не импортирует requests: HTTP-сеанс берётся из ``Connection``.
+"""
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from typing import Any
+
+from core.connection import ERROR_CSRF
+from core.parsers import extract_number
+
+# Поля, которые отдаются числами. Всё прочее — строки как есть.
+SIGNAL_FLOAT_FIELDS = frozenset({'rsrp', 'rsrq', 'rssi', 'sinr'})
+TRAFFIC_INT_FIELDS = frozenset({
+    'CurrentConnectTime', 'CurrentUpload', 'CurrentDownload',
+    'CurrentDownloadRate', 'CurrentUploadRate', 'TotalUpload',
+    'TotalDownload', 'TotalConnectTime', 'showtraffic',
+})
+
+
+class RouterApiError(Exception):
+    """Ошибка API роутера из fast path; код — в ``.code``."""
+
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(f"{code}: {message or 'error'}")
+        self.code = code
+
+
+class BadResponseError(OSError):
+    """Ответ роутера не разобран (HTTP-статус, пустое или не-XML тело).
+
+    Транспортная ошибка, как таймаут: ``.code`` нет, ``error_code()``
+    даёт None. HTTP-статус (если дело в нём) — в ``.status``.
+    """
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+def _to_int(raw: str | None) -> int | None:
+    try:
+        return int(raw) if raw not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def parse_flat_response(content: bytes,
+                        converters: dict[str, Callable[[Any], Any]]
+                        ) -> dict[str, Any]:
+    """Плоский ответ роутера → словарь полей с типами из ``converters``.
+
+    Ответ — сотни байт, поэтому он целиком отдаётся ``XMLPullParser``
+    одним вызовом (дерево при этом строится, как и в ``ET.fromstring``);
+    поля первого уровня затем за один проход по событиям ``start``/``end``
+    переводятся в типы из ``converters``. Экономия — в отсутствии
+    xmltodict и повторного ``extract_number`` в UI, а не в памяти на
+    дерево. JSON-ответы (есть у части новых прошивок) тоже понимаются.
+    """
+    if not content.strip():
+        raise BadResponseError("empty response")
+    if content[:1] in (b'{', b'['):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            raise BadResponseError("malformed JSON response") from None
+        if not isinstance(data, dict):
+            raise BadResponseError("unexpected JSON response")
+        if 'error' in data:
+            err = data['error'] or {}
+            raise RouterApiError(int(err.get('code', 0)), err.get('message', ''))
+        data = data.get('response', data)
+        return {k: converters[k](v) if k in converters else v
+                for k, v in data.items()}
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    try:
+        parser.feed(content)
+        parser.close()
+    except ET.ParseError:
+        # Оборванный ответ или HTML (страница входа, «роутер занят»).
+        raise BadResponseError("malformed XML response") from None
+
+    out: dict[str, Any] = {}
+    root: str | None = None
+    depth = 0
+    for event, elem in parser.read_events():
+        if event == 'start':
+            if root is None:
+                root = elem.tag
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            text = elem.text.strip() if elem.text else None
+            conv = converters.get(elem.tag)
+            out[elem.tag] = conv(text) if conv is not None else text
+            elem.clear()
+    if root == 'error':
+        code = _to_int(out.get('code')) or 0
+        raise RouterApiError(code, out.get('message') or "")
+    if root != 'response':
+        raise BadResponseError(f"unexpected response root: {root}")
+    return out
+
+
+_SIGNAL_CONVERTERS = dict.fromkeys(SIGNAL_FLOAT_FIELDS, extract_number)
+_TRAFFIC_CONVERTERS = dict.fromkeys(TRAFFIC_INT_FIELDS, _to_int)
+
+
+class FastReader:
+    """GET горячих endpoint по авторизованному сеансу ``Connection``.
+
+    Из ``huawei_lte_api.Connection`` берутся ``requests_session``,
+    ``url``, ``timeout`` и CSRF-токен — так же, как это делает
+    ``Session.get``; токен читается на каждом запросе, поэтому
+    ``Connection.reload()`` подхватывается сразу. Как и в huawei_lte_api,
+    на ошибку CSRF (125002) токен перечитывается и запрос повторяется.
+    """
+
+    def __init__(self, connection: Any):
+        self._connection = connection
+
+    def get(self, endpoint: str,
+            converters: dict[str, Callable[[Any], Any]]) -> dict[str, Any]:
+        try:
+            return self._get(endpoint, converters)
+        except RouterApiError as e:
+            if e.code != ERROR_CSRF:
+                raise
+            self._connection.reload()
+            return self._get(endpoint, converters)
+
+    def _get(self, endpoint: str,
+             converters: dict[str, Callable[[Any], Any]]) -> dict[str, Any]:
+        conn = self._connection
+        headers = {}
+        tokens = conn.request_verification_tokens
+        if len(tokens) == 1:
+            headers['__RequestVerificationToken'] = tokens[0]
+        response = conn.requests_session.get(
+            f"{conn.url}api/{endpoint}", headers=headers,
+            timeout=conn.timeout)
+        status = response.status_code
+        if not 200 <= status < 300:
+            raise BadResponseError(f"HTTP {status}", status)
+        return parse_flat_response(response.content, converters)
+
+    def signal(self) -> dict[str, Any]:
+        return self.get('device/signal', _SIGNAL_CONVERTERS)
+
+    def traffic_statistics(self) -> dict[str, Any]:
+        return self.get('monitoring/traffic-statistics', _TRAFFIC_CONVERTERS)
+
+
+class _Overlay:
+    """Группа API клиента, у которой часть методов подменена."""
+
+    def __init__(self, group: Any, **methods: Callable[[], Any]):
+        self._group = group
+        self.__dict__.update(methods)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._group, name)
+
+
+class FastPathClient:
+    """``huawei_lte_api.Client``, у которого ``device.signal()`` и
+    ``monitoring.traffic_statistics()`` идут через ``FastReader``.
+
+    Всё остальное (Band Lock, reboot, user.login/logout, …) —
+    прозрачно к исходному клиенту.
+    """
+
+    def __init__(self, client: Any, reader: FastReader):
+        self.raw = client
+        self.device = _Overlay(client.device, signal=reader.signal)
+        self.monitoring = _Overlay(
+            client.monitoring, traffic_statistics=reader.traffic_statistics)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.raw, name)
+
+
+def fast_client_factory(client_cls: Callable[[Any], Any]
+                        ) -> Callable[[Any], FastPathClient]:
+    """``client_cls`` для ``RouterSession``: Client + fast path."""
+    def make(connection: Any) -> FastPathClient:
+        return FastPathClient(client_cls(connection), FastReader(connection))
+    return make
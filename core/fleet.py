@@ -0,0 +1,237 @@
+"""
+Несколько роутеров в одном процессе: общий цикл опроса, общий пул
+соединений, отдельный поток выборок на каждое устройство.
+
+На мачте часто стоят два-три модема (E3372 и B535 на разных
+операторах), и раньше на каждый нужен был свой экземпляр программы.
+``Fleet`` поднимает по ``RouterSession`` + ``Poller`` на устройство, но:
+
+* все опросы — задачи ОДНОГО ``core.AsyncRunner``: один поток цикла и
+  один ограниченный пул исполнителей на весь парк, а не по потоку и
+  пулу на роутер;
+* запросы тиков всех устройств идут на ОДИН общий пул
+  (``fetch_pool``): устройства × endpoint, но не больше
+  ``FLEET_WORKERS`` потоков — число потоков не растёт с размером парка;
+* старты устройств разнесены по фазе (``interval / N``), чтобы десятки
+  роутеров на стенде не били в пул одновременно на каждом тике;
+* все сессии идут через один HTTP-сеанс (``http_session``) — общий пул
+  keep-alive соединений. Для десятков роутеров frontend монтирует
+  адаптер с ``pool_connections`` не меньше числа устройств;
+* история каждого устройства — ``deque(maxlen=history)``: память на
+  устройство ограничена, сколько бы ни длилась сессия;
+* знания о моделях (``CapabilityCache``) общие: второй B535 в парке
+  не повторяет ошибки первого.
+
+Подписчики получают ``(name, sample)`` и ``(name, event, payload)`` из
+потока цикла — в главный поток UI их переносит сам frontend.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.aio import AsyncRunner
+from core.capabilities import CapabilityCache, DeviceCapabilities
+from core.connection import RouterSession
+from core.constants import (
+    FLEET_HISTORY,
+    FLEET_WORKERS,
+    RECONNECT_DELAY_INITIAL,
+    RECONNECT_DELAY_MAX,
+)
+from core.poller import STATUS_ERROR, Poller, Sample
+
+logger = logging.getLogger(__name__)
+
+# Событие подписчикам subscribe_status(): первый вход удался.
+STATUS_CONNECTED = "connected"
+
+
+@dataclass(frozen=True)
+class RouterTarget:
+    """Один роутер парка: имя для логов/UI, адрес и учётные данные."""
+    name: str
+    url: str
+    password: str | None = None
+    username: str = 'admin'
+
+
+@dataclass
+class FleetDevice:
+    """Состояние одного устройства парка."""
+    target: RouterTarget
+    router: RouterSession
+    poller: Poller
+    samples: deque[Sample]
+    info: dict[str, Any] = field(default_factory=dict)
+    capabilities: DeviceCapabilities | None = None
+    last_error: Exception | None = None
+
+    @property
+    def name(self) -> str:
+        return self.target.name
+
+    @property
+    def latest(self) -> Sample | None:
+        return self.samples[-1] if self.samples else None
+
+
+class Fleet:
+    """Опрос набора роутеров в одном процессе.
+
+    Использование::
+
+        fleet = Fleet([RouterTarget('e3372', 'http://192.168.8.1', pw1),
+                       RouterTarget('b535', 'http://192.168.3.1', pw2)],
+                      connection_cls=Connection, client_cls=Client,
+                      http_session=requests.Session())
+        fleet.subscribe(lambda name, s: print(name, s.data['rsrp']))
+        fleet.start()
+        ...
+        fleet.stop()
+
+    ``runner`` — общий ``AsyncRunner``; без него парк заводит свой (с
+    пулом на ``FLEET_WORKERS`` потоков) и сам его останавливает. Пул
+    запросов тика (``fetch_pool``) парк всегда заводит сам в ``start()``
+    и закрывает в ``stop()``.
+    ``poller_options`` передаются в каждый ``Poller`` (``schedule``
+    не передавать — расписание у каждого устройства своё).
+    """
+
+    def __init__(self, targets: Iterable[RouterTarget], *,
+                 connection_cls: Callable[..., Any],
+                 client_cls: Callable[[Any], Any],
+                 http_session: Any = None,
+                 runner: AsyncRunner | None = None,
+                 capability_cache: CapabilityCache | None = None,
+                 interval: float = 1.0,
+                 timeout: float | None = 4,
+                 history: int = FLEET_HISTORY,
+                 **poller_options: Any):
+        self.interval = interval
+        self._own_runner = runner is None
+        self.runner = runner if runner is not None else AsyncRunner(
+            max_workers=FLEET_WORKERS)
+        self.capability_cache = (capability_cache if capability_cache
+                                 is not None else CapabilityCache())
+        self._subscribers: list[Callable[[str, Sample], None]] = []
+        self._status_subscribers: list[Callable[[str, str, Any], None]] = []
+        self.devices: dict[str, FleetDevice] = {}
+        self.fetch_pool: ThreadPoolExecutor | None = None
+        for target in targets:
+            if target.name in self.devices:
+                raise ValueError(f"Duplicate router name: {target.name}")
+            router = RouterSession(
+                target.url, target.username, target.password,
+                connection_cls=connection_cls, client_cls=client_cls,
+                http_session=http_session, timeout=timeout)
+            poller = Poller(router.recover, interval=interval,
+                            **poller_options)
+            dev = FleetDevice(target, router, poller,
+                              deque(maxlen=history))
+            poller.subscribe(self._sample_handler(dev))
+            poller.subscribe_status(self._status_handler(dev.name))
+            self.devices[target.name] = dev
+
+    # ---- Подписка ----
+
+    def subscribe(self, callback: Callable[[str, Sample], None]) -> None:
+        self._subscribers.append(callback)
+
+    def subscribe_status(self,
+                         callback: Callable[[str, str, Any], None]) -> None:
+        self._status_subscribers.append(callback)
+
+    def _sample_handler(self, dev: FleetDevice) -> Callable[[Sample], None]:
+        def on_sample(sample: Sample) -> None:
+            dev.samples.append(sample)
+            for cb in list(self._subscribers):
+                try:
+                    cb(dev.name, sample)
+                except Exception:
+                    logger.exception("Fleet subscriber failed")
+        return on_sample
+
+    def _status_handler(self, name: str) -> Callable[[str, Any], None]:
+        def on_status(event: str, payload: Any) -> None:
+            self._publish_status(name, event, payload)
+        return on_status
+
+    def _publish_status(self, name: str, event: str, payload: Any) -> None:
+        for cb in list(self._status_subscribers):
+            try:
+                cb(name, event, payload)
+            except Exception:
+                logger.exception("Fleet status subscriber failed")
+
+    # ---- Жизненный цикл ----
+
+    def start(self) -> None:
+        """Вход на все роутеры (параллельно) и запуск опроса."""
+        if self._own_runner:
+            self.runner.start()
+        # Один пул запросов тика на весь парк (устройства × endpoint, не
+        # больше FLEET_WORKERS); потоки заводятся по мере надобности.
+        workers = sum(dev.poller.fetch_workers
+                      for dev in self.devices.values())
+        self.fetch_pool = ThreadPoolExecutor(
+            max_workers=max(1, min(workers, FLEET_WORKERS)),
+            thread_name_prefix="hua4gmon-fleet-fetch")
+        for dev in self.devices.values():
+            dev.poller.fetch_pool = self.fetch_pool
+        count = len(self.devices)
+        for i, dev in enumerate(self.devices.values()):
+            self.runner.submit(self._run_device(dev, i * self.interval / count),
+                               group='fleet')
+
+    async def _run_device(self, dev: FleetDevice, offset: float) -> None:
+        """Вход с backoff, затем опрос задачей того же цикла."""
+        await asyncio.sleep(offset)
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_DELAY_INITIAL
+        while True:
+            try:
+                client = await loop.run_in_executor(None, dev.router.open)
+                dev.info = await loop.run_in_executor(
+                    None, client.device.information) or {}
+                break
+            except Exception as e:
+                logger.warning("Router %s: connect failed: %s", dev.name, e)
+                dev.last_error = e
+                self._publish_status(dev.name, STATUS_ERROR, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+        dev.last_error = None
+        dev.capabilities = self.capability_cache.for_device(dev.info)
+        dev.poller.capabilities = dev.capabilities
+        self._publish_status(dev.name, STATUS_CONNECTED, dev.info)
+        dev.poller.start(client, runner=self.runner)
+
+    def stop(self, logout: bool = True) -> None:
+        """Останавливает опрос всех устройств и завершает их сессии."""
+        self.runner.cancel_group('fleet')
+        for dev in self.devices.values():
+            dev.poller.stop()
+        if self.runner.is_running:
+            # Logout десятков роутеров — параллельно, на пуле цикла.
+            pending = [self.runner.run(dev.router.close, logout)
+                       for dev in self.devices.values()]
+            for fut in pending:
+                try:
+                    fut.result(timeout=5.0)
+                except Exception:
+                    logger.debug("Router logout failed", exc_info=True)
+        if self.fetch_pool is not None:
+            self.fetch_pool.shutdown(wait=False, cancel_futures=True)
+            self.fetch_pool = None
+        if self._own_runner:
+            self.runner.stop()
+
+    def latest(self) -> dict[str, Sample | None]:
+        """Последняя выборка каждого устройства."""
+        return {name: dev.latest for name, dev in self.devices.items()}
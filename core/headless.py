@@ -0,0 +1,108 @@
+"""
+Headless-режим: выборки мониторинга потоком JSON Lines, без UI.
+
+Для ночной записи сигнала на объекте (Raspberry Pi рядом с модемом под
+systemd) не нужен ни Tk, ни график: каждая выборка — одна строка JSON в
+stdout или файл. Строка пишется и сбрасывается сразу, поэтому
+``tail -f``/``jq`` видят данные без задержки, а аварийное завершение
+теряет не больше одной строки.
+
+Формат строки выборки::
+
+    {"ts": 1760000000.123, "device": "192.168.8.1", "rsrp": -85.0, ...,
+     "tick_ms": 42, "late_ms": 3, "stale": []}
+
+События состояния (ошибка, переподключение) идут теми же строками с
+полем ``"event"`` — пропуски в записи видно прямо в логе.
+
+Здесь только запись и цикл ожидания; классы huawei_lte_api и
+HTTP-сеанс передаёт точка входа ``headless.py``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any, TextIO
+
+from core.capabilities import device_key
+from core.fleet import Fleet
+from core.poller import Sample
+
+logger = logging.getLogger(__name__)
+
+
+def sample_record(sample: Sample, device: str | None = None,
+                  fields: Iterable[str] | None = None) -> dict[str, Any]:
+    """Плоский словарь одной выборки для JSON Lines.
+
+    ``fields`` — какие поля ``sample.data`` оставить (None — все).
+    """
+    record: dict[str, Any] = {'ts': round(sample.ts, 3)}
+    if device is not None:
+        record['device'] = device
+    data = sample.data
+    if fields is None:
+        record.update(data)
+    else:
+        record.update((k, data[k]) for k in fields if k in data)
+    record['late_ms'] = round(sample.lateness * 1000)
+    return record
+
+
+class JsonLinesWriter:
+    """Пишет выборки и события строками JSON в текстовый поток.
+
+    Вызывается из потока цикла опроса; запись под замком, чтобы строки
+    нескольких устройств не перемешались.
+    """
+
+    def __init__(self, stream: TextIO, fields: Iterable[str] | None = None):
+        self.stream = stream
+        self.fields = tuple(fields) if fields is not None else None
+        self.lines = 0
+        self._lock = threading.Lock()
+
+    def write(self, device: str | None, sample: Sample) -> None:
+        self._emit(sample_record(sample, device, self.fields))
+
+    def write_event(self, device: str | None, event: str,
+                    payload: Any = None) -> None:
+        record: dict[str, Any] = {'ts': round(time.time(), 3)}
+        if device is not None:
+            record['device'] = device
+        record['event'] = event
+        if isinstance(payload, dict):           # device.information()
+            record['detail'] = device_key(payload)
+        elif isinstance(payload, (int, float)):
+            record['detail'] = payload
+        elif payload is not None:
+            record['detail'] = str(payload)
+        self._emit(record)
+
+    def _emit(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'),
+                          default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+            self.lines += 1
+
+
+def run_headless(fleet: Fleet, writer: JsonLinesWriter, *,
+                 duration: float | None = None,
+                 stop_event: threading.Event | None = None) -> int:
+    """Запускает парк, пишет выборки до ``duration`` секунд или до
+    ``stop_event``; возвращает число записанных строк."""
+    stop_event = stop_event if stop_event is not None else threading.Event()
+    fleet.subscribe(writer.write)
+    fleet.subscribe_status(writer.write_event)
+    fleet.start()
+    try:
+        stop_event.wait(duration)
+    finally:
+        fleet.stop()
+    logger.info("Headless run finished: %d lines", writer.lines)
+    return writer.lines
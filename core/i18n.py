@@ -99,6 +99,10 @@ EN: dict[str, str] = {
     "Пароль:": "Password:",
     "Опрос (сек):": "Polling (sec):",
     "Авто-переподключение при обрыве": "Auto-reconnect on drop",
+    "Быстрый разбор signal и трафика (выкл. — стандартный клиент huawei_lte_api)":
+        "Fast signal & traffic parsing (off — stock huawei_lte_api client)",
+    "Адаптивный опрос (чаще при юстировке, интервал выше — потолок)":
+        "Adaptive polling (faster while aligning, interval above is the ceiling)",
     "🚀 Подключиться": "🚀 Connect",
     "⏹ Отключиться": "⏹ Disconnect",
     "Подключение и частые ошибки": "Connection & common errors",
@@ -233,6 +237,9 @@ EN: dict[str, str] = {
     "Мониторинг железа и трафика": "Hardware & traffic monitor",
     "Время сессии": "Session time",
     "Температура чипа": "Chip temperature",
+    "Время опроса роутера": "Router poll time",
+    "{ms} мс": "{ms} ms",
+    "{ms} мс (устарело: {names})": "{ms} ms (stale: {names})",
     "Скорость (Download)": "Speed (Download)",
     "Скорость (Upload)": "Speed (Upload)",
     "Скачано за сессию": "Downloaded this session",
@@ -295,6 +302,7 @@ EN: dict[str, str] = {
     "Сохранено {n} записей в:\n{path}":
         "Saved {n} records to:\n{path}",
     "Не удалось записать файл: {e}": "Failed to write file: {e}",
+    "Сессия Hua4GMon": "Hua4GMon session",
     "Таймаут API...": "API timeout...",
     "Переподключение через {d:.0f}с...": "Reconnecting in {d:.0f}s...",
 
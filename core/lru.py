@@ -0,0 +1,56 @@
+"""
+Небольшой LRU-кеш для дорогих в создании объектов UI.
+
+Нужен там, где одни и те же значения создаются заново на каждом тике.
+Пример — текстуры подписей графика на Android: ``CoreLabel.refresh()``
+растеризует текст на CPU, а подписи оси Y, заголовок и подпись оси X
+почти не меняются между отрисовками. Ключ — всё, от чего зависит
+результат (для текстуры — текст, размер, цвет, жирность); при
+переполнении вытесняется давно не использованное значение.
+
+Без зависимостей от UI; не потокобезопасен — живёт в главном потоке.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+V = TypeVar('V')
+
+
+class LRUCache(Generic[V]):
+    """Кеш на ``maxsize`` значений с вытеснением самого старого по
+    использованию."""
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("LRUCache maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, V] = OrderedDict()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], V]) -> V:
+        """Значение по ``key``; при промахе — ``factory()`` и в кеш."""
+        data = self._data
+        try:
+            value = data[key]
+        except KeyError:
+            self.misses += 1
+            value = data[key] = factory()
+            if len(data) > self.maxsize:
+                data.popitem(last=False)
+            return value
+        self.hits += 1
+        data.move_to_end(key)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -0,0 +1,267 @@
+"""
+Метрики мониторинга в текстовом формате Prometheus и локальный
+``/metrics``.
+
+Установленные модемы удобнее наблюдать уже имеющимся стеком сбора
+метрик, чем держать историю в каждом экземпляре программы. Здесь —
+счётчики и gauge по каждому устройству, которые наполняются прямо из
+цикла опроса (подписки ``Poller``/``Fleet``):
+
+* ``hua4gmon_signal_{rsrp,rsrq,sinr,rssi}`` — последние значения;
+* ``hua4gmon_rate_bytes_per_second{direction}`` — скорость DL/UL;
+* ``hua4gmon_request_duration_seconds`` — гистограмма длительности
+  запроса по endpoint;
+* ``hua4gmon_tick_lateness_seconds``, ``hua4gmon_ticks_skipped_total``;
+* ``hua4gmon_samples_total``, ``hua4gmon_stale_total{endpoint}``
+  (значение взято из прошлого тика), ``hua4gmon_tick_errors_total``,
+  ``hua4gmon_reconnects_total``.
+
+Рендер дешёвый: строки меток (``{device="…",endpoint="…"}``)
+собираются один раз при появлении серии, а готовый текст кешируется до
+следующего изменения — частый scrape без новых тиков не стоит ничего.
+
+Сервер — ``http.server`` из стандартной библиотеки в фоновом потоке;
+по умолчанию слушает только 127.0.0.1.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+from core.constants import METRICS_BUCKETS
+from core.poller import STATUS_ERROR, STATUS_RECONNECTED, Sample
+
+if TYPE_CHECKING:
+    from core.fleet import Fleet
+    from core.poller import Poller
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Поле Sample → (имя метрики, HELP)
+SIGNAL_GAUGES = {
+    'rsrp': ('hua4gmon_signal_rsrp_dbm', 'RSRP, dBm'),
+    'rsrq': ('hua4gmon_signal_rsrq_db', 'RSRQ, dB'),
+    'sinr': ('hua4gmon_signal_sinr_db', 'SINR, dB'),
+    'rssi': ('hua4gmon_signal_rssi_dbm', 'RSSI, dBm'),
+}
+RATE_FIELDS = {'dl': 'dl_rate', 'ul': 'ul_rate'}
+_HELP = dict(SIGNAL_GAUGES.values())
+
+
+def _escape(value: str) -> str:
+    return (value.replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _labels(**labels: str) -> str:
+    inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value == value else "NaN"
+
+
+class _Histogram:
+    """Гистограмма одной серии: счётчики по корзинам + сумма."""
+
+    __slots__ = ('bucket_labels', 'counts', 'total', 'count', 'plain')
+
+    def __init__(self, buckets: tuple[float, ...], **labels: str):
+        self.plain = _labels(**labels)
+        self.bucket_labels = [
+            _labels(**labels, le=repr(b)) for b in buckets
+        ] + [_labels(**labels, le="+Inf")]
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class MonitorMetrics:
+    """Реестр метрик по устройствам; потокобезопасен.
+
+    Наполняется через ``observe_sample``/``observe_status`` или
+    подписками ``bind_poller``/``bind_fleet``; ``render()`` отдаёт
+    текст для ``/metrics``.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._device_labels: dict[str, str] = {}
+        # имя метрики → {строка меток: значение}
+        self._gauges: dict[str, dict[str, float]] = {}
+        self._counters: dict[str, dict[str, float]] = {}
+        self._histograms: dict[tuple[str, str], _Histogram] = {}
+        self._label_cache: dict[tuple[str, str, str], str] = {}
+        self._rendered: bytes | None = None
+
+    # ---- Наполнение ----
+
+    def _device(self, device: str) -> str:
+        labels = self._device_labels.get(device)
+        if labels is None:
+            labels = self._device_labels[device] = _labels(device=device)
+        return labels
+
+    def _pair(self, device: str, key: str, value: str) -> str:
+        cache_key = (device, key, value)
+        labels = self._label_cache.get(cache_key)
+        if labels is None:
+            labels = self._label_cache[cache_key] = _labels(
+                device=device, **{key: value})
+        return labels
+
+    def _set(self, name: str, labels: str, value: float) -> None:
+        self._gauges.setdefault(name, {})[labels] = value
+
+    def _inc(self, name: str, labels: str, by: float = 1.0) -> None:
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0.0) + by
+
+    def observe_sample(self, device: str, sample: Sample,
+                       skipped: int | None = None) -> None:
+        """Учитывает выборку тика; ``skipped`` — всего пропущено тиков."""
+        with self._lock:
+            dev = self._device(device)
+            for key, (name, _) in SIGNAL_GAUGES.items():
+                value = getattr(sample, key)
+                if value is not None:
+                    self._set(name, dev, value)
+            for direction, key in RATE_FIELDS.items():
+                value = getattr(sample, key)
+                if value is not None:
+                    self._set('hua4gmon_rate_bytes_per_second',
+                              self._pair(device, 'direction', direction),
+                              value)
+            self._set('hua4gmon_tick_lateness_seconds', dev, sample.lateness)
+            self._set('hua4gmon_tick_duration_seconds', dev, sample.elapsed)
+            self._inc('hua4gmon_samples_total', dev)
+            if skipped is not None:
+                self._counters.setdefault(
+                    'hua4gmon_ticks_skipped_total', {})[dev] = skipped
+            for endpoint in sample.stale:
+                self._inc('hua4gmon_stale_total',
+                          self._pair(device, 'endpoint', endpoint))
+            for endpoint, seconds in sample.latency.items():
+                hist = self._histograms.get((device, endpoint))
+                if hist is None:
+                    hist = self._histograms[(device, endpoint)] = _Histogram(
+                        self.buckets, device=device, endpoint=endpoint)
+                hist.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+                hist.total += seconds
+                hist.count += 1
+            self._rendered = None
+
+    def observe_status(self, device: str, event: str,
+                       payload: Any = None) -> None:
+        """Учитывает событие состояния ``Poller`` (ошибка, переподключение)."""
+        name = {STATUS_ERROR: 'hua4gmon_tick_errors_total',
+                STATUS_RECONNECTED: 'hua4gmon_reconnects_total'}.get(event)
+        if name is None:
+            return
+        with self._lock:
+            self._inc(name, self._device(device))
+            self._rendered = None
+
+    def bind_poller(self, device: str, poller: Poller) -> None:
+        """Подписывает метрики на выборки и события одного ``Poller``."""
+        def on_sample(sample: Sample) -> None:
+            clock = poller.clock
+            self.observe_sample(device, sample,
+                                clock.skipped if clock is not None else None)
+        poller.subscribe(on_sample)
+        poller.subscribe_status(
+            lambda event, payload: self.observe_status(device, event, payload))
+
+    def bind_fleet(self, fleet: Fleet) -> None:
+        for name, dev in fleet.devices.items():
+            self.bind_poller(name, dev.poller)
+
+    # ---- Рендер ----
+
+    def render(self) -> bytes:
+        """Текст для ``/metrics``; без изменений — из кеша."""
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = self._render_locked().encode('utf-8')
+            return self._rendered
+
+    def _render_locked(self) -> str:
+        out: list[str] = []
+        for name, series in self._gauges.items():
+            out.append(f"# HELP {name} {_HELP.get(name, name)}")
+            out.append(f"# TYPE {name} gauge")
+            out.extend(f"{name}{labels} {_fmt(v)}"
+                       for labels, v in series.items())
+        for name, series in self._counters.items():
+            out.append(f"# TYPE {name} counter")
+            out.extend(f"{name}{labels} {_fmt(v)}"
+                       for labels, v in series.items())
+        if self._histograms:
+            name = 'hua4gmon_request_duration_seconds'
+            out.append(f"# HELP {name} Router API request duration")
+            out.append(f"# TYPE {name} histogram")
+            for hist in self._histograms.values():
+                cumulative = 0
+                for labels, n in zip(hist.bucket_labels, hist.counts, strict=True):
+                    cumulative += n
+                    out.append(f"{name}_bucket{labels} {cumulative}")
+                out.append(f"{name}_sum{hist.plain} {_fmt(hist.total)}")
+                out.append(f"{name}_count{hist.plain} {hist.count}")
+        out.append("")
+        return "\n".join(out)
+
+
+class MetricsServer:
+    """HTTP-сервер ``/metrics`` в фоновом потоке.
+
+    ``port=0`` — свободный порт (фактический — в ``.port`` после
+    ``start()``).
+    """
+
+    def __init__(self, render: Callable[[], bytes], host: str = "127.0.0.1",
+                 port: int = 0):
+        self._render = render
+        self.host = host
+        self.port = port
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        render = self._render
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt: str, *args: Any) -> None:
+                logger.debug("metrics: " + fmt, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True, name="hua4gmon-metrics")
+        self._thread.start()
+        logger.info("Metrics on http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
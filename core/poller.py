@@ -0,0 +1,637 @@
+"""
+Опрос роутера: движок мониторинга, общий для всех frontend-ов.
+
+``Poller`` владеет фоновым потоком, расписанием опроса
+(``core.schedule``) и backoff переподключения; каждый удачный тик он публикует подписчикам в виде
+``Sample``. Desktop (Tk), Android (Kivy) и любые headless-скрипты
+получают один и тот же «горячий путь» — оптимизации делаются здесь
+один раз, а не в двух копиях цикла.
+
+Запросы одного тика уходят параллельно на маленький пул потоков
+(``TickFetcher``), и длительность тика определяется самым медленным
+endpoint, а не суммой всех round-trip. Второстепенные endpoint ждутся
+не дольше своего ``timeout`` и общего бюджета тика: опоздавший не
+держит сигнал — в выборку идёт его прошлое значение, а имя попадает в
+``Sample.stale``. Все запросы тика — GET:
+huawei_lte_api выполняет их через общий requests.Session (пул
+keep-alive соединений urllib3), CSRF-токен при этом только читается,
+поэтому параллельный вызов безопасен.
+
+Переподключение — только если отказал сам сигнал (``required``
+endpoint) или роутер отверг сессию (вход/CSRF). Сбои остальных endpoint
+гасит их собственный circuit breaker (``core.breaker``).
+
+Опрос идёт либо в собственном потоке, либо задачей общего цикла
+asyncio (``start(client, runner=AsyncRunner)``, см. ``core.aio``): тогда
+запросы тика — задачи этого цикла на его пуле, а ``stop()`` отменяет
+задачу сразу, не дожидаясь конца тика.
+
+Модуль не знает о huawei_lte_api и об UI: клиент создаёт переданная
+фабрика ``connect``, а подписчики сами переносят данные в свой главный
+поток (``root.after`` / ``@mainthread``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from core.breaker import CircuitBreaker
+from core.connection import SESSION_ERRORS, error_code
+from core.constants import (
+    FETCH_WORKERS,
+    RECONNECT_DELAY_INITIAL,
+    RECONNECT_DELAY_MAX,
+    TICK_BUDGET,
+)
+from core.parsers import extract_number, first_present, parse_cell_id
+from core.schedule import AdaptiveInterval, Endpoint, Schedule, TickClock
+
+if TYPE_CHECKING:
+    from core.capabilities import DeviceCapabilities
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchResult:
+    """Итог одного тика: ответы, ошибки и опоздавшие endpoint + время."""
+    results: dict[str, Any] = field(default_factory=dict)
+    errors: dict[str, Exception] = field(default_factory=dict)
+    late: list[str] = field(default_factory=list)
+    # Из late: не отправлены — прошлый запрос ещё в полёте (его опоздание
+    # уже учтено на том тике, где он был отправлен).
+    inflight: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    # Длительность каждого завершённого запроса, с (без ожидания в пуле)
+    latency: dict[str, float] = field(default_factory=dict)
+
+    def raise_first(self, required) -> None:
+        """Пробрасывает ошибку первого упавшего ОБЯЗАТЕЛЬНОГО endpoint.
+
+        Порядок — как в ``required``: так поведение совпадает со старым
+        последовательным опросом, где тик обрывался на первой ошибке.
+        """
+        for name in required:
+            if name in self.errors:
+                raise self.errors[name]
+
+
+def _timed(name: str, fn: Callable[[], Any],
+           latency: dict[str, float]) -> Callable[[], Any]:
+    """Обёртка, записывающая длительность вызова в ``latency[name]``."""
+    def call() -> Any:
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            latency[name] = time.monotonic() - started
+    return call
+
+
+class TickFetcher:
+    """Выполняет запросы одного тика параллельно на пуле потоков.
+
+    Пул создаётся один раз на сессию мониторинга (не на каждый тик) и
+    закрывается через ``close()``.
+
+    Запрос, не уложившийся в свой таймаут, не отменяется (HTTP-запрос
+    из потока не прервать) — он дорабатывает в пуле, а его результат
+    отбрасывается. Пока он не завершился, тот же endpoint заново не
+    отправляется: на следующих тиках он сразу числится опоздавшим, и
+    зависший роутер не забивает пул копиями одного запроса.
+
+    Таймаут считается от начала тика, поэтому запрос не должен ждать
+    свободного потока в очереди: при ``max_workers`` не меньше числа
+    endpoint (у каждого не больше одного запроса в полёте) поток есть
+    всегда. ``Poller`` так его и создаёт (``fetch_workers``).
+
+    ``pool`` — чужой общий пул (``core.Fleet``) вместо своего;
+    ``close()`` его не закрывает.
+    """
+
+    def __init__(self, max_workers: int = FETCH_WORKERS, *,
+                 pool: Executor | None = None):
+        self._own_pool = pool is None
+        self._pool = pool if pool is not None else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hua4gmon-fetch")
+        self._inflight: dict[str, Future] = {}
+
+    def fetch(self, calls: dict[str, Callable[[], Any]],
+              timeouts: dict[str, float | None] | None = None,
+              budget: float | None = None) -> FetchResult:
+        """Запускает все ``calls`` одновременно и ждёт их.
+
+        ``timeouts`` — сколько ждать каждый endpoint (нет/None — до
+        конца); ``budget`` — общий предел для всех, у кого таймаут задан.
+        """
+        res = FetchResult()
+        started = time.monotonic()
+        timeouts = timeouts or {}
+        futures = {}
+        for name, fn in calls.items():
+            prev = self._inflight.get(name)
+            if prev is not None and not prev.done():
+                res.late.append(name)
+                res.inflight.append(name)
+                continue
+            futures[name] = self._inflight[name] = self._pool.submit(
+                _timed(name, fn, res.latency))
+        for name, fut in futures.items():
+            limit = timeouts.get(name)
+            if limit is not None and budget is not None:
+                limit = min(limit, budget)
+            wait = (None if limit is None
+                    else max(0.0, started + limit - time.monotonic()))
+            try:
+                res.results[name] = fut.result(timeout=wait)
+            except FutureTimeout as e:
+                # Не дождались — опоздал; future завершён — это
+                # TimeoutError самого запроса.
+                if fut.done():
+                    res.errors[name] = e
+                else:
+                    res.late.append(name)
+            except Exception as e:
+                res.errors[name] = e
+        res.elapsed = time.monotonic() - started
+        if res.late:
+            logger.debug("Late endpoints: %s", ", ".join(res.late))
+        logger.debug("Tick fetched in %.0f ms (%s)", res.elapsed * 1000,
+                     ", ".join(futures))
+        return res
+
+    def close(self) -> None:
+        if self._own_pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncTickFetcher:
+    """``TickFetcher`` для цикла asyncio: те же правила таймаутов,
+    бюджета и «ещё в полёте», но запросы — задачи пула исполнителей.
+
+    Без ``max_workers`` это пул текущего цикла (у ``core.AsyncRunner``
+    он ограничен и общий с другими задачами — запрос может ждать в
+    очереди); с ``max_workers`` — свой пул, как у ``TickFetcher``;
+    с ``pool`` — чужой общий пул (``core.Fleet``), его ``close()`` не
+    закрывает.
+    """
+
+    def __init__(self, max_workers: int | None = None, *,
+                 pool: Executor | None = None) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._own_pool = pool is None and max_workers is not None
+        self._pool = pool if pool is not None else (
+            None if max_workers is None else ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="hua4gmon-fetch"))
+
+    async def fetch(self, calls: dict[str, Callable[[], Any]],
+                    timeouts: dict[str, float | None] | None = None,
+                    budget: float | None = None) -> FetchResult:
+        loop = asyncio.get_running_loop()
+        res = FetchResult()
+        started = time.monotonic()
+        timeouts = timeouts or {}
+        futures = {}
+        for name, fn in calls.items():
+            prev = self._inflight.get(name)
+            if prev is not None and not prev.done():
+                res.late.append(name)
+                res.inflight.append(name)
+                continue
+            futures[name] = self._inflight[name] = loop.run_in_executor(
+                self._pool, _timed(name, fn, res.latency))
+        for name, fut in futures.items():
+            limit = timeouts.get(name)
+            if limit is not None and budget is not None:
+                limit = min(limit, budget)
+            wait = (None if limit is None
+                    else max(0.0, started + limit - time.monotonic()))
+            try:
+                # shield: таймаут ожидания не отменяет сам запрос — он
+                # остаётся «в полёте», как и в TickFetcher.
+                res.results[name] = await asyncio.wait_for(
+                    asyncio.shield(fut), wait)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and not fut.done():
+                    res.late.append(name)
+                else:
+                    res.errors[name] = e
+        res.elapsed = time.monotonic() - started
+        if res.late:
+            logger.debug("Late endpoints: %s", ", ".join(res.late))
+        return res
+
+    def close(self) -> None:
+        if self._own_pool and self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# =========================================================
+# Разбор тика
+# =========================================================
+
+def enrich_data(data: dict[str, Any]) -> dict[str, Any]:
+    """Добавляет производные поля: eNodeB/сектор из cell_id и признак CA.
+
+    Меняет и возвращает тот же словарь.
+    """
+    enodeb, sector = parse_cell_id(data.get('cell_id'))
+    if enodeb is not None:
+        data['enodeb'] = enodeb
+        data['sector'] = sector
+    band_str = str(data.get('band', ''))
+    data['aggregation'] = ("Активна"
+                           if ("+" in band_str or "CA" in band_str)
+                           else "Нет (Single)")
+    return data
+
+
+def merge_tick(results: dict[str, Any]) -> dict[str, Any]:
+    """Сливает ответы endpoint тика в один плоский словарь для UI."""
+    plmn = results.get('plmn') or {}
+    data = {**(results.get('signal') or {}), **plmn,
+            **(results.get('status') or {}),
+            **(results.get('traffic') or {}),
+            **(results.get('month') or {})}
+    data['plmn'] = plmn.get('Numeric', data.get('plmn', ''))
+    return enrich_data(data)
+
+
+# =========================================================
+# Движок опроса
+# =========================================================
+
+# Поля ``Sample``, которые прошивки называют по-разному: поле → ключи
+# ответа роутера по убыванию приоритета (берётся первый непустой).
+SAMPLE_ALIASES: dict[str, tuple[str, ...]] = {
+    'earfcn': ('earfcn', 'Earfcn'),
+    'tac': ('tac', 'TAC'),
+    'dl_mcs': ('dl_mcs', 'dlmcs', 'dlMcs'),
+    'ul_mcs': ('ul_mcs', 'ulmcs', 'ulMcs'),
+    'txpower': ('txpower', 'TxPower', 'tx_power'),
+    'mimo': ('transmode', 'TransMode', 'mimo'),
+}
+
+
+@dataclass(slots=True)
+class Sample:
+    """Один опубликованный тик мониторинга.
+
+    Числовые поля и поля с вариантами имён разбираются один раз при
+    создании (в потоке опроса): UI читает атрибуты, а не ищет строки
+    ключей и не копирует словарь на каждой отрисовке. ``data`` — сырой
+    слитый ответ для редких полей (вышка, экспорт, JSON Lines).
+    """
+    ts: float                 # time.time() момента выборки
+    data: dict[str, Any]      # слитые ответы роутера + производные поля
+    elapsed: float = 0.0      # длительность выборки, с
+    lateness: float = 0.0     # опоздание тика относительно дедлайна, с
+    stale: tuple[str, ...] = ()   # endpoint, чьё значение взято из прошлого
+    # длительность запроса каждого опрошенного endpoint, с
+    latency: dict[str, float] = field(default_factory=dict)
+    # ---- Разобрано из data в __post_init__ ----
+    rsrp: float | None = field(default=None, init=False)
+    rsrq: float | None = field(default=None, init=False)
+    sinr: float | None = field(default=None, init=False)
+    rssi: float | None = field(default=None, init=False)
+    dl_rate: float | None = field(default=None, init=False)    # байт/с
+    ul_rate: float | None = field(default=None, init=False)
+    uptime: float | None = field(default=None, init=False)     # с
+    month_dl: float | None = field(default=None, init=False)   # байт
+    month_ul: float | None = field(default=None, init=False)
+    earfcn: Any = field(default=None, init=False)
+    tac: Any = field(default=None, init=False)
+    dl_mcs: Any = field(default=None, init=False)
+    ul_mcs: Any = field(default=None, init=False)
+    txpower: Any = field(default=None, init=False)
+    mimo: Any = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        data = self.data
+        get = data.get
+        self.rsrp = extract_number(get('rsrp'))
+        self.rsrq = extract_number(get('rsrq'))
+        self.sinr = extract_number(get('sinr'))
+        self.rssi = extract_number(get('rssi'))
+        self.dl_rate = extract_number(get('CurrentDownloadRate'))
+        self.ul_rate = extract_number(get('CurrentUploadRate'))
+        self.uptime = extract_number(first_present(
+            data, ('CurrentConnectTime', 'ConnectionTime')))
+        self.month_dl = extract_number(get('CurrentMonthDownload'))
+        self.month_ul = extract_number(get('CurrentMonthUpload'))
+        for name, keys in SAMPLE_ALIASES.items():
+            setattr(self, name, first_present(data, keys))
+
+
+# События состояния, которые Poller шлёт подписчикам subscribe_status().
+STATUS_ERROR = "error"                  # тик упал (payload: исключение)
+STATUS_RECONNECTING = "reconnecting"    # ждём перед попыткой (payload: delay)
+STATUS_RECONNECTED = "reconnected"      # новая сессия поднята
+STATUS_STOPPED = "stopped"              # поток опроса завершился
+
+
+class Poller:
+    """Фоновый опрос роутера с публикацией ``Sample`` подписчикам.
+
+    Использование::
+
+        poller = Poller(open_client, interval=1.0)
+        poller.subscribe(lambda s: root.after(0, show, s))
+        poller.start(client)        # client уже залогинен
+        ...
+        poller.stop()
+
+    ``connect`` — фабрика нового залогиненного клиента; вызывается при
+    переподключении после ошибки тика (с экспоненциальным backoff).
+    ``schedule`` — что и как часто опрашивать (по умолчанию
+    ``DEFAULT_SCHEDULE``). ``adaptive`` — если задан, шаг тика берётся
+    из него (по RSRP/SINR), а ``interval`` не используется.
+    ``capabilities`` — возможности модели (``core.capabilities``):
+    endpoint, на которые роутер ответил «не поддерживается», больше не
+    опрашиваются. ``budget`` — сколько тик ждёт endpoint с заданным
+    ``timeout``. ``fetch_pool`` — общий пул запросов тика на несколько
+    опросов (``core.Fleet``); без него у опроса свой пул на
+    ``fetch_workers`` потоков. Подписчики вызываются из потока опроса.
+    """
+
+    def __init__(self, connect: Callable[[], Any], *,
+                 interval: float = 1.0, auto_reconnect: bool = True,
+                 schedule: Schedule | None = None,
+                 adaptive: AdaptiveInterval | None = None,
+                 capabilities: DeviceCapabilities | None = None,
+                 budget: float = TICK_BUDGET,
+                 fetch_pool: Executor | None = None):
+        self._connect = connect
+        self.budget = budget
+        self.fetch_pool = fetch_pool
+        # Circuit breaker по имени endpoint (создаются по мере надобности)
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.capabilities = capabilities
+        self.schedule = schedule if schedule is not None else Schedule()
+        self.adaptive = adaptive
+        self.interval = interval
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_delay = RECONNECT_DELAY_INITIAL
+        self.client: Any = None
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._task: Future | None = None        # задача в core.AsyncRunner
+        # Часы тиков текущего запуска: опоздание и пропущенные тики.
+        self.clock: TickClock | None = None
+        self._subscribers: list[Callable[[Sample], None]] = []
+        self._status_subscribers: list[Callable[[str, Any], None]] = []
+
+    # ---- Подписка ----
+
+    def subscribe(self, callback: Callable[[Sample], None]) -> None:
+        self._subscribers.append(callback)
+
+    def subscribe_status(self, callback: Callable[[str, Any], None]) -> None:
+        self._status_subscribers.append(callback)
+
+    def _publish(self, sample: Sample) -> None:
+        for cb in list(self._subscribers):
+            try:
+                cb(sample)
+            except Exception:
+                logger.exception("Sample subscriber failed")
+
+    def _publish_status(self, event: str, payload: Any = None) -> None:
+        for cb in list(self._status_subscribers):
+            try:
+                cb(event, payload)
+            except Exception:
+                logger.exception("Status subscriber failed")
+
+    # ---- Жизненный цикл ----
+
+    @property
+    def period(self) -> float:
+        """Текущий шаг тика: адаптивный или фиксированный ``interval``."""
+        if self.adaptive is not None:
+            return self.adaptive.interval
+        return self.interval
+
+    @property
+    def is_running(self) -> bool:
+        if self._task is not None and not self._task.done():
+            return True
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, client: Any, runner: Any = None) -> None:
+        """Запускает опрос с уже подключённым клиентом.
+
+        ``runner`` — ``core.AsyncRunner``: опрос становится его задачей;
+        без него поднимается свой поток.
+        """
+        if self.is_running:
+            raise RuntimeError("Poller already running")
+        self.client = client
+        self.reconnect_delay = RECONNECT_DELAY_INITIAL
+        self.schedule.reset()
+        self.breakers.clear()
+        if self.adaptive is not None:
+            self.adaptive.reset()
+        self._stop_event.clear()
+        if runner is not None:
+            self._task = runner.submit(self._run_async())
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="hua4gmon-poller")
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Останавливает опрос и ждёт поток (кроме вызова из него же).
+
+        Задачу цикла asyncio не ждёт: она отменяется сразу, даже посреди
+        тика или паузы перед переподключением.
+        """
+        self._stop_event.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+        thread = self._thread
+        if (thread is not None and thread.is_alive()
+                and threading.current_thread() is not thread):
+            thread.join(timeout=timeout)
+        self._thread = None
+
+    # ---- Поток опроса ----
+
+    @property
+    def fetch_workers(self) -> int:
+        """Потоков на выборку тика: по одному на endpoint расписания —
+        запрос не ждёт в очереди, пока тикает его таймаут."""
+        return max(FETCH_WORKERS, len(self.schedule.endpoints))
+
+    def _run(self) -> None:
+        fetcher = TickFetcher(self.fetch_workers, pool=self.fetch_pool)
+        clock = self.clock = TickClock(self.period)
+        try:
+            while True:
+                clock.period = self.period
+                if clock.wait(self._stop_event):
+                    break
+                client = self.client
+                if client is None:
+                    break
+                try:
+                    self._tick(client, fetcher, clock.lateness)
+                    # Удачный тик — сбрасываем backoff
+                    self.reconnect_delay = RECONNECT_DELAY_INITIAL
+                except Exception as e:
+                    if not self._tick_failed(e):
+                        break
+                    self._try_reconnect()
+        finally:
+            fetcher.close()
+            self._publish_status(STATUS_STOPPED)
+
+    async def _run_async(self) -> None:
+        """То же, что ``_run``, но задачей цикла ``core.AsyncRunner``."""
+        fetcher = AsyncTickFetcher(self.fetch_workers, pool=self.fetch_pool)
+        clock = self.clock = TickClock(self.period)
+        try:
+            while not self._stop_event.is_set():
+                clock.period = self.period
+                await asyncio.sleep(clock.advance())
+                clock.arrive()
+                client = self.client
+                if client is None or self._stop_event.is_set():
+                    break
+                try:
+                    wall, now = time.time(), time.monotonic()
+                    due = self._due(now)
+                    res = await fetcher.fetch(*self._calls(client, due),
+                                              self.budget)
+                    self._complete(due, res, wall, now, clock.lateness)
+                    self.reconnect_delay = RECONNECT_DELAY_INITIAL
+                except Exception as e:
+                    if not self._tick_failed(e):
+                        break
+                    await self._reconnect_async()
+        finally:
+            fetcher.close()
+            self._publish_status(STATUS_STOPPED)
+
+    def _tick_failed(self, exc: Exception) -> bool:
+        """Сообщает об упавшем тике; True — пора переподключаться."""
+        logger.warning("Monitor tick failed: %s", exc)
+        self._publish_status(STATUS_ERROR, exc)
+        return self.auto_reconnect and not self._stop_event.is_set()
+
+    def _tick(self, client: Any, fetcher: TickFetcher,
+              lateness: float = 0.0) -> None:
+        """Один тик: опросить то, что пора по расписанию, и опубликовать."""
+        wall, now = time.time(), time.monotonic()
+        due = self._due(now)
+        res = fetcher.fetch(*self._calls(client, due), self.budget)
+        self._complete(due, res, wall, now, lateness)
+
+    def _due(self, now: float) -> list[Endpoint]:
+        """Endpoint, которые пора опросить: по расписанию, без
+        неподдерживаемых моделью и без разомкнутых breaker."""
+        caps = self.capabilities
+        due = self.schedule.due(now, slack=self.period / 2)
+        if caps is not None:
+            due = [ep for ep in due if not caps.is_unsupported(ep.path)]
+        return [ep for ep in due if self.breaker(ep.name).allow(now)]
+
+    @staticmethod
+    def _calls(client: Any, due: list[Endpoint]
+               ) -> tuple[dict[str, Callable[[], Any]], dict[str, float | None]]:
+        return ({ep.name: ep.resolve(client) for ep in due},
+                {ep.name: ep.timeout for ep in due})
+
+    def _complete(self, due: list[Endpoint], res: FetchResult, wall: float, now: float,
+                  lateness: float) -> None:
+        """Разбирает итог выборки тика и публикует ``Sample``."""
+        sched = self.schedule
+        caps = self.capabilities
+        for ep in due:
+            sched.mark_polled(ep.name, now)
+        # Отказ сигнала или отвергнутая сессия — повод переподключиться.
+        res.raise_first([
+            ep.name for ep in due
+            if ep.required
+            or error_code(res.errors.get(ep.name)) in SESSION_ERRORS])
+        for name, err in res.errors.items():
+            logger.debug("Endpoint %s failed: %s", name, err)
+            self.breaker(name).failure(now)
+            if caps is not None:
+                caps.record_error(sched.endpoints[name].path, err)
+        # Один отказ breaker на отправленный запрос: тики, где endpoint
+        # пропущен из-за висящего прошлого запроса, не в счёт.
+        for name in res.late:
+            if name not in res.inflight:
+                self.breaker(name).failure(now)
+        for name, value in res.results.items():
+            self.breaker(name).success()
+            sched.store(name, value, now)
+            if caps is not None:
+                # Ответил — сбрасывает счёт «не поддерживается».
+                caps.record(sched.endpoints[name].path, True)
+        data = merge_tick(sched.fresh(now))
+        data['tick_ms'] = round(res.elapsed * 1000)
+        data['stale'] = list(res.late)
+        # Опоздавшие допишут latency позже — в выборку идёт снимок.
+        sample = Sample(wall, data, res.elapsed, lateness,
+                        tuple(res.late), dict(res.latency))
+        if self.adaptive is not None:
+            self.adaptive.update(sample.rsrp, sample.sinr)
+        self._publish(sample)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        cb = self.breakers.get(name)
+        if cb is None:
+            cb = self.breakers[name] = CircuitBreaker(name)
+        return cb
+
+    def _try_reconnect(self) -> None:
+        """Одна попытка переподключения с экспоненциальным backoff."""
+        if self._stop_event.is_set():
+            return
+        delay = min(self.reconnect_delay, RECONNECT_DELAY_MAX)
+        self._publish_status(STATUS_RECONNECTING, delay)
+        if self._stop_event.wait(delay):
+            return
+        try:
+            client = self._connect()
+        except Exception as e:
+            self._reconnect_failed(e)
+            return
+        self._reconnected(client)
+
+    async def _reconnect_async(self) -> None:
+        """``_try_reconnect`` для цикла asyncio: пауза — ``sleep``,
+        вход — на пуле исполнителей."""
+        delay = min(self.reconnect_delay, RECONNECT_DELAY_MAX)
+        self._publish_status(STATUS_RECONNECTING, delay)
+        await asyncio.sleep(delay)
+        try:
+            client = await asyncio.get_running_loop().run_in_executor(
+                None, self._connect)
+        except Exception as e:
+            self._reconnect_failed(e)
+            return
+        self._reconnected(client)
+
+    def _reconnected(self, client: Any) -> None:
+        self.client = client
+        self.schedule.reset()
+        if self.clock is not None:
+            self.clock.reset()      # новая сетка тиков от момента входа
+        self.reconnect_delay = RECONNECT_DELAY_INITIAL
+        self._publish_status(STATUS_RECONNECTED)
+
+    def _reconnect_failed(self, exc: Exception) -> None:
+        logger.warning("Reconnect failed: %s", exc)
+        self.reconnect_delay = min(self.reconnect_delay * 2,
+                                   RECONNECT_DELAY_MAX)
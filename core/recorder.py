@@ -0,0 +1,257 @@
+"""
+Запись сессии на диск потоком — переживает падение программы.
+
+Лог сессии (``core.SessionStore``) живёт в RAM и попадает на диск только
+по кнопке «Экспорт CSV»: падение программы или севший на крыше ноутбук
+теряют всю сессию. ``SessionRecorder`` дописывает выборки в файл по
+ходу работы:
+
+* ``record(sample)`` только кладёт выборку в очередь — поток опроса не
+  ждёт диска;
+* фоновый поток раз в ``flush_interval`` секунд пишет накопившееся
+  одним ``write`` (строки CSV, колонки ``SESSION_FIELDS``, ts — epoch)
+  и сбрасывает буфер, а раз в ``fsync_interval`` — ``os.fsync``;
+* файлы — по одному на сессию, с ротацией по ``max_bytes``:
+  ``session-20260101-120000-001.csv``, ``…-002.csv``; файл только
+  создаётся, не дописывается: сессия, начатая в ту же секунду, получает
+  своё имя (``session-20260101-120000-2-001.csv``);
+* после аварии файл может оборваться на середине строки —
+  ``recover_recording`` обрезает хвост до последней целой строки;
+  ``start()`` делает это для всех старых файлов папки;
+* ``sinks`` — дополнительные приёмники тех же пачек (объект с
+  ``write_batch(samples)``, например ``core.SessionDatabase.sink()``);
+  без ``directory`` пишутся только они.
+
+Потеря при аварии — не больше ``flush_interval`` (падение программы)
+или ``fsync_interval`` (пропало питание).
+"""
+from __future__ import annotations
+
+import csv
+import datetime
+import glob
+import io
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+from core.constants import (
+    RECORD_FLUSH_INTERVAL,
+    RECORD_FSYNC_INTERVAL,
+    RECORD_ROTATE_BYTES,
+)
+from core.poller import Sample
+from core.session import SESSION_FIELDS, SESSION_NUMERIC, SESSION_STRINGS
+
+logger = logging.getLogger(__name__)
+
+RECORD_SUFFIX = ".csv"
+_TAIL_BLOCK = 4096
+
+
+def recover_recording(path: str) -> int:
+    """Обрезает оборванную последнюю строку файла записи.
+
+    Возвращает число отброшенных байт. Файл без единой целой строки
+    удаляется.
+    """
+    with open(path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - _TAIL_BLOCK)
+            f.seek(start)
+            block = f.read(end - start)
+            if start + len(block) == size and block.endswith(b'\n'):
+                return 0
+            nl = block.rfind(b'\n')
+            if nl >= 0:
+                keep = start + nl + 1
+                f.truncate(keep)
+                f.flush()
+                os.fsync(f.fileno())
+                return size - keep
+            end = start
+    os.remove(path)
+    return size
+
+
+def _format_rows(samples: list[Sample]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    for s in samples:
+        data = s.data
+        row: list[object] = [f"{s.ts:.3f}", round(s.lateness * 1000)]
+        for name in SESSION_NUMERIC:
+            value = getattr(s, name)
+            row.append('' if value is None else f"{value:g}")
+        for key in SESSION_STRINGS:
+            value = data.get(key)
+            row.append('' if value is None else value)
+        writer.writerow(row)
+    return buf.getvalue()
+
+
+class SessionRecorder:
+    """Дозапись выборок одной сессии в файлы ``directory``.
+
+    Использование::
+
+        recorder = SessionRecorder('/path/to/sessions')
+        recorder.start()
+        poller.subscribe(recorder.record)
+        ...
+        recorder.stop()
+    """
+
+    def __init__(self, directory: str | None, *, prefix: str = "session",
+                 flush_interval: float = RECORD_FLUSH_INTERVAL,
+                 fsync_interval: float = RECORD_FSYNC_INTERVAL,
+                 max_bytes: int = RECORD_ROTATE_BYTES,
+                 sinks: Iterable[Any] = ()):
+        self.directory = directory
+        self.sinks = list(sinks)
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.files: list[str] = []
+        self.records = 0
+        self.error: OSError | None = None
+        self._queue: deque[Sample] = deque()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._file: io.TextIOWrapper | None = None
+        self._session = ""
+        self._last_fsync = 0.0
+
+    @property
+    def path(self) -> str | None:
+        """Текущий файл записи."""
+        return self.files[-1] if self.files else None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- Жизненный цикл ----
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="hua4gmon-recorder")
+        if self.directory is None:
+            self._thread.start()
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        pattern = os.path.join(self.directory,
+                               f"{self.prefix}-*{RECORD_SUFFIX}")
+        for old in sorted(glob.glob(pattern)):
+            try:
+                dropped = recover_recording(old)
+            except OSError:
+                logger.warning("Cannot recover %s", old, exc_info=True)
+                continue
+            if dropped:
+                logger.info("Recovered %s: dropped %d bytes", old, dropped)
+        self._session = f"{datetime.datetime.now():%Y%m%d-%H%M%S}"
+        self._open_next()
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Дописывает очередь, делает fsync и закрывает файл.
+
+        Файл закрывает поток записи после последней пачки; если он не
+        успел за ``timeout`` (диск завис), закроет сам, когда допишет.
+        """
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("Session recorder is still flushing; "
+                               "the file will be closed when it is done")
+                return
+        self._close_file()
+
+    def record(self, sample: Sample) -> None:
+        """Ставит выборку в очередь записи; не блокирует."""
+        self._queue.append(sample)
+
+    # ---- Фоновый поток ----
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush()
+        self._flush(force_sync=True)
+        self._close_file()
+
+    def _flush(self, force_sync: bool = False) -> None:
+        queue = self._queue
+        batch = [queue.popleft() for _ in range(len(queue))]
+        if batch:
+            self.records += len(batch)
+            for sink in self.sinks:
+                try:
+                    sink.write_batch(batch)
+                except Exception:
+                    logger.warning("Session sink %r failed", sink,
+                                   exc_info=True)
+        f = self._file
+        if f is None:
+            return
+        try:
+            if batch:
+                f.write(_format_rows(batch))
+                f.flush()
+            now = time.monotonic()
+            if force_sync or now - self._last_fsync >= self.fsync_interval:
+                os.fsync(f.fileno())
+                self._last_fsync = now
+            if f.tell() >= self.max_bytes:
+                self._close_file()
+                self._open_next()
+        except OSError as e:
+            # Диск полон/отключён: теряем пачку, но опрос продолжается.
+            if self.error is None:
+                logger.warning("Session recording failed: %s", e)
+            self.error = e
+
+    def _open_next(self) -> None:
+        part = len(self.files) + 1
+        stamp, n = self._session, 1
+        while True:
+            path = os.path.join(
+                self.directory or ".",
+                f"{self.prefix}-{self._session}-{part:03d}{RECORD_SUFFIX}")
+            try:
+                f = open(path, 'x', newline='', encoding='utf-8')  # noqa: SIM115
+                break
+            except FileExistsError:
+                if self.files:
+                    part += 1               # чужой файл посреди сессии
+                else:
+                    # Другая сессия началась в ту же секунду.
+                    n += 1
+                    self._session = f"{stamp}-{n}"
+        f.write(",".join(SESSION_FIELDS) + "\n")
+        f.flush()
+        self._file = f
+        self.files.append(path)
+        self._last_fsync = 0.0
+
+    def _close_file(self) -> None:
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            f.flush()
+            os.fsync(f.fileno())
+        except OSError:
+            logger.debug("fsync on close failed", exc_info=True)
+        finally:
+            f.close()
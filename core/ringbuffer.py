@@ -0,0 +1,152 @@
+"""
+Кольцевой буфер float для истории графика, стрелки направления и
+мин/макс.
+
+Раньше история была ``list`` с ``append`` + ``pop(0)``: каждый тик
+сдвигал весь список, а ``min(vals)``/``max(vals)`` в ``refresh_ui``
+проходили всю историю заново. При истории в сотни точек это мелочь, при
+десятках тысяч — заметная нагрузка на UI-поток.
+
+``RingBuffer`` хранит значения в ``array('d')`` фиксированной ёмкости:
+
+* ``append`` — O(1), старое значение просто перезаписывается;
+* ``min()``/``max()`` — O(1) за счёт монотонных очередей (амортизированно
+  O(1) на ``append``), ``sum``/``mean()`` — по бегущей сумме;
+* ``segments()`` — история без копирования: два ``memoryview`` на
+  массив (от старых к новым), их удобно обходить при отрисовке;
+* индексы и срезы как у ``list`` (в т.ч. отрицательные) — поэтому
+  ``direction_delta``/``jitter`` из ``core.signal_analysis`` работают с
+  буфером как со списком, копируя только нужное окно.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import overload
+
+
+class RingBuffer:
+    """История последних ``capacity`` значений float.
+
+    Не потокобезопасен — живёт в главном потоке UI.
+    """
+
+    __slots__ = ('capacity', '_buf', '_start', '_len', '_total', '_sum',
+                 '_min', '_max')
+
+    def __init__(self, capacity: int, values: Iterable[float] = ()):
+        if capacity < 1:
+            raise ValueError("RingBuffer capacity must be >= 1")
+        self.capacity = capacity
+        self._buf = array('d', bytes(8 * capacity))
+        self._start = 0          # индекс самого старого значения в _buf
+        self._len = 0
+        self._total = 0          # сколько значений добавлено всего
+        self._sum = 0.0
+        # Монотонные очереди (номер значения, значение): голова —
+        # текущий минимум/максимум окна.
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+        self.extend(values)
+
+    # ---- Запись ----
+
+    def append(self, value: float) -> None:
+        value = float(value)
+        cap = self.capacity
+        if self._len == cap:
+            self._sum -= self._buf[self._start]
+            self._buf[self._start] = value
+            self._start = (self._start + 1) % cap
+        else:
+            self._buf[(self._start + self._len) % cap] = value
+            self._len += 1
+        n = self._total
+        self._total += 1
+        self._sum += value
+        if self._total % cap == 0:
+            # Бегущая сумма копит ошибку округления — раз в круг пересчёт.
+            self._sum = sum(self)
+
+        oldest = self._total - self._len
+        lo, hi = self._min, self._max
+        while lo and lo[-1][1] >= value:
+            lo.pop()
+        lo.append((n, value))
+        while lo[0][0] < oldest:
+            lo.popleft()
+        while hi and hi[-1][1] <= value:
+            hi.pop()
+        hi.append((n, value))
+        while hi[0][0] < oldest:
+            hi.popleft()
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.append(value)
+
+    def clear(self) -> None:
+        self._start = self._len = self._total = 0
+        self._sum = 0.0
+        self._min.clear()
+        self._max.clear()
+
+    # ---- Статистика ----
+
+    def min(self) -> float | None:
+        return self._min[0][1] if self._len else None
+
+    def max(self) -> float | None:
+        return self._max[0][1] if self._len else None
+
+    @property
+    def sum(self) -> float:
+        return self._sum if self._len else 0.0
+
+    def mean(self) -> float | None:
+        return self._sum / self._len if self._len else None
+
+    # ---- Чтение ----
+
+    @property
+    def total(self) -> int:
+        """Сколько значений добавлено с создания или ``clear()``."""
+        return self._total
+
+    def segments(self) -> tuple[memoryview, memoryview]:
+        """Содержимое от старых к новым как два окна на массив (без копии)."""
+        view = memoryview(self._buf)
+        end = self._start + self._len
+        if end <= self.capacity:
+            return view[self._start:end], view[0:0]
+        return view[self._start:], view[:end - self.capacity]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self) -> Iterator[float]:
+        for seg in self.segments():
+            yield from seg
+
+    @overload
+    def __getitem__(self, index: int) -> float: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[float]: ...
+
+    def __getitem__(self, index: int | slice) -> float | list[float]:
+        if isinstance(index, slice):
+            return [self._buf[(self._start + i) % self.capacity]
+                    for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("RingBuffer index out of range")
+        return self._buf[(self._start + index) % self.capacity]
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.capacity}, {list(self)!r})"
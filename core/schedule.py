@@ -0,0 +1,251 @@
+"""
+Расписание опроса: у каждого endpoint роутера свой период и свой
+бюджет устаревания.
+
+Раньше всё, кроме месячной статистики, опрашивалось каждый тик — в том
+числе ``current_plmn()``, который за сеанс почти не меняется. Здесь
+расписание декларативное: сигнал — каждый тик (при юстировке тик
+0.25 с), трафик — раз в секунду, PLMN — раз в 30 с, месячная
+статистика — раз в 5 минут. Сведения об устройстве
+(``device.information()``) читаются один раз при входе — их получает
+фабрика подключения, в тиковое расписание они не входят.
+
+На каждом тике ``Schedule.due()`` отбирает endpoint, чей период истёк,
+и они уходят к роутеру одной пачкой (``TickFetcher``). Между опросами
+в выборку попадает последнее известное значение — пока оно не старше
+``stale_after``; устаревшее выбрасывается, и UI показывает прочерк.
+
+Сами тики отсчитывает ``TickClock`` — по дедлайнам ``time.monotonic()``,
+без накопления дрейфа. Шаг тика может подстраивать ``AdaptiveInterval``:
+частый опрос, пока сигнал «гуляет», и редкий на стабильной связи.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from core.constants import (
+    ADAPTIVE_DELTA_DB,
+    ADAPTIVE_INTERVAL_MAX,
+    ADAPTIVE_INTERVAL_MIN,
+    ADAPTIVE_JITTER_DB,
+    ADAPTIVE_STEADY_TICKS,
+    DIRECTION_LOOKBACK,
+    JITTER_WINDOW,
+)
+from core.ringbuffer import RingBuffer
+from core.signal_analysis import direction_delta, jitter
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Один endpoint роутера в расписании опроса.
+
+    period      : секунды между опросами; 0 — каждый тик;
+                  None — один раз за подключение.
+    stale_after : сколько секунд последнее значение считается годным;
+                  None — без ограничения.
+    required    : ошибка endpoint = ошибка тика (повод переподключиться).
+                  Ошибки остальных endpoint гасит их circuit breaker
+                  (``core.breaker``), сессию они не трогают.
+    timeout     : сколько тик ждёт ответа (не больше бюджета тика);
+                  не успел — в выборку идёт прошлое значение с пометкой
+                  «устарело». None — ждать всегда (только для сигнала:
+                  ради него тик и делается).
+    """
+    name: str                   # ключ результата (см. core.poller.merge_tick)
+    path: str                   # атрибут клиента, напр. 'device.signal'
+    period: float | None = 0.0
+    stale_after: float | None = None
+    required: bool = False
+    timeout: float | None = None
+
+    def resolve(self, client: Any) -> Callable[[], Any]:
+        """'monitoring.status' → client.monitoring.status."""
+        return functools.reduce(getattr, self.path.split('.'), client)
+
+
+DEFAULT_SCHEDULE: tuple[Endpoint, ...] = (
+    Endpoint('signal', 'device.signal', 0.0, None, required=True),
+    Endpoint('traffic', 'monitoring.traffic_statistics', 1.0, 10.0,
+             timeout=0.8),
+    Endpoint('status', 'monitoring.status', 5.0, 30.0, timeout=1.0),
+    Endpoint('plmn', 'net.current_plmn', 30.0, 120.0, timeout=1.5),
+    # Есть не на всех моделях (USB-стики часто без неё) — не обязательна.
+    Endpoint('month', 'monitoring.month_statistics', 300.0, 900.0,
+             timeout=1.5),
+)
+
+
+class Schedule:
+    """Состояние расписания: когда что опрашивали и последние значения.
+
+    Не потокобезопасен — используется только из потока опроса.
+    """
+
+    def __init__(self, endpoints: Iterable[Endpoint] = DEFAULT_SCHEDULE):
+        self.endpoints: dict[str, Endpoint] = {e.name: e for e in endpoints}
+        self._last_poll: dict[str, float] = {}
+        self._values: dict[str, tuple[float, Any]] = {}
+
+    def reset(self) -> None:
+        """Новое подключение: всё опросить заново на первом же тике."""
+        self._last_poll.clear()
+        self._values.clear()
+
+    def due(self, now: float, slack: float = 0.0) -> list[Endpoint]:
+        """Endpoint, которые пора опросить на тике в момент ``now``.
+
+        ``slack`` — допуск (обычно половина тика): период 1 с при тике
+        1 с не должен «проскакивать» на 2 с из-за дрожания таймера.
+        """
+        out = []
+        for ep in self.endpoints.values():
+            last = self._last_poll.get(ep.name)
+            if (last is None
+                    or (ep.period is not None
+                        and now - last >= ep.period - slack)):
+                out.append(ep)
+        return out
+
+    def mark_polled(self, name: str, now: float) -> None:
+        """Запрос отправлен (успешно или нет) — следующий через period."""
+        self._last_poll[name] = now
+
+    def store(self, name: str, value: Any, now: float) -> None:
+        self._values[name] = (now, value)
+
+    def fresh(self, now: float) -> dict[str, Any]:
+        """Последние значения всех endpoint, ещё не вышедшие за бюджет."""
+        out = {}
+        for name, (ts, value) in self._values.items():
+            ep = self.endpoints.get(name)
+            if (ep is not None and ep.stale_after is not None
+                    and now - ts > ep.stale_after):
+                continue
+            out[name] = value
+        return out
+
+
+class TickClock:
+    """Тики с фиксированным шагом по дедлайнам ``time.monotonic()``.
+
+    Прежний цикл спал ``interval`` ПОСЛЕ работы, и реальный период был
+    interval + время опроса — метки времени в логе сессии «ползли».
+    Здесь следующий дедлайн = предыдущий + period, независимо от того,
+    сколько длился тик. Если тик опоздал больше чем на период (долгий
+    ответ роутера, переподключение), пропущенные тики НЕ догоняются
+    пачкой — они отбрасываются (счётчик ``skipped``), и сетка
+    продолжается от ближайшего дедлайна.
+
+    Не потокобезопасен — используется только из потока опроса.
+    """
+
+    def __init__(self, period: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.period = period
+        self._clock = clock
+        self._deadline: float | None = None
+        self.lateness = 0.0     # на сколько опоздал последний тик, с
+        self.skipped = 0        # всего отброшенных тиков
+
+    def reset(self) -> None:
+        """Следующий ``wait()`` вернётся сразу и начнёт новую сетку."""
+        self._deadline = None
+
+    def advance(self) -> float:
+        """Переходит к следующему тику; возвращает, сколько ждать, с.
+
+        Для циклов, которые ждут сами (``asyncio.sleep``); после
+        ожидания — ``arrive()``.
+        """
+        now = self._clock()
+        if self._deadline is None:
+            self._deadline = now
+            return 0.0
+        self._deadline += self.period
+        if now >= self._deadline + self.period:
+            missed = int((now - self._deadline) // self.period)
+            self._deadline += missed * self.period
+            self.skipped += missed
+        return max(0.0, self._deadline - now)
+
+    def arrive(self) -> None:
+        """Тик начался: фиксирует опоздание относительно дедлайна."""
+        self.lateness = max(0.0, self._clock() - self._deadline)
+
+    def wait(self, stop_event: threading.Event) -> bool:
+        """Ждёт дедлайна следующего тика. True — пришёл сигнал остановки."""
+        delay = self.advance()
+        if delay > 0 and stop_event.wait(delay):
+            return True
+        self.arrive()
+        return stop_event.is_set()
+
+
+class AdaptiveInterval:
+    """Интервал опроса по «подвижности» RSRP/SINR.
+
+    Пока антенну крутят, нужно 4–5 выборок в секунду; когда мачта
+    закреплена и RSRP минутами стоит на месте, опрос раз в секунду
+    только грузит CPU роутера и батарею телефона.
+
+    Сигнал — тот же, что у стрелки направления и индикатора джиттера
+    (``direction_delta`` / ``jitter`` из ``core.signal_analysis``). Если
+    по RSRP или SINR хотя бы один из них выше порога — интервал сразу
+    падает до ``floor``. На спокойной связи каждые ``steady_ticks``
+    тиков интервал удваивается, пока не упрётся в ``ceiling``.
+
+    Не потокобезопасен — используется только из потока опроса.
+    """
+
+    def __init__(self, ceiling: float = ADAPTIVE_INTERVAL_MAX,
+                 floor: float = ADAPTIVE_INTERVAL_MIN, *,
+                 steady_ticks: int = ADAPTIVE_STEADY_TICKS,
+                 delta_db: float = ADAPTIVE_DELTA_DB,
+                 jitter_db: float = ADAPTIVE_JITTER_DB):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.steady_ticks = steady_ticks
+        self.delta_db = delta_db
+        self.jitter_db = jitter_db
+        size = max(DIRECTION_LOOKBACK * 2, JITTER_WINDOW)
+        self._history = {'rsrp': RingBuffer(size), 'sinr': RingBuffer(size)}
+        self._steady = 0
+        self.interval = floor
+
+    def reset(self) -> None:
+        """Новое подключение: начать с частого опроса."""
+        for hist in self._history.values():
+            hist.clear()
+        self._steady = 0
+        self.interval = self.floor
+
+    def is_volatile(self) -> bool:
+        for hist in self._history.values():
+            delta = direction_delta(hist)
+            spread = jitter(hist)
+            if ((delta is not None and abs(delta) >= self.delta_db)
+                    or (spread is not None and spread >= self.jitter_db)):
+                return True
+        return False
+
+    def update(self, rsrp: float | None, sinr: float | None) -> float:
+        """Учитывает выборку тика и возвращает интервал до следующего."""
+        for name, value in (('rsrp', rsrp), ('sinr', sinr)):
+            if value is not None:
+                self._history[name].append(value)
+        if self.is_volatile():
+            self.interval = self.floor
+            self._steady = 0
+        else:
+            self._steady += 1
+            if self._steady >= self.steady_ticks:
+                self.interval *= 2
+                self._steady = 0
+        self.interval = max(self.floor, min(self.interval, self.ceiling))
+        return self.interval
@@ -0,0 +1,190 @@
+"""
+Лог сессии в памяти — по колонкам, без предела длины.
+
+Раньше лог был списком словарей (до ``SESSION_LOG_MAX`` = 10 800
+строк): в каждой строке заново хранились ключи, время — строкой ISO, а
+через три часа запись молча прекращалась. ``SessionStore`` хранит
+каждую колонку отдельным типизированным массивом:
+
+* ``ts`` — ``array('d')``, epoch в секундах;
+* ``late_ms`` — ``array('i')``;
+* RSRP/RSSI/SINR/RSRQ — ``array('h')`` в десятых долях dB (точность
+  роутера), пропуск — ``NUMERIC_MISSING``;
+* PLMN/eNodeB/сектор/band/PCI — словарное кодирование: в колонке
+  ``array('I')`` с номером строки из таблицы колонки, сами строки
+  хранятся по одному разу.
+
+Строка выходит ~40 байт: сутки при тике 1 с — около 3.5 МБ. Массивы
+растут блоками по ``SESSION_CHUNK`` строк — длинная сессия не
+переаллоцирует и не копирует всю историю. Экспорт в CSV разворачивает
+колонки блок за блоком (``zip`` колонок → ``writerows``).
+
+Не потокобезопасен — живёт в главном потоке UI.
+"""
+from __future__ import annotations
+
+import csv
+import datetime
+from array import array
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+from core.constants import SESSION_CHUNK
+from core.poller import Sample
+
+# Числовые колонки: поле Sample (значение в dB/dBm).
+SESSION_NUMERIC: tuple[str, ...] = ('rsrp', 'rssi', 'sinr', 'rsrq')
+# Строковые колонки: ключ Sample.data.
+SESSION_STRINGS: tuple[str, ...] = ('plmn', 'enodeb', 'sector', 'band', 'pci')
+SESSION_FIELDS: tuple[str, ...] = ('ts', 'late_ms', *SESSION_NUMERIC,
+                                   *SESSION_STRINGS)
+
+NUMERIC_MISSING = -32768             # значение отсутствует
+_NUMERIC_LIMIT = 32767
+_INT_LIMIT = 2**31 - 1
+
+
+def encode_tenths(value: float | None) -> int:
+    """dB → целое в десятых долях (``NUMERIC_MISSING`` — нет значения)."""
+    if value is None or value != value:
+        return NUMERIC_MISSING
+    return max(-_NUMERIC_LIMIT, min(_NUMERIC_LIMIT, round(value * 10)))
+
+
+def decode_tenths(code: int) -> float | None:
+    return None if code == NUMERIC_MISSING else code / 10
+
+
+class _StringTable:
+    """Словарь строк одной колонки: строка ↔ номер."""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: Any) -> int:
+        s = '' if value is None else str(value)
+        code = self.codes.get(s)
+        if code is None:
+            code = self.codes[s] = len(self.values)
+            self.values.append(s)
+        return code
+
+
+class _Chunk:
+    """Блок из не более ``SESSION_CHUNK`` строк: по массиву на колонку."""
+
+    __slots__ = ('ts', 'late_ms', 'numeric', 'strings')
+
+    def __init__(self) -> None:
+        self.ts = array('d')
+        self.late_ms = array('i')
+        self.numeric = [array('h') for _ in SESSION_NUMERIC]
+        self.strings = [array('I') for _ in SESSION_STRINGS]
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def nbytes(self) -> int:
+        cols = [self.ts, self.late_ms, *self.numeric, *self.strings]
+        return sum(len(c) * c.itemsize for c in cols)
+
+
+class SessionStore:
+    """Колоночный лог выборок сессии для экспорта.
+
+    Использование::
+
+        store = SessionStore()
+        store.append(sample)            # на каждом тике
+        with open(path, 'w', newline='') as f:
+            store.write_csv(f)
+    """
+
+    def __init__(self, chunk: int = SESSION_CHUNK):
+        if chunk < 1:
+            raise ValueError("SessionStore chunk must be >= 1")
+        self.chunk = chunk
+        self._chunks: list[_Chunk] = []
+        self._tables = [_StringTable() for _ in SESSION_STRINGS]
+        self._len = 0
+
+    # ---- Запись ----
+
+    def append(self, sample: Sample) -> None:
+        chunks = self._chunks
+        if not chunks or len(chunks[-1]) >= self.chunk:
+            chunks.append(_Chunk())
+        block = chunks[-1]
+        block.ts.append(sample.ts)
+        block.late_ms.append(min(_INT_LIMIT, round(sample.lateness * 1000)))
+        for col, name in zip(block.numeric, SESSION_NUMERIC, strict=True):
+            col.append(encode_tenths(getattr(sample, name)))
+        data = sample.data
+        for col, table, key in zip(block.strings, self._tables,
+                                   SESSION_STRINGS, strict=True):
+            col.append(table.encode(data.get(key)))
+        self._len += 1
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._tables = [_StringTable() for _ in SESSION_STRINGS]
+        self._len = 0
+
+    # ---- Чтение ----
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    @property
+    def nbytes(self) -> int:
+        """Примерный объём колонок в памяти (без таблиц строк), байт."""
+        return sum(block.nbytes for block in self._chunks)
+
+    def _block_column(self, block: _Chunk, index: int) -> list[Any]:
+        """Колонка ``SESSION_FIELDS[index]`` одного блока, раскодированная."""
+        if index == 0:
+            return block.ts.tolist()
+        if index == 1:
+            return block.late_ms.tolist()
+        index -= 2
+        if index < len(SESSION_NUMERIC):
+            return [decode_tenths(c) for c in block.numeric[index]]
+        index -= len(SESSION_NUMERIC)
+        values = self._tables[index].values
+        return [values[c] for c in block.strings[index]]
+
+    def _decoded(self, block: _Chunk) -> list[list[Any]]:
+        return [self._block_column(block, i)
+                for i in range(len(SESSION_FIELDS))]
+
+    def column(self, name: str) -> list[Any]:
+        """Вся колонка ``name`` (см. ``SESSION_FIELDS``) списком."""
+        index = SESSION_FIELDS.index(name)
+        out: list[Any] = []
+        for block in self._chunks:
+            out.extend(self._block_column(block, index))
+        return out
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        """Строки в порядке ``SESSION_FIELDS`` (ts — epoch, с)."""
+        for block in self._chunks:
+            yield from zip(*self._decoded(block), strict=True)
+
+    def write_csv(self, stream: TextIO) -> int:
+        """Пишет лог в CSV (ts — локальное время ISO); возвращает число строк."""
+        writer = csv.writer(stream)
+        writer.writerow(SESSION_FIELDS)
+        fromtimestamp = datetime.datetime.fromtimestamp
+        for block in self._chunks:
+            cols = self._decoded(block)
+            cols[0] = [fromtimestamp(ts).isoformat(timespec='milliseconds')
+                       for ts in cols[0]]
+            writer.writerows(zip(*cols, strict=True))
+        return self._len
@@ -0,0 +1,220 @@
+"""
+База сессий SQLite: все записи объекта в одном файле и ответы на
+вопросы вида «какой eNodeB/сектор дал лучший медианный SINR за все
+выезды на эту площадку».
+
+``SessionDatabase`` — необязательный приёмник (sink) ``core.recorder``:
+пачки выборок вставляются одной транзакцией из фонового потока записи.
+База работает в режиме WAL — чтение запросами не мешает записи. Индексы:
+
+* ``samples(ts)`` — выборка по времени;
+* ``samples(plmn, enodeb, sector)`` — по соте;
+* ``samples(band)`` — по диапазону.
+
+Запросы (``cell_stats``, ``band_stats``) считают агрегаты прямо в
+SQLite — медиана через оконные функции — и отдают по строке на соту
+или band, не поднимая сессии в списки Python.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from core.poller import Sample
+from core.session import SESSION_NUMERIC, SESSION_STRINGS
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    device TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS samples (
+    session INTEGER NOT NULL REFERENCES sessions(id),
+    ts REAL NOT NULL,
+    late_ms INTEGER NOT NULL,
+    {", ".join(f"{n} REAL" for n in SESSION_NUMERIC)},
+    {", ".join(f"{k} TEXT NOT NULL DEFAULT ''" for k in SESSION_STRINGS)}
+);
+CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples(ts);
+CREATE INDEX IF NOT EXISTS idx_samples_cell ON samples(plmn, enodeb, sector);
+CREATE INDEX IF NOT EXISTS idx_samples_band ON samples(band);
+"""
+
+_COLUMNS = ('session', 'ts', 'late_ms', *SESSION_NUMERIC, *SESSION_STRINGS)
+_INSERT = (f"INSERT INTO samples ({', '.join(_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(_COLUMNS))})")
+
+
+@dataclass(frozen=True)
+class GroupStats:
+    """Агрегаты метрики по одной группе (сота или band)."""
+    key: tuple[str, ...]      # (plmn, enodeb, sector) или (band,)
+    count: int
+    median: float
+    mean: float
+    min: float
+    max: float
+
+
+class SessionSink:
+    """Приёмник ``core.SessionRecorder``: одна сессия в базе."""
+
+    def __init__(self, db: SessionDatabase, session_id: int):
+        self.db = db
+        self.session_id = session_id
+
+    def write_batch(self, samples: list[Sample]) -> None:
+        self.db.insert(self.session_id, samples)
+
+
+class SessionDatabase:
+    """Файл SQLite с выборками всех сессий.
+
+    Потокобезопасен: запись идёт из потока ``SessionRecorder``, запросы —
+    из UI или скриптов.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> SessionDatabase:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ---- Запись ----
+
+    def begin_session(self, device: str = "",
+                      started: float | None = None) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO sessions (started, device) VALUES (?, ?)",
+                (time.time() if started is None else started, device))
+            return int(cur.lastrowid)
+
+    def sink(self, device: str = "") -> SessionSink:
+        """Новая сессия и приёмник для ``SessionRecorder(sinks=...)``."""
+        return SessionSink(self, self.begin_session(device))
+
+    def insert(self, session_id: int, samples: list[Sample]) -> None:
+        """Вставляет пачку выборок одной транзакцией."""
+        rows = []
+        for s in samples:
+            data = s.data
+            rows.append((
+                session_id, s.ts, round(s.lateness * 1000),
+                *[getattr(s, n) for n in SESSION_NUMERIC],
+                *['' if data.get(k) is None else str(data[k])
+                  for k in SESSION_STRINGS]))
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_INSERT, rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # ---- Запросы ----
+
+    def _where(self, metric: str, start: float | None, end: float | None,
+               filters: dict[str, Any]) -> tuple[str, list[Any]]:
+        if metric not in SESSION_NUMERIC:
+            raise ValueError(f"Unknown metric: {metric}")
+        clauses = [f"{metric} IS NOT NULL"]
+        params: list[Any] = []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(end)
+        for key, value in filters.items():
+            if value is not None:
+                clauses.append(f"{key} = ?")
+                params.append(str(value))
+        return " AND ".join(clauses), params
+
+    def _group_stats(self, metric: str, group: tuple[str, ...],
+                     start: float | None, end: float | None,
+                     filters: dict[str, Any],
+                     min_count: int) -> list[GroupStats]:
+        where, params = self._where(metric, start, end, filters)
+        keys = ", ".join(group)
+        # Медиана: номер строки в группе по возрастанию метрики и размер
+        # группы; среднее двух центральных (одной — при нечётном).
+        sql = f"""
+            WITH ranked AS (
+                SELECT {keys}, {metric} AS v,
+                       ROW_NUMBER() OVER (PARTITION BY {keys}
+                                          ORDER BY {metric}) AS rn,
+                       COUNT(*) OVER (PARTITION BY {keys}) AS cnt
+                FROM samples WHERE {where}
+            ),
+            agg AS (
+                SELECT {keys}, COUNT(*) AS n, AVG(v) AS mean,
+                       MIN(v) AS lo, MAX(v) AS hi
+                FROM ranked GROUP BY {keys}
+            ),
+            med AS (
+                SELECT {keys}, AVG(v) AS median FROM ranked
+                WHERE rn IN ((cnt + 1) / 2, (cnt + 2) / 2)
+                GROUP BY {keys}
+            )
+            SELECT {", ".join(f"agg.{k}" for k in group)},
+                   agg.n, med.median, agg.mean, agg.lo, agg.hi
+            FROM agg JOIN med USING ({keys})
+            WHERE agg.n >= ?
+            ORDER BY med.median DESC
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, [*params, min_count]).fetchall()
+        width = len(group)
+        return [GroupStats(tuple(r[:width]), r[width], r[width + 1],
+                           r[width + 2], r[width + 3], r[width + 4])
+                for r in rows]
+
+    def cell_stats(self, metric: str = 'sinr', *, start: float | None = None,
+                   end: float | None = None, plmn: str | None = None,
+                   band: str | None = None,
+                   min_count: int = 1) -> list[GroupStats]:
+        """Агрегаты ``metric`` по сотам (plmn, enodeb, sector), лучшая
+        медиана — первой."""
+        return self._group_stats(metric, ('plmn', 'enodeb', 'sector'),
+                                 start, end, {'plmn': plmn, 'band': band},
+                                 min_count)
+
+    def band_stats(self, metric: str = 'sinr', *, start: float | None = None,
+                   end: float | None = None, plmn: str | None = None,
+                   min_count: int = 1) -> list[GroupStats]:
+        """Агрегаты ``metric`` по band, лучшая медиана — первой."""
+        return self._group_stats(metric, ('band',), start, end,
+                                 {'plmn': plmn}, min_count)
+
+    def time_range(self) -> tuple[float, float] | None:
+        with self._lock:
+            lo, hi = self._conn.execute(
+                "SELECT MIN(ts), MAX(ts) FROM samples").fetchone()
+        return None if lo is None else (lo, hi)
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute(
+                "SELECT COUNT(*) FROM samples").fetchone()[0])
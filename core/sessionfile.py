@@ -0,0 +1,330 @@
+"""
+Двоичный файл сессии (``.h4gs``): компактное хранение и быстрый доступ
+по времени.
+
+CSV многосуточной записи весит десятки мегабайт и разбирается заново
+целиком на любой вопрос «что было вчера с 14:00 до 15:00». Здесь —
+записи фиксированной ширины, словарь строк, сжатие по блокам и индекс
+блоков по времени. ``SessionFile`` отображает файл в память (``mmap``),
+читает только индекс и словарь, а блоки распаковывает по мере нужды:
+диапазон времени — это бинарный поиск по индексу и один-два блока.
+
+Формат (все числа little-endian)::
+
+    заголовок   '<4sHH'      b'H4GS', версия (1), размер записи (40)
+    блок 0      zlib(N записей подряд)
+    блок 1      ...
+    словарь     для каждой из SESSION_STRINGS по порядку:
+                '<I' число строк, затем для каждой '<H' длина + UTF-8
+    индекс      для каждого блока '<QIIdd':
+                смещение, число записей, длина сжатого блока,
+                ts первой записи, ts последней записи
+    концовка    '<QQI4s'     смещение словаря, смещение индекса,
+                             число блоков, b'H4GE'
+
+Запись (``RECORD``, 40 байт) — колонки ``SESSION_FIELDS``::
+
+    '<d'   ts, epoch в секундах
+    '<i'   late_ms
+    '<4h'  rsrp, rssi, sinr, rsrq — десятые доли dB,
+           -32768 — нет значения (см. core.session)
+    '<5I'  plmn, enodeb, sector, band, pci — номер строки в словаре
+           своей колонки
+
+Записи в файле идут по возрастанию ts (так их отдаёт опрос). Файл
+без концовки (программа упала при записи) не читается — для защиты от
+сбоев служит ``core.recorder``, а ``.h4gs`` собирается из готовой
+сессии (экспорт) или из её CSV-записи.
+"""
+from __future__ import annotations
+
+import bisect
+import mmap
+import struct
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any, BinaryIO
+
+from core.constants import SESSION_FILE_BLOCK
+from core.poller import Sample
+from core.session import (
+    SESSION_FIELDS,
+    SESSION_NUMERIC,
+    SESSION_STRINGS,
+    decode_tenths,
+    encode_tenths,
+)
+
+SESSION_FILE_SUFFIX = ".h4gs"
+SESSION_FILE_VERSION = 1
+
+MAGIC = b'H4GS'
+END_MAGIC = b'H4GE'
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<di4h5I')
+INDEX_ENTRY = struct.Struct('<QIIdd')
+TRAILER = struct.Struct('<QQI4s')
+
+_STR_COUNT = struct.Struct('<I')
+_STR_LEN = struct.Struct('<H')
+_N_NUM = len(SESSION_NUMERIC)
+
+
+_STR_MAX = 0xFFFF
+
+
+def _pack_string(s: str) -> bytes:
+    """Строка словаря: '<H' длина + UTF-8, не длиннее ``_STR_MAX`` байт.
+
+    Длинная строка обрезается по границе символа — иначе оборванная
+    многобайтовая последовательность не читается обратно.
+    """
+    raw = s.encode('utf-8')
+    if len(raw) > _STR_MAX:
+        raw = raw[:_STR_MAX].decode('utf-8', 'ignore').encode('utf-8')
+    return _STR_LEN.pack(len(raw)) + raw
+
+
+class SessionFileWriter:
+    """Пишет ``.h4gs`` последовательно; ``close()`` дописывает словарь и
+    индекс.
+
+    Использование::
+
+        with SessionFileWriter(path) as w:
+            for sample in samples:
+                w.append(sample)
+    """
+
+    def __init__(self, path: str, *, block_records: int = SESSION_FILE_BLOCK,
+                 level: int = 6):
+        if block_records < 1:
+            raise ValueError("block_records must be >= 1")
+        self.path = path
+        self.block_records = block_records
+        self.level = level
+        self.records = 0
+        self._f: BinaryIO | None = open(path, 'wb')  # noqa: SIM115
+        self._f.write(HEADER.pack(MAGIC, SESSION_FILE_VERSION, RECORD.size))
+        self._pending = bytearray()
+        self._pending_n = 0
+        self._first_ts = 0.0
+        self._last_ts = 0.0
+        self._index: list[bytes] = []
+        self._tables: list[dict[str, int]] = [{} for _ in SESSION_STRINGS]
+
+    def __enter__(self) -> SessionFileWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _code(self, column: int, value: Any) -> int:
+        s = '' if value is None else str(value)
+        table = self._tables[column]
+        code = table.get(s)
+        if code is None:
+            code = table[s] = len(table)
+        return code
+
+    def append(self, sample: Sample) -> None:
+        data = sample.data
+        self._add(sample.ts, round(sample.lateness * 1000),
+                  [encode_tenths(getattr(sample, n)) for n in SESSION_NUMERIC],
+                  [self._code(i, data.get(k))
+                   for i, k in enumerate(SESSION_STRINGS)])
+
+    def append_row(self, row: Iterable[Any]) -> None:
+        """Строка в порядке ``SESSION_FIELDS`` (см. ``SessionStore.rows``)."""
+        values = list(row)
+        numeric = values[2:2 + _N_NUM]
+        strings = values[2 + _N_NUM:]
+        self._add(float(values[0]), int(values[1] or 0),
+                  [encode_tenths(None if v in (None, '') else float(v))
+                   for v in numeric],
+                  [self._code(i, v) for i, v in enumerate(strings)])
+
+    def _add(self, ts: float, late_ms: int, numeric: list[int],
+             strings: list[int]) -> None:
+        if self._f is None:
+            raise ValueError("SessionFileWriter is closed")
+        if self._pending_n == 0:
+            self._first_ts = ts
+        self._last_ts = ts
+        self._pending += RECORD.pack(ts, late_ms, *numeric, *strings)
+        self._pending_n += 1
+        self.records += 1
+        if self._pending_n >= self.block_records:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        f = self._f
+        if f is None or not self._pending_n:
+            return
+        payload = zlib.compress(bytes(self._pending), self.level)
+        self._index.append(INDEX_ENTRY.pack(
+            f.tell(), self._pending_n, len(payload),
+            self._first_ts, self._last_ts))
+        f.write(payload)
+        self._pending.clear()
+        self._pending_n = 0
+
+    def close(self) -> None:
+        f = self._f
+        if f is None:
+            return
+        try:
+            self._flush_block()
+            tables_offset = f.tell()
+            for table in self._tables:
+                f.write(_STR_COUNT.pack(len(table)))
+                for s in table:                 # порядок вставки = номер
+                    f.write(_pack_string(s))
+            index_offset = f.tell()
+            f.write(b''.join(self._index))
+            f.write(TRAILER.pack(tables_offset, index_offset,
+                                 len(self._index), END_MAGIC))
+        finally:
+            self._f = None
+            f.close()
+
+
+def write_session_file(path: str, rows: Iterable[Iterable[Any]], *,
+                       block_records: int = SESSION_FILE_BLOCK) -> int:
+    """Пишет строки ``SESSION_FIELDS`` (например ``SessionStore.rows()``
+    или CSV из ``core.recorder``) в ``.h4gs``; возвращает число записей."""
+    with SessionFileWriter(path, block_records=block_records) as w:
+        for row in rows:
+            w.append_row(row)
+    return w.records
+
+
+class SessionFile:
+    """Чтение ``.h4gs`` через ``mmap``: индекс и словарь — сразу, блоки —
+    только те, что попали в запрошенный диапазон времени.
+
+    Использование::
+
+        with SessionFile(path) as sf:
+            for row in sf.rows(start=t0, end=t0 + 3600):
+                ...
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:         # пустой файл
+                raise ValueError(f"Not a session file: {path}") from e
+        try:
+            self._load()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _load(self) -> None:
+        mm = self._mm
+        if len(mm) < HEADER.size + TRAILER.size:
+            raise ValueError(f"Not a session file: {self.path}")
+        magic, version, record_size = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a session file: {self.path}")
+        if version != SESSION_FILE_VERSION or record_size != RECORD.size:
+            raise ValueError(f"Unsupported session file version {version}")
+        tables_offset, index_offset, n_blocks, end = TRAILER.unpack_from(
+            mm, len(mm) - TRAILER.size)
+        if end != END_MAGIC:
+            raise ValueError(f"Session file not closed: {self.path}")
+
+        self.tables: list[list[str]] = []
+        pos = tables_offset
+        for _ in SESSION_STRINGS:
+            (count,) = _STR_COUNT.unpack_from(mm, pos)
+            pos += _STR_COUNT.size
+            values = []
+            for _ in range(count):
+                (n,) = _STR_LEN.unpack_from(mm, pos)
+                pos += _STR_LEN.size
+                values.append(mm[pos:pos + n].decode('utf-8'))
+                pos += n
+            self.tables.append(values)
+
+        self._blocks = [INDEX_ENTRY.unpack_from(mm, index_offset + i *
+                                                INDEX_ENTRY.size)
+                        for i in range(n_blocks)]
+        self._block_last = [b[4] for b in self._blocks]
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> SessionFile:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ---- Сведения ----
+
+    def __len__(self) -> int:
+        return sum(b[1] for b in self._blocks)
+
+    @property
+    def blocks(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def time_range(self) -> tuple[float, float] | None:
+        """(ts первой, ts последней записи) или None для пустого файла."""
+        if not self._blocks:
+            return None
+        return self._blocks[0][3], self._blocks[-1][4]
+
+    # ---- Чтение ----
+
+    def _block_records(self, i: int) -> Iterator[tuple[Any, ...]]:
+        offset, _, length, _, _ = self._blocks[i]
+        raw = zlib.decompress(self._mm[offset:offset + length])
+        return RECORD.iter_unpack(raw)
+
+    def _decode(self, rec: tuple[Any, ...]) -> tuple[Any, ...]:
+        tables = self.tables
+        return (rec[0], rec[1],
+                *[decode_tenths(c) for c in rec[2:2 + _N_NUM]],
+                *[tables[i][c] for i, c in enumerate(rec[2 + _N_NUM:])])
+
+    def rows(self, start: float | None = None,
+             end: float | None = None) -> Iterator[tuple[Any, ...]]:
+        """Строки ``SESSION_FIELDS`` с ``start <= ts <= end``.
+
+        Распаковываются только блоки, пересекающие диапазон.
+        """
+        first = (0 if start is None
+                 else bisect.bisect_left(self._block_last, start))
+        for i in range(first, len(self._blocks)):
+            if end is not None and self._blocks[i][3] > end:
+                break
+            for rec in self._block_records(i):
+                ts = rec[0]
+                if start is not None and ts < start:
+                    continue
+                if end is not None and ts > end:
+                    return
+                yield self._decode(rec)
+
+    def samples(self, start: float | None = None,
+                end: float | None = None) -> Iterator[Sample]:
+        """Воспроизведение: выборки для подписчиков ``Poller``/метрик."""
+        n_num = _N_NUM
+        for row in self.rows(start, end):
+            data: dict[str, Any] = {
+                k: v for k, v in zip(SESSION_NUMERIC, row[2:2 + n_num],
+                                     strict=True) if v is not None}
+            data.update((k, v) for k, v in zip(
+                SESSION_STRINGS, row[2 + n_num:], strict=True) if v != '')
+            yield Sample(row[0], data, lateness=row[1] / 1000)
+
+    def column(self, name: str, start: float | None = None,
+               end: float | None = None) -> list[Any]:
+        index = SESSION_FIELDS.index(name)
+        return [row[index] for row in self.rows(start, end)]
@@ -6,7 +6,9 @@
 """
 from __future__ import annotations
 
-from core.constants import SIGNAL_THRESHOLDS
+from collections.abc import Sequence
+
+from core.constants import DIRECTION_LOOKBACK, JITTER_WINDOW, SIGNAL_THRESHOLDS
 
 
 def evaluate_signal(param: str,
@@ -57,3 +59,26 @@ def calculate_overall_health(rsrp: float | None,
     if overall >= 35:
         return overall, "Средний сигнал — крутите антенну ({pct}%)", "#fdcb6e"
     return overall, "Слабый сигнал — ищите лучше ({pct}%)", "#d63031"
+
+
+def direction_delta(history: Sequence[float],
+                    lookback: int = DIRECTION_LOOKBACK) -> float | None:
+    """Среднее последних ``lookback`` значений минус среднее предыдущих.
+
+    Основа стрелки «лучше/хуже» при юстировке и сигнал для адаптивного
+    интервала опроса. None — истории ещё мало (нужно 2 × lookback).
+    """
+    if len(history) < lookback * 2:
+        return None
+    recent = history[-lookback:]
+    older = history[-lookback * 2:-lookback]
+    return sum(recent) / len(recent) - sum(older) / len(older)
+
+
+def jitter(values: Sequence[float],
+           window: int = JITTER_WINDOW) -> float | None:
+    """Размах (max − min) последних ``window`` значений; None — мало данных."""
+    if len(values) < window:
+        return None
+    recent = values[-window:]
+    return max(recent) - min(recent)
@@ -0,0 +1,79 @@
+"""
+Слой представления для панелей мониторинга: в тулкит уходят только
+изменившиеся свойства виджетов.
+
+``refresh_ui`` (Tk) и ``_update_ui`` (Kivy) на каждом тике заново
+форматируют и выставляют все подписи: вышка, статистика, SIM, зеркало
+Roof Mode, пики. Большая часть значений (PLMN, eNodeB, band,
+температура, трафик за месяц) между тиками не меняется, а каждый
+``config()`` в Tk — отдельный вызов Tcl. ``ViewModel`` помнит, что уже
+показано в каждом виджете, и передаёт тулкиту только отличающиеся
+свойства; если не изменилось ничего — вызова нет вовсе.
+
+Ключ — сам виджет (слабая ссылка): пересозданные при смене языка
+вкладки и заново открытое окно Roof Mode — новые виджеты, их первое
+обновление уходит целиком. Всё, что пишет в эти виджеты, должно идти
+через ``ViewModel``, иначе запомненное значение устареет; после записи
+в обход — ``forget(widget)``.
+
+Без зависимостей от UI; не потокобезопасен — живёт в главном потоке.
+"""
+from __future__ import annotations
+
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+_MISSING = object()
+
+
+class ViewModel:
+    """Последние показанные свойства виджетов и отправка только
+    изменений.
+
+    Использование::
+
+        view = ViewModel()
+        view.config(label, text="-75 dBm", fg='green')   # Tk
+        view.assign(kivy_label, text="-75", color=rgba)  # Kivy
+    """
+
+    def __init__(self) -> None:
+        self._shown: weakref.WeakKeyDictionary[Any, dict[str, Any]] = (
+            weakref.WeakKeyDictionary())
+        self.pushed = 0
+        self.skipped = 0
+
+    def push(self, widget: Any, apply: Callable[..., Any],
+             **props: Any) -> bool:
+        """Вызывает ``apply(**изменившиеся)``; True — если что-то ушло."""
+        shown = self._shown.get(widget)
+        if shown is None:
+            shown = self._shown[widget] = {}
+        changed = {k: v for k, v in props.items()
+                   if shown.get(k, _MISSING) != v}
+        if not changed:
+            self.skipped += 1
+            return False
+        apply(**changed)
+        shown.update(changed)
+        self.pushed += 1
+        return True
+
+    def config(self, widget: Any, **props: Any) -> bool:
+        """Tk: ``widget.config(**изменившиеся)``."""
+        return self.push(widget, widget.config, **props)
+
+    def assign(self, widget: Any, **props: Any) -> bool:
+        """Kivy и прочие свойства-атрибуты: ``setattr`` изменившихся."""
+        def apply(**changed: Any) -> None:
+            for name, value in changed.items():
+                setattr(widget, name, value)
+        return self.push(widget, apply, **props)
+
+    def forget(self, widget: Any = None) -> None:
+        """Сбрасывает запомненное для ``widget`` (или для всех)."""
+        if widget is None:
+            self._shown.clear()
+        else:
+            self._shown.pop(widget, None)
@@ -0,0 +1,151 @@
+"""
+Hua4GMon headless — запись сигнала без UI, потоком JSON Lines.
+
+Назначение:
+    Долгая запись (ночь, несколько суток) на объекте: Raspberry Pi или
+    любой Linux-хост рядом с модемом, под systemd. Tk не импортируется
+    вовсе — нужен только huawei-lte-api.
+
+Запуск:
+    python headless.py --ip 192.168.8.1 --password admin
+    python headless.py --ip 192.168.8.1 --ip 192.168.3.1 --password admin \\
+        --interval 5 --output /var/log/hua4gmon.jsonl --fields rsrp,sinr,band
+
+Каждая выборка — одна строка JSON (см. ``core.headless``); события
+(ошибка, переподключение) — строки с полем ``"event"``. Лог программы
+идёт в stderr. Остановка — SIGINT/SIGTERM или ``--duration``.
+``--metrics-port 9108`` дополнительно отдаёт ``/metrics`` для Prometheus.
+
+Пример юнита systemd::
+
+    [Service]
+    ExecStart=/usr/bin/python3 /opt/hua4gmon/headless.py \\
+        --ip 192.168.8.1 --password-env HUA4GMON_PASSWORD \\
+        --output /var/log/hua4gmon.jsonl
+    Environment=HUA4GMON_PASSWORD=...
+    Restart=on-failure
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import logging
+import os
+import signal
+import sys
+import threading
+
+import requests
+from huawei_lte_api.Client import Client
+from huawei_lte_api.Connection import Connection
+from requests.adapters import HTTPAdapter
+
+from core import (
+    CAPABILITIES_FILE,
+    CapabilityCache,
+    Fleet,
+    JsonLinesWriter,
+    MetricsServer,
+    MonitorMetrics,
+    RouterTarget,
+    fast_client_factory,
+    is_valid_ip,
+    run_headless,
+)
+
+__version__ = "1.3"
+APP_NAME = "Hua4GMon"
+
+logger = logging.getLogger(APP_NAME)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description=f"{APP_NAME} — запись сигнала LTE Huawei без UI "
+                    "(JSON Lines).")
+    p.add_argument('--ip', action='append', default=None,
+                   help='IP роутера; можно указать несколько раз '
+                        '(по умолчанию 192.168.8.1)')
+    p.add_argument('--password', default='', help='Пароль роутера(ов)')
+    p.add_argument('--password-env', default=None, metavar='VAR',
+                   help='Взять пароль из переменной окружения '
+                        '(не светится в списке процессов)')
+    p.add_argument('--interval', type=float, default=1.0,
+                   help='Интервал опроса, с (по умолчанию 1.0)')
+    p.add_argument('--output', '-o', default='-',
+                   help='Файл для дозаписи JSON Lines (по умолчанию stdout)')
+    p.add_argument('--fields', default=None,
+                   help='Только эти поля, через запятую (rsrp,sinr,band)')
+    p.add_argument('--duration', type=float, default=None,
+                   help='Остановиться через столько секунд')
+    p.add_argument('--cache-dir', default=None,
+                   help='Папка для кеша возможностей роутера')
+    p.add_argument('--metrics-port', type=int, default=None,
+                   help='Отдавать /metrics (Prometheus) на этом порту')
+    p.add_argument('--metrics-host', default='127.0.0.1',
+                   help='Адрес для /metrics (по умолчанию 127.0.0.1)')
+    p.add_argument('--stock-client', action='store_true',
+                   help='Стандартный клиент huawei_lte_api вместо '
+                        'быстрого разбора signal/трафика')
+    p.add_argument('--verbose', '-v', action='store_true',
+                   help='Подробный лог в stderr')
+    p.add_argument('--version', action='version',
+                   version=f'{APP_NAME} {__version__}')
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        stream=sys.stderr)
+    ips = args.ip or ['192.168.8.1']
+    bad = [ip for ip in ips if not is_valid_ip(ip)]
+    if bad:
+        logger.error("Invalid router IP: %s", ", ".join(bad))
+        return 2
+    password = (os.environ.get(args.password_env, '')
+                if args.password_env else args.password)
+    fields = ([f.strip() for f in args.fields.split(',') if f.strip()]
+              if args.fields else None)
+
+    http = requests.Session()
+    # По пулу keep-alive на каждый роутер, иначе urllib3 будет их вытеснять.
+    adapter = HTTPAdapter(pool_connections=len(ips))
+    http.mount('http://', adapter)
+    fleet = Fleet(
+        [RouterTarget(ip, f"http://{ip}", password) for ip in ips],
+        connection_cls=Connection,
+        client_cls=Client if args.stock_client else fast_client_factory(Client),
+        http_session=http, interval=args.interval, history=1,
+        capability_cache=CapabilityCache(
+            os.path.join(args.cache_dir, CAPABILITIES_FILE)
+            if args.cache_dir else None))
+
+    server = None
+    if args.metrics_port is not None:
+        metrics = MonitorMetrics()
+        metrics.bind_fleet(fleet)
+        server = MetricsServer(metrics.render, args.metrics_host,
+                               args.metrics_port)
+        server.start()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    with contextlib.ExitStack() as stack:
+        out = (sys.stdout if args.output == '-' else stack.enter_context(
+            open(args.output, 'a', encoding='utf-8')))
+        run_headless(fleet, JsonLinesWriter(out, fields),
+                     duration=args.duration, stop_event=stop)
+    if server is not None:
+        server.stop()
+    http.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
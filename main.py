@@ -9,6 +9,8 @@ Hua4GMon — Huawei 4G Monitor (portable, single-file).
 Особенности этой версии:
     * Полностью portable: НИЧЕГО не сохраняется на диск
       (нет config.ini, нет паролей в файлах, нет логов на диск).
+      Исключение — только по явному флагу --cache-dir (кеш того,
+      какие запросы не поддерживает модель роутера).
     * Один исполняемый файл.
     * График построен на голом tk.Canvas — нет matplotlib (~30 МБ
       экономии в .exe, быстрее запуск).
@@ -36,17 +38,20 @@ from __future__ import annotations
 
 import argparse
 import contextlib
-import csv
 import datetime
 import logging
+import os
+import sqlite3
 import sys
 import threading
 import time
 import tkinter as tk
 import webbrowser
+from collections import deque
 from tkinter import filedialog, messagebox, ttk
 from typing import Any
 
+import requests
 from huawei_lte_api.Client import Client
 from huawei_lte_api.Connection import Connection
 
@@ -55,12 +60,13 @@ from huawei_lte_api.Connection import Connection
 # Никакой Tk-зависимости в core/ нет: модули можно импортировать
 # из любого Python-окружения, включая python-for-android.
 from core import (
+    ANTENNA_GETTERS,
     ANTENNA_MODES,
     BANDS,
+    CAPABILITIES_FILE,
     CONTROL_HOSTS_NEUTRAL,
     DIRECTION_LOOKBACK,
     GRAPH_HISTORY,
-    JITTER_WINDOW,
     LANGUAGES,
     LTEBAND_AUTO_ALL,
     NETBAND_AUTO_MASK,
@@ -68,30 +74,49 @@ from core import (
     NETMODE_LTE_ONLY,
     PARAM_RANGES,
     PLMN_MAP,
-    RECONNECT_DELAY_INITIAL,
-    RECONNECT_DELAY_MAX,
-    SESSION_LOG_MAX,
+    SESSION_FILE_SUFFIX,
+    STATUS_ERROR,
+    STATUS_RECONNECTED,
+    STATUS_RECONNECTING,
+    UI_BACKLOG,
     WHITELIST_HOSTS_RU,
+    AdaptiveInterval,
+    AsyncRunner,
+    CapabilityCache,
+    DeviceCapabilities,
+    MetricsServer,
+    MinMaxDecimator,
+    MonitorMetrics,
+    Poller,
+    RingBuffer,
+    RouterSession,
+    Sample,
+    SessionDatabase,
+    SessionRecorder,
+    SessionStore,
+    ViewModel,
     analyze_whitelist_results,
     bands_from_mask,
     calculate_overall_health,
     current_language,
+    direction_delta,
     earfcn_to_band,  # noqa: F401  (доступно для отладки/расширений)
     evaluate_signal,
-    extract_number,
-    first_present,
+    fast_client_factory,
     format_band_label,
     format_bytes_mb,
     format_mimo,
     format_modulation,
     format_rate_mbps,
     is_valid_ip,
+    jitter,
     parse_antenna_response,
     parse_antenna_value,
-    parse_cell_id,
+    probe_first,
     set_language,
     t,
     tcp_reachable,
+    write_session_file,
 )
 
 try:
@@ -130,40 +155,65 @@ class CanvasGraph(tk.Canvas):
       * настраиваемый диапазон оси Y и подпись;
       * сглаженное добавление точек с авто-обрезкой истории;
       * маркер последнего значения с числовой подписью.
+
+    Элементы холста создаются один раз (retained mode): заголовок, сетка
+    и подписи перестраиваются только при ресайзе и ``configure_axes``, а
+    новая точка лишь обновляет ``coords()`` линии и маркера — без
+    удаления и создания элементов Tk на каждом тике.
+
+    История длиннее ширины графика в пикселях рисуется огибающей min/max
+    по столбцам (``core.MinMaxDecimator``): число вершин не растёт с
+    историей, а короткие провалы не теряются.
     """
 
     PADDING = (45, 12, 18, 22)   # left, right, top, bottom (px)
+    COLOR = '#0078D7'
 
     def __init__(self, parent: tk.Misc, history: int = 100, **kw):
         super().__init__(parent, bg='white', highlightthickness=1,
                          highlightbackground='#cccccc', **kw)
         self.history = history
-        self.values: list[float] = []
+        self.values = RingBuffer(history)
         self.y_min = -120.0
         self.y_max = -50.0
         self.unit = "dBm"
         self.title = "RSRP"
-        self.bind("<Configure>", lambda e: self._redraw())
+        # Размер, под который построена статика; None — не построена.
+        self._size: tuple[int, int] | None = None
+        self._line = self._marker = self._value_text = 0
+        # Огибающая min/max — только если история шире графика.
+        self._lod: MinMaxDecimator | None = None
+        self.bind("<Configure>", self._on_configure)
 
     def configure_axes(self, y_min: float, y_max: float,
                        unit: str, title: str) -> None:
         self.y_min, self.y_max = float(y_min), float(y_max)
         self.unit, self.title = unit, title
         self.values.clear()
-        self._redraw()
+        self._rebuild()
 
     def push(self, val: float) -> None:
-        self.values.append(float(val))
-        if len(self.values) > self.history:
-            self.values.pop(0)
-        self._redraw()
+        self.values.append(val)
+        self._update()
+
+    def extend(self, vals: list[float]) -> None:
+        """Несколько точек разом — одна перерисовка."""
+        if vals:
+            self.values.extend(vals)
+            self._update()
 
     def clear(self) -> None:
         self.values.clear()
-        self._redraw()
+        self._update()
 
-    def _redraw(self) -> None:
+    def _on_configure(self, event: tk.Event) -> None:
+        if (event.width, event.height) != self._size:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Статика (заголовок, сетка, подписи) и пустые линия/маркер."""
         self.delete("all")
+        self._size = None
         w, h = self.winfo_width(), self.winfo_height()
         if w < 80 or h < 50:
             return
@@ -191,28 +241,58 @@ class CanvasGraph(tk.Canvas):
                          text=t("последние {n} точек").format(n=self.history),
                          font=("", 8), fill='#888')
 
+        # Линия, маркер и подпись последнего значения — дальше только
+        # coords()/itemconfigure() в _update().
+        self._line = self.create_line(0, 0, 0, 0, fill=self.COLOR, width=2,
+                                      state='hidden')
+        self._marker = self.create_oval(0, 0, 0, 0, fill=self.COLOR,
+                                        outline='', state='hidden')
+        self._value_text = self.create_text(
+            w - pr - 5, pt + 4, anchor='ne', text='',
+            font=("Segoe UI", 9, "bold"), fill=self.COLOR)
+        self._size = (w, h)
+        self._lod = (MinMaxDecimator(self.history, plot_w)
+                     if self.history > plot_w else None)
+        self._update()
+
+    def _update(self) -> None:
+        """Новая точка: пересчёт координат линии и сдвиг маркера."""
+        if self._size is None:
+            return
         if not self.values:
+            self.itemconfigure(self._line, state='hidden')
+            self.itemconfigure(self._marker, state='hidden')
+            self.itemconfigure(self._value_text, text='')
             return
-
-        # Точки
+        w, h = self._size
+        pl, pr, pt, pb = self.PADDING
+        plot_w, plot_h = w - pl - pr, h - pt - pb
         span = max(self.history - 1, 1)
         rng = max(self.y_max - self.y_min, 1e-9)
+        y_min, y_max, base = self.y_min, self.y_max, h - pb
+        x_step, y_scale = plot_w / span, plot_h / rng
+        if self._lod is not None:
+            self._lod.sync(self.values)
+            series = self._lod.points()
+        else:
+            series = enumerate(self.values)
         pts: list[float] = []
-        for i, v in enumerate(self.values):
-            x = pl + plot_w * i / span
-            v_cl = max(self.y_min, min(self.y_max, v))
-            y = (h - pb) - plot_h * (v_cl - self.y_min) / rng
-            pts.extend([x, y])
+        for i, v in series:
+            v_cl = max(y_min, min(y_max, v))
+            pts.append(pl + x_step * i)
+            pts.append(base - y_scale * (v_cl - y_min))
 
         if len(pts) >= 4:
-            self.create_line(*pts, fill='#0078D7', width=2)
+            self.coords(self._line, pts)
+            self.itemconfigure(self._line, state='normal')
+        else:
+            self.itemconfigure(self._line, state='hidden')
         # Маркер последнего значения
         lx, ly = pts[-2], pts[-1]
-        self.create_oval(lx - 3, ly - 3, lx + 3, ly + 3,
-                         fill='#0078D7', outline='')
-        self.create_text(w - pr - 5, pt + 4, anchor='ne',
-                         text=f"{self.values[-1]:g} {self.unit}",
-                         font=("Segoe UI", 9, "bold"), fill='#0078D7')
+        self.coords(self._marker, lx - 3, ly - 3, lx + 3, ly + 3)
+        self.itemconfigure(self._marker, state='normal')
+        self.itemconfigure(self._value_text,
+                           text=f"{self.values[-1]:g} {self.unit}")
 
 
 # =========================================================
@@ -221,23 +301,65 @@ class CanvasGraph(tk.Canvas):
 
 class Hua4GMon:
     def __init__(self, root: tk.Tk, default_ip: str = "192.168.8.1",
-                 default_password: str = ""):
+                 default_password: str = "", cache_dir: str | None = None,
+                 metrics_port: int | None = None,
+                 record_dir: str | None = None,
+                 record_db: str | None = None):
         self.root = root
         self.root.title(f"{APP_NAME} v{__version__}")
         self.root.geometry("900x720")
         self.root.minsize(820, 650)
 
         # ---- Thread sync primitives ----
-        self._stop_event = threading.Event()
         self._data_lock = threading.Lock()
-        self.monitor_thread: threading.Thread | None = None
         self._interval_seconds: float = 1.0
 
+        # Один цикл asyncio на все фоновые задачи (I/O роутера, проверки,
+        # звук); on_done задач приходит в главный поток через root.after.
+        self.aio = AsyncRunner(post=lambda fn: self.root.after(0, fn))
+        self.aio.start()
+
         # ---- Connection state ----
         self.connected = False
         self.is_monitoring = False
-        self.client: Client | None = None
-        self.last_data: dict[str, Any] = {}
+        # Фоновый опрос (поток, backoff, переподключение) — core.Poller
+        self.poller: Poller | None = None
+        # Один HTTP-сеанс (keep-alive) на всё время работы программы;
+        # вход/восстановление сессии роутера — core.RouterSession.
+        self.http = requests.Session()
+        self.router: RouterSession | None = None
+        # Что умеет модель роутера; на диск — только с --cache-dir.
+        self.capability_cache = CapabilityCache(
+            os.path.join(cache_dir, CAPABILITIES_FILE) if cache_dir else None)
+        self.capabilities: DeviceCapabilities | None = None
+        # Локальный /metrics для Prometheus — только с --metrics-port.
+        self.metrics: MonitorMetrics | None = None
+        self.metrics_server: MetricsServer | None = None
+        if metrics_port is not None:
+            self.metrics = MonitorMetrics()
+            self.metrics_server = MetricsServer(self.metrics.render,
+                                                port=metrics_port)
+            try:
+                self.metrics_server.start()
+            except OSError:
+                logger.warning("Cannot serve /metrics on port %d",
+                               metrics_port, exc_info=True)
+                self.metrics_server = None
+        # Запись сессии на диск по ходу работы — только с --record-dir
+        # (CSV) и/или --record-db (база SQLite всех сессий).
+        self.record_dir = record_dir
+        self.recorder: SessionRecorder | None = None
+        self.session_db: SessionDatabase | None = None
+        if record_db:
+            try:
+                self.session_db = SessionDatabase(record_db)
+            except sqlite3.Error:
+                logger.warning("Cannot open session database %s",
+                               record_db, exc_info=True)
+        self.last_sample: Sample | None = None
+        # Выборки с прошлой отрисовки: refresh_ui учитывает каждую (пики,
+        # история, график, лог сессии), а подписи рисует по последней.
+        self._pending: deque[Sample] = deque(maxlen=UI_BACKLOG)
         self.device_info: dict[str, Any] = {}
         self.start_time: float | None = None
         self.roof_win: tk.Toplevel | None = None
@@ -249,13 +371,16 @@ class Hua4GMon:
         # ---- Monitoring buffers ----
         self.dynamic_params = ['rsrp', 'rssi', 'sinr', 'rsrq']
         self.peak_values: dict[str, Any] = dict.fromkeys(self.dynamic_params, '-')
-        self.values: dict[str, list[float]] = {p: [] for p in self.dynamic_params}
-        self.session_log: list[dict[str, Any]] = []
-        self.dir_history: list[float] = []
+        self.values: dict[str, RingBuffer] = {
+            p: RingBuffer(GRAPH_HISTORY) for p in self.dynamic_params}
+        self.session_log = SessionStore()
+        self.dir_history = RingBuffer(DIRECTION_LOOKBACK * 2)
+        # Что уже показано в подписях: refresh_ui отдаёт в Tk только
+        # изменившиеся text/fg (каждый config() — вызов Tcl).
+        self.view = ViewModel()
 
         # ---- Reconnect ----
         self.auto_reconnect = True
-        self.reconnect_delay = RECONNECT_DELAY_INITIAL
 
         # Defaults from CLI
         self.default_ip = default_ip
@@ -355,6 +480,8 @@ class Hua4GMon:
             'pw': self.password_entry.get(),
             'interval': self.update_interval.get(),
             'reconnect': self.reconnect_var.get(),
+            'adaptive': self.adaptive_var.get(),
+            'fastpath': self.fastpath_var.get(),
             'ontop': self.ontop_var.get(),
             'graph_param': self.graph_param.get(),
             'antenna': self.antenna_var.get(),
@@ -377,6 +504,8 @@ class Hua4GMon:
         self.password_entry.insert(0, snap['pw'])
         self.update_interval.set(snap['interval'])
         self.reconnect_var.set(snap['reconnect'])
+        self.adaptive_var.set(snap['adaptive'])
+        self.fastpath_var.set(snap['fastpath'])
         self.graph_param.set(snap['graph_param'])
         # antenna_var хранит локализованную метку — переустановим по индексу
         ant_keys = list(ANTENNA_MODES.keys())
@@ -393,11 +522,11 @@ class Hua4GMon:
         # 5. Восстановить визуальное состояние подключения
         if self.connected:
             self.connect_button.config(text=t("⏹ Отключиться"))
-            self.status_label.config(text=t("Подключено"), foreground='green')
+            self._set_status(t("Подключено"), 'green')
             for key, lbl in self.sim_labels.items():
                 raw = self.device_info.get(key, '')
-                lbl.config(text=str(raw) if raw not in (None, '')
-                           else t("Нет данных"))
+                self.view.config(lbl, text=str(raw) if raw not in (None, '')
+                                 else t("Нет данных"))
 
     def build_settings_tab(self) -> None:
         frame = ttk.LabelFrame(self.tab_settings,
@@ -426,14 +555,27 @@ class Hua4GMon:
         self.update_interval.trace_add('write',
                                        lambda *a: self._sync_interval())
         ttk.Combobox(frame, textvariable=self.update_interval,
-                     values=['0.5', '1', '2', '5'],
+                     values=['0.25', '0.5', '1', '2', '5'],
                      state='readonly', width=5).grid(
             row=2, column=1, sticky='w', padx=5)
 
+        self.adaptive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text=t("Адаптивный опрос (чаще при юстировке, "
+                                      "интервал выше — потолок)"),
+                        variable=self.adaptive_var).grid(
+            row=3, column=0, columnspan=2, sticky='w', padx=5, pady=5)
+
         self.reconnect_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(frame, text=t("Авто-переподключение при обрыве"),
                         variable=self.reconnect_var).grid(
-            row=3, column=0, columnspan=2, sticky='w', padx=5, pady=5)
+            row=4, column=0, columnspan=2, sticky='w', padx=5, pady=5)
+
+        self.fastpath_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame, text=t("Быстрый разбор signal и трафика "
+                                      "(выкл. — стандартный клиент "
+                                      "huawei_lte_api)"),
+                        variable=self.fastpath_var).grid(
+            row=5, column=0, columnspan=2, sticky='w', padx=5, pady=5)
 
         btn_frame = ttk.Frame(self.tab_settings)
         btn_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -672,6 +814,7 @@ class Hua4GMon:
         fields = [
             ('uptime', 'Время сессии'),
             ('temp', 'Температура чипа'),
+            ('tick', 'Время опроса роутера'),
             ('dl_rate', 'Скорость (Download)'),
             ('ul_rate', 'Скорость (Upload)'),
             ('total_dl', 'Скачано за сессию'),
@@ -764,10 +907,11 @@ class Hua4GMon:
                     + list(self.wl_neut_labels.values())):
             lbl.config(text=lbl.cget('text').split(' — ')[0] + " — ⏳",
                        fg='gray')
-        threading.Thread(target=self._whitelist_task, daemon=True).start()
+        self.aio.run(self._whitelist_task, on_done=lambda res:
+                     self._render_whitelist_results(*res))
 
-    def _whitelist_task(self) -> None:
-        """В фоне опрашивает все цели и шлёт результаты обратно в UI."""
+    def _whitelist_task(self) -> tuple:
+        """В фоне опрашивает все цели; итог рисует главный поток."""
         white_results: list[tuple[str, bool]] = []
         white_details: dict[str, str] = {}
         for host, port in WHITELIST_HOSTS_RU:
@@ -782,9 +926,7 @@ class Hua4GMon:
             neutral_results.append((host, ok))
             neutral_details[host] = detail
 
-        self.root.after(0, lambda: self._render_whitelist_results(
-            white_results, white_details,
-            neutral_results, neutral_details))
+        return white_results, white_details, neutral_results, neutral_details
 
     def _render_whitelist_results(
             self,
@@ -821,11 +963,21 @@ class Hua4GMon:
             self._interval_seconds = float(self.update_interval.get())
         except (ValueError, tk.TclError):
             self._interval_seconds = 1.0
+        if self.poller is not None:
+            self.poller.interval = self._interval_seconds
+            if self.poller.adaptive is not None:
+                self.poller.adaptive.ceiling = self._interval_seconds
 
     # =====================================================
     # CONNECTION
     # =====================================================
 
+    @property
+    def client(self) -> Client | None:
+        """Текущий клиент опроса (после переподключения — новый)."""
+        poller = self.poller
+        return poller.client if poller is not None else None
+
     def start_connect(self) -> None:
         if self.connected:
             self.disconnect()
@@ -841,35 +993,68 @@ class Hua4GMon:
         self._cached_pw = self.password_entry.get()
         self._sync_interval()
         self.auto_reconnect = self.reconnect_var.get()
-        self.reconnect_delay = RECONNECT_DELAY_INITIAL
         self.connect_button.config(state='disabled')
-        self.status_label.config(text=t("Подключение..."), foreground='orange')
-        threading.Thread(target=self._connect_thread, daemon=True).start()
-
-    def _connect_thread(self) -> None:
-        url = f"http://{self._cached_ip}"
+        self._set_status(t("Подключение..."), 'orange')
+        # Переменные Tk читаем здесь, в главном потоке: _connect_task
+        # выполняется в пуле aio, а Tk не потокобезопасен.
+        self.aio.run(self._connect_task, self._interval_seconds,
+                     self.adaptive_var.get(), self.fastpath_var.get(),
+                     group='session')
+
+    def _login(self, fastpath: bool = True
+               ) -> tuple[Client, dict[str, Any]]:
+        """Вход + проверка (device.information()) на общем HTTP-сеансе."""
+        self.router = RouterSession(
+            f"http://{self._cached_ip}", 'admin', self._cached_pw,
+            connection_cls=Connection,
+            client_cls=fast_client_factory(Client) if fastpath else Client,
+            http_session=self.http, timeout=4)
+        client = self.router.open()
+        info = client.device.information() or {}    # верификация + кеш
+        return client, info
+
+    def _connect_task(self, interval: float, adaptive_on: bool,
+                      fastpath: bool) -> None:
         try:
-            client = Client(Connection(
-                url, username='admin',
-                password=self._cached_pw, timeout=4))
-            info = client.device.information() or {}    # верификация + кеш
-            self.client = client
+            client, info = self._login(fastpath)
             self.device_info = info
+            self.capabilities = self.capability_cache.for_device(info)
+            adaptive = (AdaptiveInterval(ceiling=interval)
+                        if adaptive_on else None)
+            poller = Poller(self.router.recover,
+                            interval=interval,
+                            auto_reconnect=self.auto_reconnect,
+                            adaptive=adaptive,
+                            capabilities=self.capabilities)
+            poller.subscribe(self._on_sample)
+            poller.subscribe_status(self._on_poller_status)
+            if self.metrics is not None:
+                self.metrics.bind_poller(self._cached_ip, poller)
+            if self.record_dir or self.session_db is not None:
+                try:
+                    recorder = SessionRecorder(
+                        self.record_dir,
+                        sinks=[self.session_db.sink(self._cached_ip)]
+                        if self.session_db is not None else [])
+                    recorder.start()
+                    poller.subscribe(recorder.record)
+                    self.recorder = recorder
+                except (OSError, sqlite3.Error):
+                    logger.warning("Cannot record session to %s",
+                                   self.record_dir, exc_info=True)
+            self.poller = poller
             self.connected = True
             self.is_monitoring = True
             self.start_time = time.time()
-            self._stop_event.clear()
             self.root.after(0, self._on_connected_success)
-            self.monitor_thread = threading.Thread(
-                target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
+            poller.start(client, runner=self.aio)
         except Exception as e:
             logger.exception("Connect failed")
             self.root.after(0, lambda err=str(e): self._on_connected_fail(err))
 
     def _on_connected_success(self) -> None:
         self.connect_button.config(state='normal', text=t("⏹ Отключиться"))
-        self.status_label.config(text=t("Подключено"), foreground='green')
+        self._set_status(t("Подключено"), 'green')
         self.notebook.select(self.tab_monitor)
         self.reset_graph()
         self.session_log.clear()
@@ -878,7 +1063,8 @@ class Hua4GMon:
         # Заполняем SIM/Device-лейблы из закешированного device.information()
         for key, lbl in self.sim_labels.items():
             raw = self.device_info.get(key, '')
-            lbl.config(text=str(raw) if raw not in (None, '') else t("Н/Д"))
+            self.view.config(lbl, text=str(raw) if raw not in (None, '')
+                             else t("Н/Д"))
         # Подтягиваем текущие Band Lock и антенну с модема в контролы.
         self.load_router_config()
 
@@ -891,38 +1077,30 @@ class Hua4GMon:
         модеме не затрагивается).
         """
         client = self.client
-        if client is None:
+        caps = self.capabilities
+        if client is None or caps is None:
             return
 
         def task():
             band_names = None
             antenna_code = None
+            if not caps.is_unsupported('net.net_mode'):
+                try:
+                    nm = client.net.net_mode() or {}
+                    caps.record('net.net_mode', True)
+                    band_names = bands_from_mask(nm.get('LTEBand'))
+                except Exception as e:
+                    caps.record_error('net.net_mode', e)
+                    logger.debug("net_mode() unavailable", exc_info=True)
             try:
-                nm = client.net.net_mode() or {}
-                band_names = bands_from_mask(nm.get('LTEBand'))
-            except Exception:
-                logger.debug("net_mode() unavailable", exc_info=True)
-            try:
-                for getter in ('get_antenna_settings', 'antenna_type',
-                               'antenna_status', 'antenna_set_type'):
-                    fn = getattr(client.device, getter, None)
-                    if fn is None:
-                        continue
-                    try:
-                        res = fn()
-                    except Exception:
-                        logger.debug("Antenna getter %s failed", getter,
-                                     exc_info=True)
-                        continue
-                    logger.info("Antenna %s -> %r", getter, res)
-                    antenna_code = parse_antenna_response(res)
-                    if antenna_code is not None:
-                        break
+                antenna_code = probe_first(caps, client, ANTENNA_GETTERS,
+                                           parse_antenna_response)
             except Exception:
                 logger.debug("antenna read failed", exc_info=True)
-            self.root.after(
-                0, lambda: self._apply_router_config(band_names, antenna_code))
-        threading.Thread(target=task, daemon=True).start()
+            return band_names, antenna_code
+        # Группа 'session': после disconnect() ответ в контролы не попадёт.
+        self.aio.run(task, group='session',
+                     on_done=lambda res: self._apply_router_config(*res))
 
     def _apply_router_config(self, band_names, antenna_code) -> None:
         """Подставляет прочитанные с модема настройки в контролы (main
@@ -938,139 +1116,115 @@ class Hua4GMon:
 
     def _on_connected_fail(self, error: str) -> None:
         self.connect_button.config(state='normal', text=t("🚀 Подключиться"))
-        self.status_label.config(text=t("Ошибка"), foreground='red')
+        self._set_status(t("Ошибка"), 'red')
         snippet = error if len(error) < 200 else error[:200] + "..."
         messagebox.showerror(
             t("Ошибка подключения"),
             t("Связь с роутером не удалась:\n\n{err}").format(err=snippet))
 
     def disconnect(self) -> None:
-        """Корректная остановка: сначала глушим поток, потом обнуляем клиент."""
+        """Корректная остановка: сначала глушим опрос, потом обнуляем клиент.
+
+        Опрос и задачи сессии отменяются сразу, без ожидания тика.
+        """
         was_connected = self.connected
         self.is_monitoring = False
         self.connected = False
         self.auto_reconnect = False
-        self._stop_event.set()
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            wait = self._interval_seconds + 2.0
-            self.monitor_thread.join(timeout=wait)
-        self.monitor_thread = None
-        if self.client is not None:
-            try:
-                self.client.user.logout()
-            except Exception:
-                logger.debug("Logout failed (ignored)", exc_info=True)
-            self.client = None
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
+        if self.recorder is not None:
+            self.recorder.stop()            # дописывает очередь + fsync
+            self.recorder = None
+        self.aio.cancel_group('session')
+        if self.router is not None:
+            self.router.close()             # logout; сокет остаётся
+            self.router = None
         self.device_info = {}
         self.connect_button.config(text=t("🚀 Подключиться"), state='normal')
         if was_connected:
-            self.status_label.config(text=t("Отключено"), foreground='red')
-            self.health_text_lbl.config(text=t("Подключитесь к роутеру"),
-                                        fg="gray")
-            self.health_progress.config(value=0)
-            self.dir_label.config(text="—", fg='gray')
-            self.dir_text.config(text=t("Нет данных"), fg='gray')
+            self._set_status(t("Отключено"), 'red')
+            self.view.config(self.health_text_lbl,
+                             text=t("Подключитесь к роутеру"), fg="gray")
+            self.view.config(self.health_progress, value=0)
+            self.view.config(self.dir_label, text="—", fg='gray')
+            self.view.config(self.dir_text, text=t("Нет данных"), fg='gray')
             for lbl in self.sim_labels.values():
-                lbl.config(text="-")
+                self.view.config(lbl, text="-")
 
     # =====================================================
-    # MONITOR LOOP (фоновый поток)
+    # MONITOR (события core.Poller из фонового потока)
     # =====================================================
 
-    def _monitor_loop(self) -> None:
-        tick = 0
-        month_cache: dict[str, Any] = {}
-        while not self._stop_event.is_set():
-            client = self.client
-            if client is None:
-                break
-            try:
-                sig = client.device.signal()
-                plmn = client.net.current_plmn()
-                status = client.monitoring.status()
-                traffic = client.monitoring.traffic_statistics()
-                # Месячная статистика меняется медленно и есть не на всех
-                # моделях — опрашиваем редко и молча игнорируем отсутствие.
-                if tick % 30 == 0:
-                    try:
-                        ms = client.monitoring.month_statistics()
-                        if ms:
-                            month_cache = ms
-                    except Exception:
-                        logger.debug("month_statistics unavailable",
-                                     exc_info=True)
-                tick += 1
-                data = {**(sig or {}), **(plmn or {}),
-                        **(status or {}), **(traffic or {}), **month_cache}
-                data['plmn'] = (plmn or {}).get(
-                    'Numeric', data.get('plmn', ''))
-
-                enodeb, sector = parse_cell_id(data.get('cell_id'))
-                if enodeb is not None:
-                    data['enodeb'] = enodeb
-                    data['sector'] = sector
-
-                band_str = str(data.get('band', ''))
-                data['aggregation'] = ("Активна"
-                                       if ("+" in band_str
-                                           or "CA" in band_str)
-                                       else "Нет (Single)")
-
-                with self._data_lock:
-                    self.last_data = data
-                self.root.after(0, self.refresh_ui)
-                # Удачный тик — сбрасываем backoff
-                self.reconnect_delay = RECONNECT_DELAY_INITIAL
-            except Exception as e:
-                logger.warning("Monitor tick failed: %s", e)
-                self.root.after(0, lambda: self.status_label.config(
-                    text=t("Таймаут API..."), foreground='orange'))
-                if self.auto_reconnect and not self._stop_event.is_set():
-                    self._try_reconnect()
-                else:
-                    break
-
-            if self._stop_event.wait(self._interval_seconds):
-                break
-
-    def _try_reconnect(self) -> None:
-        """Одна попытка переподключения с экспоненциальным backoff."""
-        if self._stop_event.is_set():
-            return
-        delay = min(self.reconnect_delay, RECONNECT_DELAY_MAX)
-        self.root.after(0, lambda d=delay: self.status_label.config(
-            text=t("Переподключение через {d:.0f}с...").format(d=d),
-            foreground='orange'))
-        if self._stop_event.wait(delay):
-            return
-        try:
-            new_client = Client(Connection(
-                f"http://{self._cached_ip}", username='admin',
-                password=self._cached_pw, timeout=4))
-            new_client.device.information()
-            self.client = new_client
-            self.reconnect_delay = RECONNECT_DELAY_INITIAL
-            self.root.after(0, lambda: self.status_label.config(
-                text=t("Подключено"), foreground='green'))
-        except Exception as e:
-            logger.warning("Reconnect failed: %s", e)
-            self.reconnect_delay = min(self.reconnect_delay * 2,
-                                       RECONNECT_DELAY_MAX)
+    def _on_sample(self, sample: Sample) -> None:
+        """Новый тик от Poller (поток опроса) — передаём в главный поток."""
+        with self._data_lock:
+            self.last_sample = sample
+            # Одна отрисовка на пачку: если очередь не пуста, refresh_ui
+            # уже запланирован и заберёт и эту выборку.
+            idle = not self._pending
+            self._pending.append(sample)
+        if idle:
+            self.root.after(0, self.refresh_ui)
+
+    def _on_poller_status(self, event: str, payload: Any) -> None:
+        """События Poller (поток опроса) → строка статуса в главном потоке."""
+        if event == STATUS_ERROR:
+            self.root.after(0, lambda: self._set_status(
+                t("Таймаут API..."), 'orange'))
+        elif event == STATUS_RECONNECTING:
+            self.root.after(0, lambda d=payload: self._set_status(
+                t("Переподключение через {d:.0f}с...").format(d=d),
+                'orange'))
+        elif event == STATUS_RECONNECTED:
+            self.root.after(0, lambda: self._set_status(
+                t("Подключено"), 'green'))
 
     # =====================================================
     # UI REFRESH (главный поток, через root.after)
     # =====================================================
 
-    def refresh_ui(self) -> None:
-        if not self.is_monitoring:
-            return
-        self.status_label.config(text=t("Подключено"), foreground='green')
+    def _set_status(self, text: str, color: str) -> None:
+        self.view.config(self.status_label, text=text, foreground=color)
+
+    def _record_sample(self, sample: Sample) -> None:
+        """Учёт одной выборки: пики, история, направление, лог сессии."""
+        for p in self.dynamic_params:
+            val = getattr(sample, p)
+            if val is None:
+                continue
+            if self.peak_values[p] == '-' or val > self.peak_values[p]:
+                self.peak_values[p] = val
+            self.values[p].append(val)
+        if sample.rsrp is not None:
+            self.dir_history.append(sample.rsrp)
+        # Лог сессии (в RAM по колонкам, для экспорта в CSV). Время —
+        # момент тика в потоке опроса, а не момент отрисовки.
+        self.session_log.append(sample)
 
+    def refresh_ui(self) -> None:
         with self._data_lock:
-            data = dict(self.last_data)
+            samples = list(self._pending)
+            self._pending.clear()
+        if not self.is_monitoring or not samples:
+            return
+        self._set_status(t("Подключено"), 'green')
+
+        # При адаптивном опросе (0.2 с) до отрисовки может прийти
+        # несколько выборок: в историю и лог идёт каждая, а подписи
+        # показывают последнюю.
+        for s in samples:
+            self._record_sample(s)
+        sample = samples[-1]
+        # Sample не меняется после публикации — читаем без копии.
+        data = sample.data
+        # Подписи — через ViewModel: в Tk уходят только изменившиеся
+        # text/fg, неизменные PLMN, band, трафик и т.п. не трогаются.
+        show = self.view.config
 
         current_vals: dict[str, float | None] = {
-            p: extract_number(data.get(p)) for p in self.dynamic_params
+            p: getattr(sample, p) for p in self.dynamic_params
         }
 
         for p in self.dynamic_params:
@@ -1078,43 +1232,33 @@ class Hua4GMon:
             if val_num is None:
                 continue
             status_text, color, _ = evaluate_signal(p, val_num)
-            self.lbl_vars[p]['val'].config(
-                text=f"{val_num:g} {self._unit(p)}", fg=color)
-            self.lbl_vars[p]['status'].config(
-                text=t(status_text).upper(), fg=color)
-            if (self.peak_values[p] == '-' or val_num > self.peak_values[p]):
-                self.peak_values[p] = val_num
-            self.lbl_vars[p]['peak'].config(
-                text=t("Пик: {v}").format(v=self.peak_values[p]))
-            self.values[p].append(val_num)
-            if len(self.values[p]) > GRAPH_HISTORY:
-                self.values[p].pop(0)
+            labels = self.lbl_vars[p]
+            show(labels['val'], text=f"{val_num:g} {self._unit(p)}",
+                 fg=color)
+            show(labels['status'], text=t(status_text).upper(), fg=color)
+            show(labels['peak'],
+                 text=t("Пик: {v}").format(v=self.peak_values[p]))
 
         # Индикатор направления (по RSRP)
         rsrp = current_vals.get('rsrp')
-        if rsrp is not None:
-            self.dir_history.append(rsrp)
-            if len(self.dir_history) > DIRECTION_LOOKBACK * 2:
-                self.dir_history.pop(0)
+        if any(s.rsrp is not None for s in samples):
             self._update_direction()
 
         # Здоровье связи — всегда обновляется. summary — шаблон-ключ с {pct}.
         score, summary, color = calculate_overall_health(
             rsrp, current_vals.get('sinr'))
-        self.health_progress.config(value=score)
-        self.health_text_lbl.config(text=t(summary).format(pct=score),
-                                    fg=color)
+        show(self.health_progress, value=score)
+        show(self.health_text_lbl, text=t(summary).format(pct=score),
+             fg=color)
 
         # Джиттер — всегда обновляется
-        if len(self.values['rsrp']) >= JITTER_WINDOW:
-            recent = self.values['rsrp'][-JITTER_WINDOW:]
-            jitter = max(recent) - min(recent)
-            jcol = ('green' if jitter < 3
-                    else 'orange' if jitter < 7 else 'red')
-            self.jitter_label.config(
-                text=t("Джиттер: {j:.1f} dB").format(
-                    j=jitter),
-                foreground=jcol)
+        spread = jitter(self.values['rsrp'])
+        if spread is not None:
+            jcol = ('green' if spread < 3
+                    else 'orange' if spread < 7 else 'red')
+            show(self.jitter_label,
+                 text=t("Джиттер: {j:.1f} dB").format(j=spread),
+                 foreground=jcol)
 
         # Аудио-помощник: частота зависит от близости к ПИКУ RSRP
         if HAS_WINSOUND and self.geiger_var.get() and rsrp is not None:
@@ -1123,15 +1267,14 @@ class Hua4GMon:
                 # 0..30 dB ниже пика → 2500..300 Гц (чем ближе к пику — выше)
                 delta = max(0.0, best - rsrp)
                 freq = max(300, min(2500, int(2500 - delta * 70)))
-                threading.Thread(target=winsound.Beep,
-                                 args=(freq, 80), daemon=True).start()
+                self.aio.run(winsound.Beep, freq, 80)
 
-        # График — толкаем последнее значение всегда
+        # График — все значения с прошлой отрисовки, одной перерисовкой
         if self.start_time is not None:
             param = self.graph_param.get()
-            val_now = current_vals.get(param)
-            if val_now is not None:
-                self.signal_graph.push(val_now)
+            self.signal_graph.extend(
+                [v for v in (getattr(s, param) for s in samples)
+                 if v is not None])
 
         # Зеркало в Roof Mode
         if self.roof_win is not None and self.roof_win.winfo_exists():
@@ -1139,23 +1282,23 @@ class Hua4GMon:
             s = current_vals.get('sinr')
             _, r_col, _ = evaluate_signal('rsrp', r)
             _, s_col, _ = evaluate_signal('sinr', s)
-            self.r_lbl_rsrp.config(
-                text=f"RSRP: {r if r is not None else '-'}", fg=r_col)
-            self.r_lbl_sinr.config(
-                text=f"SINR: {s if s is not None else '-'}", fg=s_col)
+            show(self.r_lbl_rsrp,
+                 text=f"RSRP: {r if r is not None else '-'}", fg=r_col)
+            show(self.r_lbl_sinr,
+                 text=f"SINR: {s if s is not None else '-'}", fg=s_col)
             arrow, color = self._direction_glyph()
-            self.r_dir.config(text=arrow, fg=color)
+            show(self.r_dir, text=arrow, fg=color)
             # Лаконичная сводка по вышке в углу
             enb = data.get('enodeb', '-')
             sec = data.get('sector', '-')
             band_short = format_band_label(
                 data.get('band'),
-                data.get('earfcn', data.get('Earfcn', '-')))
-            self.r_tower.config(
-                text=f"eNodeB: {enb}\nCell: {sec}\n{band_short}")
+                sample.earfcn if sample.earfcn is not None else '-')
+            show(self.r_tower,
+                 text=f"eNodeB: {enb}\nCell: {sec}\n{band_short}")
 
         # Информация о вышке
-        earfcn_raw = data.get('earfcn', data.get('Earfcn', '-'))
+        earfcn_raw = sample.earfcn if sample.earfcn is not None else '-'
         for key, lbl in self.tower_labels.items():
             if key == 'plmn':
                 val = str(data.get('plmn', '-'))
@@ -1177,75 +1320,59 @@ class Hua4GMon:
                        if ul_bw not in ('', '-', None) else dl_bw)
             else:
                 val = str(data.get(key, '-'))
-            lbl.config(text=val)
+            show(lbl, text=val)
 
         # Статистика
-        self.stat_labels['dl_rate'].config(
-            text=format_rate_mbps(data.get('CurrentDownloadRate', 0)))
-        self.stat_labels['ul_rate'].config(
-            text=format_rate_mbps(data.get('CurrentUploadRate', 0)))
-        self.stat_labels['total_dl'].config(
-            text=format_bytes_mb(data.get('TotalDownload', 0)))
-        self.stat_labels['total_ul'].config(
-            text=format_bytes_mb(data.get('TotalUpload', 0)))
-        up_sec = data.get('CurrentConnectTime',
-                          data.get('ConnectionTime', 0))
-        try:
-            up_sec_int = int(up_sec)
-            uptime_str = (str(datetime.timedelta(seconds=up_sec_int))
-                          if up_sec_int > 0 else "-")
-        except (TypeError, ValueError):
-            uptime_str = "-"
-        self.stat_labels['uptime'].config(text=uptime_str)
-        self.stat_labels['temp'].config(
-            text=str(data.get('Temperature', t('Н/Д'))))
+        stats = self.stat_labels
+        show(stats['dl_rate'], text=format_rate_mbps(sample.dl_rate or 0))
+        show(stats['ul_rate'], text=format_rate_mbps(sample.ul_rate or 0))
+        show(stats['total_dl'],
+             text=format_bytes_mb(data.get('TotalDownload', 0)))
+        show(stats['total_ul'],
+             text=format_bytes_mb(data.get('TotalUpload', 0)))
+        up_sec = int(sample.uptime or 0)
+        uptime_str = (str(datetime.timedelta(seconds=up_sec))
+                      if up_sec > 0 else "-")
+        show(stats['uptime'], text=uptime_str)
+        show(stats['temp'], text=str(data.get('Temperature', t('Н/Д'))))
+        tick_ms = round(sample.elapsed * 1000)
+        stale = sample.stale
+        if stale:
+            tick_text = t("{ms} мс (устарело: {names})").format(
+                ms=tick_ms, names=", ".join(stale))
+        else:
+            tick_text = t("{ms} мс").format(ms=tick_ms)
+        show(stats['tick'], text=tick_text)
         for p, lbl_key in (('rsrp', 'rsrp_min'), ('sinr', 'sinr_min')):
             vals = self.values[p]
             if vals:
-                self.stat_labels[lbl_key].config(
-                    text=f"{min(vals):g} / {max(vals):g} {self._unit(p)}")
+                show(stats[lbl_key],
+                     text=f"{vals.min():g} / {vals.max():g} {self._unit(p)}")
 
         # Доп. поля из signal()/month_statistics (могут отсутствовать на
         # части моделей — тогда показываем прочерк).
-        dl_mod = format_modulation(
-            first_present(data, ('dl_mcs', 'dlmcs', 'dlMcs')))
-        ul_mod = format_modulation(
-            first_present(data, ('ul_mcs', 'ulmcs', 'ulMcs')))
+        dl_mod = format_modulation(sample.dl_mcs)
+        ul_mod = format_modulation(sample.ul_mcs)
         mod_parts = []
         if dl_mod:
             mod_parts.append(f"DL {dl_mod}")
         if ul_mod:
             mod_parts.append(f"UL {ul_mod}")
-        self.stat_labels['mod'].config(
-            text=" / ".join(mod_parts) if mod_parts else "-")
-
-        txp = first_present(data, ('txpower', 'TxPower', 'tx_power'))
-        self.stat_labels['txpower'].config(
-            text=str(txp) if txp is not None else "-")
-        mimo = first_present(data, ('transmode', 'TransMode', 'mimo'))
-        self.stat_labels['mimo'].config(
-            text=format_mimo(mimo) if mimo is not None else "-")
-
-        m_dl = first_present(data, ('CurrentMonthDownload',))
-        m_ul = first_present(data, ('CurrentMonthUpload',))
+        show(stats['mod'], text=" / ".join(mod_parts) if mod_parts else "-")
+
+        txp = sample.txpower
+        show(stats['txpower'], text=str(txp) if txp is not None else "-")
+        mimo = sample.mimo
+        show(stats['mimo'],
+             text=format_mimo(mimo) if mimo is not None else "-")
+
+        m_dl, m_ul = sample.month_dl, sample.month_ul
         if m_dl is not None or m_ul is not None:
-            self.stat_labels['month_traffic'].config(
-                text=f"{format_bytes_mb(m_dl or 0)} / "
-                     f"{format_bytes_mb(m_ul or 0)}")
+            show(stats['month_traffic'],
+                 text=f"{format_bytes_mb(m_dl or 0)} / "
+                      f"{format_bytes_mb(m_ul or 0)}")
         else:
-            self.stat_labels['month_traffic'].config(text="-")
-
-        # Лог сессии (в RAM, для экспорта в CSV)
-        if len(self.session_log) < SESSION_LOG_MAX:
-            self.session_log.append({
-                'ts': datetime.datetime.now().isoformat(timespec='seconds'),
-                **{p: current_vals.get(p) for p in self.dynamic_params},
-                'plmn': data.get('plmn', ''),
-                'enodeb': data.get('enodeb', ''),
-                'sector': data.get('sector', ''),
-                'band': data.get('band', ''),
-                'pci': data.get('pci', ''),
-            })
+            show(stats['month_traffic'], text="-")
 
     def _update_direction(self) -> None:
         arrow, color = self._direction_glyph()
@@ -1255,15 +1382,13 @@ class Hua4GMon:
             "→": t("Сигнал стабилен — зафиксируйте антенну"),
             "—": t("Накапливаю данные..."),
         }.get(arrow, "")
-        self.dir_label.config(text=arrow, fg=color)
-        self.dir_text.config(text=text, fg=color)
+        self.view.config(self.dir_label, text=arrow, fg=color)
+        self.view.config(self.dir_text, text=text, fg=color)
 
     def _direction_glyph(self) -> tuple[str, str]:
-        if len(self.dir_history) < DIRECTION_LOOKBACK * 2:
+        delta = direction_delta(self.dir_history)
+        if delta is None:
             return "—", "gray"
-        recent = self.dir_history[-DIRECTION_LOOKBACK:]
-        older = self.dir_history[-DIRECTION_LOOKBACK * 2:-DIRECTION_LOOKBACK]
-        delta = (sum(recent) / len(recent)) - (sum(older) / len(older))
         if delta >= 1.0:
             return "↑", "#00b894"
         if delta <= -1.0:
@@ -1301,7 +1426,7 @@ class Hua4GMon:
                 self.root.after(0, lambda err=str(e): messagebox.showerror(
                     t("Ошибка"),
                     t("Роутер отклонил команду:\n{err}").format(err=err)))
-        threading.Thread(target=task, daemon=True).start()
+        self.aio.run(task)
 
     def reset_bands(self) -> None:
         if self.client is None:
@@ -1318,7 +1443,7 @@ class Hua4GMon:
                 logger.exception("Reset bands failed")
                 self.root.after(0, lambda err=str(e): messagebox.showerror(
                     t("Ошибка"), err))
-        threading.Thread(target=task, daemon=True).start()
+        self.aio.run(task)
 
     def apply_antenna(self) -> None:
         if self.client is None:
@@ -1359,7 +1484,7 @@ class Hua4GMon:
                 logger.exception("Set antenna failed")
                 self.root.after(0, lambda err=str(e): messagebox.showerror(
                     t("Ошибка"), err))
-        threading.Thread(target=task, daemon=True).start()
+        self.aio.run(task)
 
     def reboot_router(self) -> None:
         if self.client is None:
@@ -1388,7 +1513,7 @@ class Hua4GMon:
                 self.root.after(0, lambda err=str(e): messagebox.showerror(
                     t("Ошибка"),
                     t("Не удалось перезагрузить:\n{err}").format(err=err)))
-        threading.Thread(target=task, daemon=True).start()
+        self.aio.run(task)
 
     # =====================================================
     # EXTERNAL LOOKUPS
@@ -1396,8 +1521,10 @@ class Hua4GMon:
 
     def open_cellmapper(self) -> None:
         with self._data_lock:
-            plmn = str(self.last_data.get('plmn', ''))
-            enodeb = self.last_data.get('enodeb')
+            sample = self.last_sample
+        data = sample.data if sample is not None else {}
+        plmn = str(data.get('plmn', ''))
+        enodeb = data.get('enodeb')
         if len(plmn) < 5 or enodeb is None:
             messagebox.showwarning(
                 t("Внимание"),
@@ -1473,20 +1600,22 @@ class Hua4GMon:
         default = f"hua4gmon-{datetime.datetime.now():%Y%m%d-%H%M%S}.csv"
         path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV", "*.csv"), ("All", "*.*")],
+            filetypes=[("CSV", "*.csv"),
+                       (t("Сессия Hua4GMon"), f"*{SESSION_FILE_SUFFIX}"),
+                       ("All", "*.*")],
             initialfile=default)
         if not path:
             return
         try:
-            with open(path, 'w', newline='', encoding='utf-8') as f:
-                fields = list(self.session_log[0].keys())
-                w = csv.DictWriter(f, fieldnames=fields)
-                w.writeheader()
-                w.writerows(self.session_log)
+            if path.lower().endswith(SESSION_FILE_SUFFIX):
+                # Двоичный .h4gs: компактно, быстро читается по времени.
+                n = write_session_file(path, self.session_log.rows())
+            else:
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    n = self.session_log.write_csv(f)
             messagebox.showinfo(
                 t("Экспорт"),
-                t("Сохранено {n} записей в:\n{path}").format(
-                    n=len(self.session_log), path=path))
+                t("Сохранено {n} записей в:\n{path}").format(n=n, path=path))
         except OSError as e:
             messagebox.showerror(
                 t("Ошибка"),
@@ -1504,13 +1633,14 @@ class Hua4GMon:
             unit=self._unit(param), title=param.upper())
 
     def reset_graph(self, _event=None) -> None:
-        self.values = {p: [] for p in self.dynamic_params}
+        for vals in self.values.values():
+            vals.clear()
         self.setup_graph()
 
     def reset_peaks(self) -> None:
         self.peak_values = dict.fromkeys(self.dynamic_params, '-')
         for p in self.dynamic_params:
-            self.lbl_vars[p]['peak'].config(text=t("Пик: -"))
+            self.view.config(self.lbl_vars[p]['peak'], text=t("Пик: -"))
 
     @staticmethod
     def _unit(param: str) -> str:
@@ -1523,6 +1653,12 @@ class Hua4GMon:
     def on_closing(self) -> None:
         logger.info("Shutting down")
         self.disconnect()
+        self.aio.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.session_db is not None:
+            self.session_db.close()
+        self.http.close()
         self._close_roof()
         try:
             self.root.quit()
@@ -1542,6 +1678,17 @@ def parse_args() -> argparse.Namespace:
                    help='IP роутера (по умолчанию 192.168.8.1)')
     p.add_argument('--password', default='',
                    help='Пароль (если указан — автоподключение)')
+    p.add_argument('--cache-dir', default=None,
+                   help='Папка для кеша возможностей роутера '
+                        '(по умолчанию ничего не пишется на диск)')
+    p.add_argument('--metrics-port', type=int, default=None,
+                   help='Отдавать /metrics (Prometheus) на 127.0.0.1:PORT')
+    p.add_argument('--record-dir', default=None,
+                   help='Писать сессию на диск по ходу работы (CSV, '
+                        'переживает падение программы)')
+    p.add_argument('--record-db', default=None, metavar='FILE',
+                   help='Дописывать сессии в базу SQLite (запросы по '
+                        'сотам и band — core.SessionDatabase)')
     p.add_argument('--verbose', '-v', action='store_true',
                    help='Подробный лог в stderr')
     p.add_argument('--version', action='version',
@@ -1558,7 +1705,11 @@ def main() -> None:
     root = tk.Tk()
     app = Hua4GMon(root,
                    default_ip=args.ip,
-                   default_password=args.password)
+                   default_password=args.password,
+                   cache_dir=args.cache_dir,
+                   metrics_port=args.metrics_port,
+                   record_dir=args.record_dir,
+                   record_db=args.record_db)
     try:
         root.mainloop()
     except KeyboardInterrupt:
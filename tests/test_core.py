@@ -361,7 +361,13 @@ def test_core_does_not_pull_in_tkinter():
     # из других тестов или conftest — это нормально. Проверяем сами модули:
     import inspect
     for mod_name in ('core.constants', 'core.parsers',
-                     'core.signal_analysis', 'core.whitelist', 'core.i18n'):
+                     'core.signal_analysis', 'core.whitelist', 'core.i18n',
+                     'core.poller', 'core.schedule', 'core.connection',
+                     'core.fastpath', 'core.capabilities', 'core.breaker',
+                     'core.aio', 'core.fleet', 'core.headless',
+                     'core.metrics', 'core.recorder', 'core.ringbuffer',
+                     'core.session', 'core.sessiondb', 'core.sessionfile',
+                     'core.decimate', 'core.lru', 'core.viewmodel'):
         mod = sys.modules.get(mod_name)
         if mod is None:
             continue
@@ -594,3 +600,1779 @@ def test_antenna_response_parsed(res, code):
 ])
 def test_antenna_response_none(res):
     assert core.parse_antenna_response(res) is None
+
+
+# =========================================================
+# TickFetcher (параллельная выборка тика)
+# =========================================================
+
+def test_fetcher_runs_calls_in_parallel():
+    """Тик длится примерно как самый медленный запрос, а не их сумма."""
+    import time
+
+    def slow(v):
+        def fn():
+            time.sleep(0.1)
+            return v
+        return fn
+
+    fetcher = core.TickFetcher(max_workers=4)
+    try:
+        res = fetcher.fetch({n: slow(n) for n in ('a', 'b', 'c', 'd')})
+    finally:
+        fetcher.close()
+    assert res.results == {'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'}
+    assert not res.errors
+    assert res.elapsed < 0.35
+
+
+def test_poller_fetch_pool_fits_whole_schedule():
+    """Все endpoint тика стартуют сразу — очередь пула не съедает их
+    таймаут (первый тик, когда пора всем)."""
+    import time
+    poller = core.Poller(lambda: None)
+    n = len(poller.schedule.endpoints)
+    assert poller.fetch_workers >= n > core.FETCH_WORKERS
+
+    def slow():
+        time.sleep(0.1)
+        return 1
+    fetcher = core.TickFetcher(poller.fetch_workers)
+    try:
+        names = list(poller.schedule.endpoints)
+        res = fetcher.fetch(dict.fromkeys(names, slow),
+                            dict.fromkeys(names, 0.18), budget=0.18)
+    finally:
+        fetcher.close()
+    assert not res.late and len(res.results) == n
+
+
+def test_fetcher_collects_errors_and_raises_first_required():
+    def boom():
+        raise ValueError("signal down")
+
+    def boom2():
+        raise KeyError("status down")
+
+    fetcher = core.TickFetcher()
+    try:
+        res = fetcher.fetch({'signal': boom, 'status': boom2,
+                             'month': lambda: {'x': 1}})
+    finally:
+        fetcher.close()
+    assert res.results == {'month': {'x': 1}}
+    assert set(res.errors) == {'signal', 'status'}
+    with pytest.raises(ValueError):
+        res.raise_first(('signal', 'status'))
+    res.raise_first(('month',))       # необязательный — не бросает
+
+
+# =========================================================
+# Poller (общий движок опроса) — с фейковым клиентом
+# =========================================================
+
+class _FakeClient:
+    """Минимальный двойник huawei_lte_api.Client для тестов опроса."""
+
+    def __init__(self, fail_signal=0):
+        from types import SimpleNamespace
+        self.fail_signal = fail_signal
+        self.calls: dict[str, int] = {}
+        self.device = SimpleNamespace(signal=self._wrap('signal', self._signal))
+        self.net = SimpleNamespace(current_plmn=self._wrap(
+            'plmn', lambda: {'Numeric': '25001', 'FullName': 'MTS'}))
+        self.monitoring = SimpleNamespace(
+            status=self._wrap('status', lambda: {'Temperature': '40'}),
+            traffic_statistics=self._wrap(
+                'traffic', lambda: {'CurrentDownloadRate': '1000'}),
+            month_statistics=self._wrap(
+                'month', lambda: {'CurrentMonthDownload': '5'}))
+
+    def _wrap(self, name, fn):
+        def call():
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return fn()
+        return call
+
+    def _signal(self):
+        if self.fail_signal > 0:
+            self.fail_signal -= 1
+            raise ConnectionError("router went away")
+        return {'rsrp': '-85dBm', 'sinr': '12dB', 'cell_id': str(12345 * 256 + 7),
+                'band': '3'}
+
+
+def _collect(poller, n, timeout=3.0):
+    import threading
+    got = []
+    done = threading.Event()
+
+    def on_sample(s):
+        got.append(s)
+        if len(got) >= n:
+            done.set()
+    poller.subscribe(on_sample)
+    return got, done
+
+
+def test_merge_tick_derives_fields():
+    data = core.merge_tick({
+        'signal': {'cell_id': str(12345 * 256 + 7), 'band': 'B3+B7'},
+        'plmn': {'Numeric': '25002'},
+        'status': None, 'traffic': {'TotalUpload': '1'},
+        'month': {'CurrentMonthUpload': '9'},
+    })
+    assert data['plmn'] == '25002'
+    assert (data['enodeb'], data['sector']) == (12345, 7)
+    assert data['aggregation'] == "Активна"
+    assert data['CurrentMonthUpload'] == '9'
+
+
+def test_poller_publishes_samples():
+    client = _FakeClient()
+    poller = core.Poller(lambda: client, interval=0.01)
+    got, done = _collect(poller, 3)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    s = got[0]
+    assert isinstance(s, core.Sample)
+    assert s.data['plmn'] == '25001'
+    assert s.data['enodeb'] == 12345
+    assert s.data['CurrentMonthDownload'] == '5'
+    assert 'tick_ms' in s.data
+    assert not poller.is_running
+
+
+def test_poller_reconnects_after_failure(monkeypatch):
+    import core.poller as poller_mod
+    monkeypatch.setattr(poller_mod, "RECONNECT_DELAY_INITIAL", 0.01)
+    broken = _FakeClient(fail_signal=1)
+    fresh = _FakeClient()
+    events = []
+    poller = core.Poller(lambda: fresh, interval=0.01)
+    poller.subscribe_status(lambda ev, payload: events.append(ev))
+    got, done = _collect(poller, 1)
+    poller.start(broken)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert poller.client is fresh
+    assert events[:3] == [core.STATUS_ERROR, core.STATUS_RECONNECTING,
+                          core.STATUS_RECONNECTED]
+
+
+def test_poller_without_auto_reconnect_stops_on_error():
+    client = _FakeClient(fail_signal=1)
+    events = []
+    poller = core.Poller(lambda: client, interval=0.01, auto_reconnect=False)
+    poller.subscribe_status(lambda ev, payload: events.append(ev))
+    poller.start(client)
+    poller._thread.join(2.0)
+    assert events == [core.STATUS_ERROR, core.STATUS_STOPPED]
+
+
+# =========================================================
+# Schedule (расписание опроса по endpoint)
+# =========================================================
+
+def _names(eps):
+    return sorted(ep.name for ep in eps)
+
+
+def test_schedule_first_tick_polls_everything():
+    sched = core.Schedule()
+    assert _names(sched.due(0.0)) == sorted(e.name for e in core.DEFAULT_SCHEDULE)
+
+
+def test_schedule_tiers_endpoints_by_period():
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0),
+        core.Endpoint('plmn', 'net.current_plmn', 30.0),
+        core.Endpoint('info', 'device.information', None),
+    ])
+    for ep in sched.due(0.0):
+        sched.mark_polled(ep.name, 0.0)
+    assert _names(sched.due(1.0)) == ['signal']
+    assert _names(sched.due(29.8, slack=0.5)) == ['plmn', 'signal']
+    assert 'info' not in _names(sched.due(1000.0))    # только один раз
+    sched.reset()
+    assert _names(sched.due(1001.0)) == ['info', 'plmn', 'signal']
+
+
+def test_schedule_drops_stale_values():
+    sched = core.Schedule([core.Endpoint('month', 'x.y', 300.0, 60.0)])
+    sched.store('month', {'a': 1}, 0.0)
+    assert sched.fresh(59.0) == {'month': {'a': 1}}
+    assert sched.fresh(61.0) == {}
+
+
+def test_endpoint_resolve():
+    client = _FakeClient()
+    fn = core.Endpoint('traffic', 'monitoring.traffic_statistics').resolve(client)
+    assert fn() == {'CurrentDownloadRate': '1000'}
+
+
+def test_poller_polls_slow_endpoints_rarely():
+    client = _FakeClient()
+    poller = core.Poller(lambda: client, interval=0.01)
+    got, done = _collect(poller, 5)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert client.calls['signal'] >= 5
+    assert client.calls['plmn'] == 1
+    assert client.calls['month'] == 1
+    # Между опросами PLMN берётся из последнего известного значения
+    assert all(s.data['plmn'] == '25001' for s in got)
+
+
+# =========================================================
+# TickClock (тики по дедлайнам monotonic)
+# =========================================================
+
+class _FakeTime:
+    """Поддельные часы + Event, чьё ожидание просто двигает время."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.waits: list[float] = []
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, timeout):
+        self.waits.append(round(timeout, 6))
+        self.now += timeout
+        return False
+
+    def is_set(self):
+        return False
+
+
+def test_tick_clock_keeps_cadence_without_drift():
+    ft = _FakeTime()
+    clock = core.TickClock(1.0, clock=ft)
+    assert clock.wait(ft) is False          # первый тик — сразу
+    assert ft.waits == []
+    for _ in range(3):
+        ft.now += 0.3                       # «работа» тика
+        clock.wait(ft)
+    # Спим остаток периода, а не полный interval после работы
+    assert ft.waits == [0.7, 0.7, 0.7]
+    assert ft.now == pytest.approx(103.0)
+    assert clock.lateness == 0.0
+
+
+def test_tick_clock_skips_missed_ticks_and_records_lateness():
+    ft = _FakeTime()
+    clock = core.TickClock(1.0, clock=ft)
+    clock.wait(ft)                          # дедлайн 100
+    ft.now += 3.4                           # тик завис на 3.4 с
+    clock.wait(ft)
+    assert ft.waits == []                   # не спим, но и не догоняем пачкой
+    assert clock.skipped == 2               # дедлайны 101 и 102 отброшены
+    assert clock.lateness == pytest.approx(0.4)
+    clock.wait(ft)                          # следующий — по сетке, 104
+    assert ft.now == pytest.approx(104.0)
+
+
+def test_poller_reports_tick_lateness():
+    client = _FakeClient()
+    poller = core.Poller(lambda: client, interval=0.01)
+    got, done = _collect(poller, 3)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert all(s.lateness >= 0.0 for s in got)
+    assert poller.clock is not None
+
+
+# =========================================================
+# Адаптивный интервал опроса
+# =========================================================
+
+def test_direction_delta_and_jitter_helpers():
+    assert core.direction_delta([-90, -90]) is None         # мало истории
+    assert core.direction_delta([-90, -90, -90, -88, -88, -88]) == 2.0
+    assert core.jitter([-90, -91]) is None
+    assert core.jitter([-90, -95, -91, -92, -93]) == 5
+
+
+def test_adaptive_interval_backs_off_on_steady_link():
+    ai = core.AdaptiveInterval(ceiling=1.0, floor=0.2, steady_ticks=2)
+    seen = [ai.update(-90.0, 12.0) for _ in range(8)]
+    # 0.2 → 0.4 → 0.8 → 1.0 (потолок), по удвоению каждые 2 тика
+    assert seen == [0.2, 0.4, 0.4, 0.8, 0.8, 1.0, 1.0, 1.0]
+
+
+def test_adaptive_interval_speeds_up_when_signal_moves():
+    ai = core.AdaptiveInterval(ceiling=5.0, floor=0.2, steady_ticks=1)
+    for _ in range(6):
+        ai.update(-90.0, 12.0)
+    assert ai.interval == 5.0
+    assert ai.update(-84.0, 12.0) == 0.2            # скачок RSRP на 6 dB
+    ai.reset()
+    for _ in range(6):
+        ai.update(-90.0, 12.0)
+    assert ai.update(-90.0, 4.0) == 0.2             # скачок только по SINR
+
+
+def test_poller_uses_adaptive_period():
+    client = _FakeClient()
+    adaptive = core.AdaptiveInterval(ceiling=0.05, floor=0.01, steady_ticks=1)
+    poller = core.Poller(lambda: client, interval=10.0, adaptive=adaptive)
+    got, done = _collect(poller, 4)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)       # interval=10 с не используется
+    finally:
+        poller.stop(timeout=2.0)
+    assert poller.period == 0.05    # стабильный фейковый сигнал → потолок
+
+
+# =========================================================
+# RouterSession (ленивое восстановление сессии)
+# =========================================================
+
+class _ApiError(Exception):
+    """Как исключения huawei_lte_api: код ошибки в ``.code``."""
+
+    def __init__(self, code):
+        super().__init__(f"{code}: error")
+        self.code = code
+
+
+class _FakeConnection:
+    opened = 0
+
+    def __init__(self, url, username=None, password=None, timeout=None,
+                 requests_session=None):
+        type(self).opened += 1
+        self.http = requests_session
+        self.reloads = 0
+        self.fail_probe: list = []      # что бросит следующий signal()
+        self.logins = 0
+        self.logouts = 0
+
+    def reload(self):
+        self.reloads += 1
+
+
+class _FakeRouterClient:
+    def __init__(self, conn):
+        from types import SimpleNamespace
+        self.conn = conn
+        self.device = SimpleNamespace(signal=self._signal)
+        self.user = SimpleNamespace(login=self._login, logout=self._logout)
+
+    def _signal(self):
+        if self.conn.fail_probe:
+            raise self.conn.fail_probe.pop(0)
+        return {'rsrp': '-90dBm'}
+
+    def _login(self, username, password):
+        self.conn.logins += 1
+
+    def _logout(self):
+        self.conn.logouts += 1
+
+
+def _router():
+    _FakeConnection.opened = 0
+    http = object()
+    router = core.RouterSession(
+        "http://192.168.8.1", 'admin', 'pw', connection_cls=_FakeConnection,
+        client_cls=_FakeRouterClient, http_session=http, timeout=4)
+    return router, http
+
+
+def test_router_session_recovers_with_single_probe():
+    router, http = _router()
+    client = router.open()
+    assert client.conn.http is http            # общий keep-alive сеанс
+    assert router.recover() is client
+    assert _FakeConnection.opened == 1
+    assert client.conn.reloads == 0 and client.conn.logins == 0
+
+
+def test_router_session_refreshes_csrf_only_when_rejected():
+    router, _ = _router()
+    client = router.open()
+    client.conn.fail_probe = [_ApiError(core.ERROR_CSRF)]
+    assert router.recover() is client
+    assert client.conn.reloads == 1 and client.conn.logins == 0
+    assert _FakeConnection.opened == 1
+
+
+def test_router_session_relogs_in_lazily():
+    router, _ = _router()
+    client = router.open()
+    client.conn.fail_probe = [_ApiError(core.ERROR_LOGIN_REQUIRED)]
+    assert router.recover() is client
+    assert client.conn.logins == 1
+    assert router.recoveries['login'] == 1
+    assert _FakeConnection.opened == 1
+
+
+def test_router_session_network_error_propagates():
+    router, _ = _router()
+    client = router.open()
+    client.conn.fail_probe = [TimeoutError("timed out")]
+    with pytest.raises(TimeoutError):
+        router.recover()
+    assert _FakeConnection.opened == 1
+
+
+def test_router_session_close_logs_out_once():
+    router, _ = _router()
+    conn = router.open().conn
+    router.close()
+    router.close()
+    assert conn.logouts == 1
+    assert router.client is None
+
+
+def test_error_code():
+    assert core.error_code(_ApiError(125003)) == 125003
+    assert core.error_code(_ApiError('100003')) == 100003
+    assert core.error_code(ValueError()) is None
+
+
+# =========================================================
+# Fast path (разбор XML горячих endpoint)
+# =========================================================
+
+_SIGNAL_XML = (b'<?xml version="1.0" encoding="UTF-8"?>\n<response>'
+               b'<pci>287</pci><cell_id>0x1A2B03</cell_id>'
+               b'<rsrp>-95dBm</rsrp><rsrq>-11.5dB</rsrq><rssi>&gt;=-51dBm</rssi>'
+               b'<sinr>12dB</sinr><band>3</band><txpower></txpower></response>')
+
+
+def test_parse_flat_response_types_signal_fields():
+    conv = dict.fromkeys(core.fastpath.SIGNAL_FLOAT_FIELDS, core.extract_number)
+    data = core.parse_flat_response(_SIGNAL_XML, conv)
+    assert data['rsrp'] == -95.0 and data['rsrq'] == -11.5
+    assert data['sinr'] == 12.0
+    assert data['rssi'] is None             # '>=-51dBm' — не число
+    assert data['pci'] == '287' and data['band'] == '3'   # строки как были
+    assert data['txpower'] is None
+    enodeb, sector = core.parse_cell_id(data['cell_id'])
+    assert enodeb is not None
+
+
+def test_parse_flat_response_raises_api_errors():
+    with pytest.raises(core.RouterApiError) as ei:
+        core.parse_flat_response(
+            b'<error><code>125002</code><message></message></error>', {})
+    assert core.error_code(ei.value) == core.ERROR_CSRF
+    with pytest.raises(core.RouterApiError) as ei:
+        core.parse_flat_response(
+            b'<error><code>100002</code><message></message></error>', {})
+    assert ei.value.code == core.ERROR_NOT_SUPPORTED
+    assert core.parse_flat_response(
+        b'{"response": {"CurrentDownloadRate": "125000"}}',
+        {'CurrentDownloadRate': int}) == {'CurrentDownloadRate': 125000}
+
+
+@pytest.mark.parametrize('body', [
+    b'', b'  \n', b'<html><body>login</body></html>',
+    b'<response><rsrp>-95dBm</rsrp>',           # оборван
+    b'{"response": ', b'<?xml version="1.0"?>'])
+def test_parse_flat_response_bad_body_is_transport_error(body):
+    with pytest.raises(core.BadResponseError) as ei:
+        core.parse_flat_response(body, {})
+    assert core.error_code(ei.value) is None    # не «не поддерживается»
+    assert isinstance(ei.value, OSError)
+
+
+class _FakeHttp:
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        from types import SimpleNamespace
+        self.requests.append((url, headers))
+        body = self.bodies.pop(0)
+        status, body = body if isinstance(body, tuple) else (200, body)
+        return SimpleNamespace(status_code=status, content=body)
+
+
+def _fast_conn(http):
+    from types import SimpleNamespace
+    conn = SimpleNamespace(url="http://192.168.8.1/", timeout=4,
+                           requests_session=http,
+                           request_verification_tokens=['tok'], reloads=0)
+    conn.reload = lambda: setattr(conn, 'reloads', conn.reloads + 1)
+    return conn
+
+
+def test_fast_reader_http_error_is_transport_error():
+    http = _FakeHttp([(500, b'<response></response>'),
+                      (503, b'<html>busy</html>')])
+    reader = core.FastReader(_fast_conn(http))
+    with pytest.raises(core.BadResponseError) as ei:
+        reader.traffic_statistics()
+    assert ei.value.status == 500 and core.error_code(ei.value) is None
+    with pytest.raises(core.BadResponseError):
+        reader.signal()
+
+
+def test_fast_client_reuses_session_and_token():
+    from types import SimpleNamespace
+    http = _FakeHttp([
+        b'<error><code>125002</code></error>',
+        b'<response><CurrentDownloadRate>125000</CurrentDownloadRate>'
+        b'<TotalDownload>1048576</TotalDownload></response>',
+    ])
+    conn = _fast_conn(http)
+    full = SimpleNamespace(
+        device=SimpleNamespace(information=lambda: {'DeviceName': 'B535'}),
+        monitoring=SimpleNamespace(status=lambda: {}), net='net')
+    client = core.fast_client_factory(lambda c: full)(conn)
+    traffic = client.monitoring.traffic_statistics()
+    assert traffic == {'CurrentDownloadRate': 125000, 'TotalDownload': 1048576}
+    assert conn.reloads == 1                # CSRF перечитан и запрос повторён
+    url, headers = http.requests[-1]
+    assert url == "http://192.168.8.1/api/monitoring/traffic-statistics"
+    assert headers == {'__RequestVerificationToken': 'tok'}
+    # Остальное — прозрачно к полному клиенту
+    assert client.device.information() == {'DeviceName': 'B535'}
+    assert client.net == 'net'
+
+
+# =========================================================
+# Capabilities (негативный кеш по модели/прошивке)
+# =========================================================
+
+_B535 = {'DeviceName': 'B535-232', 'HardwareVersion': 'WL1B535M',
+         'SoftwareVersion': '11.0.5.1(H192SP1C983)'}
+
+
+def test_capability_cache_persists_per_model(tmp_path):
+    path = tmp_path / "caps" / core.CAPABILITIES_FILE
+    caps = core.CapabilityCache(path).for_device(_B535)
+    assert caps.supports('monitoring.month_statistics') is None
+    unsupported = _ApiError(core.ERROR_NOT_SUPPORTED)
+    assert not caps.record_error('monitoring.month_statistics', unsupported)
+    assert caps.supports('monitoring.month_statistics') is None
+    assert caps.record_error('monitoring.month_statistics', unsupported)
+    assert not caps.record_error('net.net_mode', TimeoutError())  # сеть — нет
+    # Новый процесс — тот же результат с диска
+    again = core.CapabilityCache(path)
+    assert again.for_device(_B535).is_unsupported('monitoring.month_statistics')
+    assert again.for_device(_B535).supports('net.net_mode') is None
+    # Другая прошивка — проверяем заново
+    other = again.for_device({**_B535, 'SoftwareVersion': '12.0'})
+    assert other.supports('monitoring.month_statistics') is None
+
+
+def test_capability_cache_in_memory_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    caps = core.CapabilityCache().for_device(_B535)
+    caps.record('device.antenna_type', True)
+    assert caps.supports('device.antenna_type') is True
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_probe_first_skips_unsupported_and_remembers_winner():
+    from types import SimpleNamespace
+    calls = []
+
+    def getter(name, result):
+        def fn():
+            calls.append(name)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return fn
+
+    client = SimpleNamespace(device=SimpleNamespace(
+        get_antenna_settings=getter('a', _ApiError(core.ERROR_NOT_SUPPORTED)),
+        antenna_type=getter('b', {'antenna_type': 'x'}),      # не разобрать
+        antenna_status=getter('c', {'antennasettype': '1'})))
+    caps = core.CapabilityCache().for_device(_B535)
+    parse = core.parse_antenna_response
+    assert core.probe_first(caps, client, core.ANTENNA_GETTERS, parse) == 1
+    assert calls == ['a', 'b', 'c']     # antenna_set_type нет в клиенте
+    calls.clear()
+    assert core.probe_first(caps, client, core.ANTENNA_GETTERS, parse) == 1
+    assert calls == ['c']               # рабочий — первым, «нет» — пропущен
+
+
+def test_poller_stops_polling_unsupported_endpoint():
+    client = _FakeClient()
+    month_calls = []
+
+    def no_month():
+        month_calls.append(1)
+        raise _ApiError(core.ERROR_NOT_SUPPORTED)
+    client.monitoring.month_statistics = no_month
+    caps = core.CapabilityCache().for_device(_B535)
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0, required=True),
+        core.Endpoint('month', 'monitoring.month_statistics', 0.0)])
+    poller = core.Poller(lambda: client, interval=0.01, schedule=sched,
+                         capabilities=caps)
+    got, done = _collect(poller, 3)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert caps.is_unsupported('monitoring.month_statistics')
+    # период 0, но спросили только до подтверждения
+    assert len(month_calls) == core.capabilities.UNSUPPORTED_CONFIRMATIONS
+
+
+def test_capability_needs_repeated_answer_and_expires(tmp_path):
+    import json
+    now = [1000.0]
+    path = tmp_path / core.CAPABILITIES_FILE
+    cache = core.CapabilityCache(path, ttl=60.0, clock=lambda: now[0])
+    caps = cache.for_device(_B535)
+    unsupported = _ApiError(core.ERROR_NOT_SUPPORTED)
+    assert not caps.record_error('device.antenna_type', unsupported)
+    caps.record('device.antenna_type', True)        # удачный — сброс счёта
+    assert not caps.record_error('device.antenna_type', unsupported)
+    assert caps.record_error('device.antenna_type', unsupported)
+    assert caps.is_unsupported('device.antenna_type')
+    now[0] += 61.0                                  # TTL вышел — пробуем
+    assert caps.supports('device.antenna_type') is None
+    # Старый формат файла (bool без времени) — «нет» считается просроченным
+    path.write_text(json.dumps({caps.key: {'device.antenna_type': False,
+                                           'device.signal': True}}))
+    old = core.CapabilityCache(path).for_device(_B535)
+    assert old.supports('device.antenna_type') is None
+    assert old.supports('device.signal') is True
+
+
+def test_poller_transient_bad_response_does_not_mark_unsupported():
+    client = _FakeClient()
+    # Два сбойных ответа подряд — столько же, сколько нужно 100002
+    bodies = [b'', b'<html>busy</html>',
+              b'<response><CurrentDownloadRate>1</CurrentDownloadRate>'
+              b'</response>']
+    http = _FakeHttp(bodies + [bodies[-1]] * 50)
+    conn = _fast_conn(http)
+    client.monitoring.traffic_statistics = (
+        core.FastReader(conn).traffic_statistics)
+    caps = core.CapabilityCache().for_device(_B535)
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0, required=True),
+        core.Endpoint('traffic', 'monitoring.traffic_statistics', 0.0)])
+    poller = core.Poller(lambda: client, interval=0.01, schedule=sched,
+                         capabilities=caps)
+    got, done = _collect(poller, 6)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert caps.supports('monitoring.traffic_statistics') is True
+    assert any(s.dl_rate is not None for s in got)
+
+
+# =========================================================
+# Таймауты endpoint и бюджет тика
+# =========================================================
+
+def test_fetcher_marks_late_endpoints_without_waiting():
+    import threading
+    import time
+    release = threading.Event()
+    fetcher = core.TickFetcher()
+    try:
+        started = time.monotonic()
+        res = fetcher.fetch({'signal': lambda: 1,
+                             'traffic': lambda: release.wait(5.0)},
+                            {'signal': None, 'traffic': 1.0}, budget=0.1)
+        assert time.monotonic() - started < 0.5     # бюджет, а не 1 с / 5 с
+        assert res.results == {'signal': 1}
+        assert res.late == ['traffic'] and not res.errors
+        assert res.inflight == []
+        # Пока прошлый запрос висит, endpoint не отправляется повторно
+        res = fetcher.fetch({'traffic': lambda: 2}, {'traffic': 1.0})
+        assert res.late == ['traffic'] and res.results == {}
+        assert res.inflight == ['traffic']
+        release.set()
+        time.sleep(0.05)
+        res = fetcher.fetch({'traffic': lambda: 2}, {'traffic': 1.0})
+        assert res.results == {'traffic': 2}
+    finally:
+        release.set()
+        fetcher.close()
+
+
+def test_fetcher_own_timeout_error_is_an_error_not_late():
+    def boom():
+        raise TimeoutError("read timed out")
+    fetcher = core.TickFetcher()
+    try:
+        res = fetcher.fetch({'traffic': boom}, {'traffic': 1.0})
+    finally:
+        fetcher.close()
+    assert 'traffic' in res.errors and res.late == []
+
+
+def test_poller_reuses_last_value_of_late_endpoint():
+    import threading
+    client = _FakeClient()
+    slow = threading.Event()
+    calls = []
+
+    def traffic():
+        calls.append(1)
+        if len(calls) > 1:
+            slow.wait(5.0)              # со второго раза роутер «тупит»
+        return {'CurrentDownloadRate': str(len(calls))}
+    client.monitoring.traffic_statistics = traffic
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0, required=True),
+        core.Endpoint('traffic', 'monitoring.traffic_statistics', 0.0, 10.0,
+                      required=True, timeout=0.05)])
+    poller = core.Poller(lambda: client, interval=0.01, schedule=sched)
+    got, done = _collect(poller, 4)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        slow.set()
+        poller.stop(timeout=2.0)
+    assert got[0].stale == ()
+    assert got[-1].stale == ('traffic',)
+    assert got[-1].data['stale'] == ['traffic']
+    assert got[-1].data['CurrentDownloadRate'] == '1'    # прошлое значение
+
+
+# =========================================================
+# Circuit breaker по endpoint
+# =========================================================
+
+def test_circuit_breaker_opens_and_probes_half_open():
+    cb = core.CircuitBreaker('status', threshold=2, cooldown=10.0,
+                             max_cooldown=25.0)
+    assert cb.allow(0.0)
+    cb.failure(0.0)
+    assert cb.state == core.CLOSED
+    cb.failure(1.0)
+    assert cb.state == core.OPEN and not cb.allow(5.0)
+    assert cb.allow(11.0) and cb.state == core.HALF_OPEN    # одна проба
+    cb.failure(11.0)                                         # не вышло
+    assert cb.state == core.OPEN and cb.cooldown == 20.0
+    assert not cb.allow(30.0) and cb.allow(31.0)
+    cb.failure(31.0)
+    assert cb.cooldown == 25.0                               # потолок
+    assert cb.allow(56.0)
+    cb.success()
+    assert cb.state == core.CLOSED and cb.cooldown == 10.0
+    assert cb.trips == 3
+
+
+def test_poller_charges_breaker_once_per_hung_request():
+    import threading
+    client = _FakeClient()
+    release = threading.Event()
+    calls = []
+
+    def hung_status():
+        calls.append(1)
+        release.wait(5.0)
+        return {}
+    client.monitoring.status = hung_status
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0, required=True),
+        core.Endpoint('status', 'monitoring.status', 0.0, timeout=0.02)])
+    poller = core.Poller(lambda: client, interval=0.01, schedule=sched)
+    got, done = _collect(poller, 8)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        release.set()
+        poller.stop(timeout=2.0)
+    assert len(calls) == 1                          # висит — не переспрашиваем
+    assert sum('status' in s.stale for s in got) >= 2
+    assert poller.breakers['status'].state == core.CLOSED
+
+
+def test_poller_optional_failure_does_not_reconnect():
+    client = _FakeClient()
+    status_calls = []
+
+    def bad_status():
+        status_calls.append(1)
+        raise RuntimeError("boom")
+    client.monitoring.status = bad_status
+    connects = []
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0, required=True),
+        core.Endpoint('status', 'monitoring.status', 0.0)])
+    poller = core.Poller(lambda: connects.append(1) or client,
+                         interval=0.01, schedule=sched)
+    got, done = _collect(poller, 8)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert connects == []                                   # сессия цела
+    assert len(status_calls) == core.BREAKER_THRESHOLD      # дальше — пауза
+    assert poller.breakers['status'].state == core.OPEN
+    assert poller.breakers['signal'].state == core.CLOSED
+
+
+def test_poller_reconnects_on_session_error_from_any_endpoint(monkeypatch):
+    monkeypatch.setattr(core.poller, 'RECONNECT_DELAY_INITIAL', 0.01)
+    client = _FakeClient()
+    failed = []
+
+    def status():
+        if not failed:
+            failed.append(1)
+            raise _ApiError(core.ERROR_LOGIN_REQUIRED)
+        return {'Temperature': '40'}
+    client.monitoring.status = status
+    connects = []
+    sched = core.Schedule([
+        core.Endpoint('signal', 'device.signal', 0.0, required=True),
+        core.Endpoint('status', 'monitoring.status', 0.0)])
+    poller = core.Poller(lambda: connects.append(1) or client,
+                         interval=0.01, schedule=sched)
+    events = []
+    poller.subscribe_status(lambda ev, p: events.append(ev))
+    got, done = _collect(poller, 2)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    assert connects == [1]
+    assert core.STATUS_RECONNECTED in events
+
+
+# =========================================================
+# Цикл asyncio для фоновых задач (core.aio)
+# =========================================================
+
+def test_tick_clock_advance_and_arrive():
+    now = [0.0]
+    clock = core.TickClock(1.0, clock=lambda: now[0])
+    assert clock.advance() == 0.0                 # первый тик — сразу
+    now[0] = 0.25
+    assert clock.advance() == 0.75
+    now[0] = 1.1
+    clock.arrive()
+    assert abs(clock.lateness - 0.1) < 1e-9
+    now[0] = 4.5                                  # пропустили два тика
+    assert clock.advance() == 0.0
+    assert clock.skipped == 2
+
+
+def test_async_runner_delivers_results_through_post():
+    import pytest
+    posted, results, errors = [], [], []
+    runner = core.AsyncRunner(post=posted.append)
+    runner.start()
+    try:
+        fut = runner.run(lambda a, b: a + b, 2, 3, on_done=results.append)
+        assert fut.result(timeout=2.0) == 5
+        fut = runner.run(lambda: 1 / 0, on_error=errors.append)
+        with pytest.raises(ZeroDivisionError):
+            fut.result(timeout=2.0)
+    finally:
+        runner.stop()
+    # Колбэки не вызываются в потоке цикла — их получает post().
+    assert results == [] and errors == [] and len(posted) == 2
+    for call in posted:
+        call()
+    assert results == [5]
+    assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+    assert not runner.is_running
+
+
+def test_async_runner_cancel_group_drops_late_results():
+    import threading
+    runner = core.AsyncRunner(max_workers=1)
+    runner.start()
+    release = threading.Event()
+    delivered = []
+    try:
+        busy = runner.run(release.wait, 2.0, group='session',
+                          on_done=delivered.append)
+        queued = runner.run(lambda: 'late', group='session',
+                            on_done=delivered.append)
+        assert runner.cancel_group('session') == 2
+        release.set()
+        assert busy.cancelled() and queued.cancelled()
+        # Другие группы не затронуты
+        assert runner.run(lambda: 'ok').result(timeout=2.0) == 'ok'
+    finally:
+        runner.stop()
+    assert delivered == []
+
+
+def test_async_runner_rejects_work_when_stopped():
+    import pytest
+    runner = core.AsyncRunner()
+    with pytest.raises(RuntimeError):
+        runner.run(lambda: None)
+
+
+def test_async_tick_fetcher_marks_slow_endpoint_late():
+    import asyncio
+    import threading
+    release = threading.Event()
+
+    async def main():
+        fetcher = core.AsyncTickFetcher()
+        calls = {'signal': lambda: {'rsrp': '-90'},
+                 'status': lambda: release.wait(2.0)}
+        res = await fetcher.fetch(calls, {'status': 0.05}, budget=1.0)
+        again = await fetcher.fetch(calls, {'status': 0.05}, budget=1.0)
+        release.set()
+        return res, again
+    res, again = asyncio.run(main())
+    assert res.results == {'signal': {'rsrp': '-90'}}
+    assert res.late == ['status']
+    assert again.late == ['status']           # ещё в полёте — не дублируем
+
+
+def test_poller_on_async_runner_stops_immediately():
+    import time
+    client = _FakeClient()
+    runner = core.AsyncRunner()
+    runner.start()
+    events = []
+    poller = core.Poller(lambda: client, interval=30.0)
+    poller.subscribe_status(lambda ev, p: events.append(ev))
+    got, done = _collect(poller, 1)
+    try:
+        poller.start(client, runner=runner)
+        assert done.wait(3.0)                 # первый тик — сразу
+        assert poller.is_running
+        started = time.monotonic()
+        poller.stop()                          # посреди 30-секундной паузы
+        assert time.monotonic() - started < 0.5
+        deadline = time.monotonic() + 2.0
+        while core.STATUS_STOPPED not in events and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        runner.stop()
+    assert core.STATUS_STOPPED in events
+    assert not poller.is_running
+    assert got[0].data['rsrp'] == '-85dBm'
+
+
+def test_poller_on_async_runner_reconnects(monkeypatch):
+    monkeypatch.setattr(core.poller, 'RECONNECT_DELAY_INITIAL', 0.01)
+    client = _FakeClient(fail_signal=1)
+    connects = []
+    runner = core.AsyncRunner()
+    runner.start()
+    poller = core.Poller(lambda: connects.append(1) or client,
+                         interval=0.01)
+    got, done = _collect(poller, 2)
+    try:
+        poller.start(client, runner=runner)
+        assert done.wait(3.0)
+    finally:
+        poller.stop()
+        runner.stop()
+    assert connects == [1]
+
+
+# =========================================================
+# Несколько роутеров в одном процессе (core.fleet)
+# =========================================================
+
+def _fleet_classes(down=()):
+    """Фабрики Connection/Client для парка; роутеры из ``down`` не
+    отвечают на вход."""
+    from types import SimpleNamespace
+    logouts = []
+
+    def connection_cls(url, **kw):
+        if url in down:
+            raise ConnectionError(f"{url} unreachable")
+        return SimpleNamespace(url=url, **kw)
+
+    def client_cls(conn):
+        client = _FakeClient()
+        client.device.information = lambda: {'DeviceName': conn.url}
+        client.user = SimpleNamespace(logout=lambda: logouts.append(conn.url))
+        return client
+    return connection_cls, client_cls, logouts
+
+
+def test_fleet_polls_devices_with_bounded_history():
+    import threading
+    conn_cls, client_cls, logouts = _fleet_classes()
+    http = object()
+    fleet = core.Fleet(
+        [core.RouterTarget('e3372', 'http://192.168.8.1', 'pw'),
+         core.RouterTarget('b535', 'http://192.168.3.1', 'pw')],
+        connection_cls=conn_cls, client_cls=client_cls, http_session=http,
+        interval=0.01, history=3)
+    seen: dict[str, int] = {}
+    enough = threading.Event()
+
+    def on_sample(name, sample):
+        seen[name] = seen.get(name, 0) + 1
+        if len(seen) == 2 and min(seen.values()) >= 5:
+            enough.set()
+    fleet.subscribe(on_sample)
+    fleet.start()
+    try:
+        assert enough.wait(3.0)
+    finally:
+        fleet.stop()
+    for name, dev in fleet.devices.items():
+        assert len(dev.samples) == 3                    # память ограничена
+        assert dev.router.http_session is http          # общий пул
+        assert dev.info == {'DeviceName': dev.target.url}, name
+        assert not dev.poller.is_running
+    assert sorted(logouts) == ['http://192.168.3.1', 'http://192.168.8.1']
+    assert set(fleet.latest()) == {'e3372', 'b535'}
+    assert not fleet.runner.is_running                  # свой runner остановлен
+
+
+def test_fleet_unreachable_router_does_not_block_others(monkeypatch):
+    import threading
+    monkeypatch.setattr(core.fleet, 'RECONNECT_DELAY_INITIAL', 0.01)
+    conn_cls, client_cls, _ = _fleet_classes(down={'http://10.0.0.9'})
+    runner = core.AsyncRunner()
+    runner.start()
+    fleet = core.Fleet(
+        [core.RouterTarget('dead', 'http://10.0.0.9'),
+         core.RouterTarget('live', 'http://192.168.8.1')],
+        connection_cls=conn_cls, client_cls=client_cls, runner=runner,
+        interval=0.01)
+    events = []
+    live = threading.Event()
+    fleet.subscribe_status(lambda name, ev, p: events.append((name, ev)))
+    fleet.subscribe(lambda name, s: name == 'live' and live.set())
+    fleet.start()
+    try:
+        assert live.wait(3.0)
+    finally:
+        fleet.stop()
+        assert runner.is_running                        # чужой — не трогаем
+        runner.stop()
+    assert ('live', core.STATUS_CONNECTED) in events
+    assert ('dead', core.STATUS_ERROR) in events
+    assert isinstance(fleet.devices['dead'].last_error, ConnectionError)
+    assert fleet.devices['dead'].latest is None
+
+
+def test_fleet_thread_count_does_not_grow_with_devices(monkeypatch):
+    import threading
+    import time
+    from types import SimpleNamespace
+    monkeypatch.setattr(core.fleet, 'FLEET_WORKERS', 4)
+
+    class SlowClient(_FakeClient):
+        def _wrap(self, name, fn):
+            def call():
+                time.sleep(0.02)            # все запросы тика в полёте разом
+                return fn()
+            return call
+
+    def client_cls(conn):
+        client = SlowClient()
+        client.device.information = lambda: {'DeviceName': conn.url}
+        client.user = SimpleNamespace(logout=lambda: None)
+        return client
+
+    def peak_threads(devices):
+        fleet = core.Fleet(
+            [core.RouterTarget(f'r{i}', f'http://10.0.0.{i}')
+             for i in range(devices)],
+            connection_cls=lambda url, **kw: SimpleNamespace(url=url),
+            client_cls=client_cls, interval=0.05)
+        seen: dict[str, int] = {}
+        peak = [0]
+        enough = threading.Event()
+
+        def on_sample(name, sample):
+            seen[name] = seen.get(name, 0) + 1
+            peak[0] = max(peak[0], threading.active_count())
+            if len(seen) == devices and min(seen.values()) >= 3:
+                enough.set()
+        fleet.subscribe(on_sample)
+        base = threading.active_count()
+        fleet.start()
+        try:
+            assert enough.wait(5.0)
+        finally:
+            fleet.stop()
+        assert fleet.fetch_pool is None                 # закрыт в stop()
+        return peak[0] - base
+
+    # Поток цикла + пул runner + общий пул запросов — сколько бы ни было
+    # устройств (раньше у каждого опроса был свой пул на 5 потоков).
+    for devices in (2, 12):
+        assert peak_threads(devices) <= 1 + 4 + 4
+
+
+def test_fleet_rejects_duplicate_names():
+    import pytest
+    conn_cls, client_cls, _ = _fleet_classes()
+    with pytest.raises(ValueError):
+        core.Fleet([core.RouterTarget('a', 'http://1.1.1.1'),
+                    core.RouterTarget('a', 'http://2.2.2.2')],
+                   connection_cls=conn_cls, client_cls=client_cls)
+
+
+# =========================================================
+# Headless-режим: JSON Lines (core.headless, headless.py)
+# =========================================================
+
+def test_sample_record_selects_fields():
+    sample = core.Sample(1760000000.12345, {'rsrp': -85.0, 'sinr': 12.0,
+                                            'band': '3', 'stale': []},
+                         lateness=0.0042)
+    rec = core.sample_record(sample, 'b535', fields=('rsrp', 'band', 'nope'))
+    assert rec == {'ts': 1760000000.123, 'device': 'b535', 'rsrp': -85.0,
+                   'band': '3', 'late_ms': 4}
+    assert core.sample_record(sample)['stale'] == []
+
+
+def test_json_lines_writer_one_object_per_line():
+    import io
+    import json
+    out = io.StringIO()
+    writer = core.JsonLinesWriter(out)
+    writer.write('e3372', core.Sample(1.0, {'rsrp': -90.0, 'plmn': 'МТС'}))
+    writer.write_event('e3372', core.STATUS_RECONNECTING, 4.0)
+    writer.write_event('e3372', core.STATUS_CONNECTED,
+                       {'DeviceName': 'E3372', 'Imei': '86000'})
+    lines = out.getvalue().splitlines()
+    assert writer.lines == 3 and len(lines) == 3
+    first, event, connected = (json.loads(line) for line in lines)
+    assert first['rsrp'] == -90.0 and first['plmn'] == 'МТС'
+    assert event['event'] == 'reconnecting' and event['detail'] == 4.0
+    assert connected['detail'] == 'E3372|?|?'           # без IMEI в логе
+
+
+def test_run_headless_streams_fleet_until_duration():
+    import io
+    import json
+    conn_cls, client_cls, logouts = _fleet_classes()
+    fleet = core.Fleet([core.RouterTarget('r1', 'http://192.168.8.1', 'pw')],
+                       connection_cls=conn_cls, client_cls=client_cls,
+                       interval=0.02, history=1)
+    out = io.StringIO()
+    lines = core.run_headless(fleet, core.JsonLinesWriter(out, ('rsrp',)),
+                              duration=0.2)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines == len(records) >= 3
+    assert records[0] == {'ts': records[0]['ts'], 'device': 'r1',
+                          'event': core.STATUS_CONNECTED,
+                          'detail': 'http://192.168.8.1|?|?'}
+    assert all(r['rsrp'] == '-85dBm' for r in records if 'event' not in r)
+    assert logouts == ['http://192.168.8.1']
+    assert len(fleet.devices['r1'].samples) == 1
+
+
+def test_headless_entry_point_has_no_tk():
+    """headless.py работает без Tk (Raspberry Pi без python3-tk)."""
+    import pathlib
+    p = pathlib.Path(__file__).resolve().parent.parent / "headless.py"
+    src = p.read_text(encoding="utf-8")
+    assert "tkinter" not in src and "kivy" not in src
+    assert "from main import" not in src and "import main" not in src
+    assert "run_headless" in src
+
+
+# =========================================================
+# Метрики Prometheus (core.metrics)
+# =========================================================
+
+def test_monitor_metrics_render_and_cache():
+    metrics = core.MonitorMetrics(buckets=(0.1, 0.5))
+    sample = core.Sample(1.0, {'rsrp': '-85dBm', 'sinr': 12.0,
+                               'CurrentDownloadRate': '1000'},
+                         elapsed=0.2, lateness=0.01, stale=('status',),
+                         latency={'signal': 0.05, 'traffic': 0.3})
+    metrics.observe_sample('b535', sample, skipped=2)
+    metrics.observe_sample('b535', sample, skipped=3)
+    metrics.observe_status('b535', core.STATUS_RECONNECTED)
+    metrics.observe_status('b535', core.STATUS_RECONNECTING, 2.0)  # не считаем
+    text = metrics.render().decode()
+    lines = set(text.splitlines())
+    assert 'hua4gmon_signal_rsrp_dbm{device="b535"} -85.0' in lines
+    assert 'hua4gmon_signal_sinr_db{device="b535"} 12.0' in lines
+    assert ('hua4gmon_rate_bytes_per_second{device="b535",direction="dl"} '
+            '1000.0') in lines
+    assert 'hua4gmon_samples_total{device="b535"} 2.0' in lines
+    assert 'hua4gmon_ticks_skipped_total{device="b535"} 3.0' in lines
+    assert 'hua4gmon_stale_total{device="b535",endpoint="status"} 2.0' in lines
+    assert 'hua4gmon_reconnects_total{device="b535"} 1.0' in lines
+    assert '# TYPE hua4gmon_request_duration_seconds histogram' in lines
+    prefix = 'hua4gmon_request_duration_seconds_bucket{device="b535",'
+    assert prefix + 'endpoint="traffic",le="0.1"} 0' in lines
+    assert prefix + 'endpoint="traffic",le="0.5"} 2' in lines
+    assert prefix + 'endpoint="traffic",le="+Inf"} 2' in lines
+    assert ('hua4gmon_request_duration_seconds_count{device="b535",'
+            'endpoint="signal"} 2') in lines
+    # Без новых данных — тот же готовый текст, без повторного рендера
+    assert metrics.render() is metrics.render()
+
+
+def test_monitor_metrics_binds_poller():
+    client = _FakeClient()
+    poller = core.Poller(lambda: client, interval=0.01)
+    metrics = core.MonitorMetrics()
+    metrics.bind_poller('192.168.8.1', poller)
+    got, done = _collect(poller, 3)
+    poller.start(client)
+    try:
+        assert done.wait(3.0)
+    finally:
+        poller.stop(timeout=2.0)
+    text = metrics.render().decode()
+    assert 'hua4gmon_signal_rsrp_dbm{device="192.168.8.1"} -85.0' in text
+    assert 'endpoint="signal",le="+Inf"}' in text
+
+
+def test_metrics_server_serves_metrics():
+    import urllib.error
+    import urllib.request
+
+    import pytest
+    server = core.MetricsServer(lambda: b'hua4gmon_up 1\n', port=0)
+    server.start()
+    try:
+        base = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(base + "/metrics", timeout=2) as resp:
+            assert resp.read() == b'hua4gmon_up 1\n'
+            assert resp.headers['Content-Type'].startswith('text/plain')
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(base + "/other", timeout=2)
+    finally:
+        server.stop()
+
+
+# =========================================================
+# Кольцевой буфер истории (core.ringbuffer)
+# =========================================================
+
+def test_ring_buffer_matches_list_window():
+    import random
+    rnd = random.Random(7)
+    buf = core.RingBuffer(5)
+    ref: list[float] = []
+    for _ in range(200):
+        v = rnd.uniform(-120, -60)
+        buf.append(v)
+        ref = (ref + [v])[-5:]
+        assert list(buf) == ref
+        assert buf.min() == min(ref) and buf.max() == max(ref)
+        assert abs(buf.sum - sum(ref)) < 1e-9
+        assert buf[-1] == ref[-1] and buf[0] == ref[0]
+        assert buf[-3:] == ref[-3:] and buf[1:4] == ref[1:4]
+
+
+def test_ring_buffer_empty_clear_and_segments():
+    import pytest
+    buf = core.RingBuffer(4, [1, 2, 3])
+    assert not core.RingBuffer(3) and core.RingBuffer(3).min() is None
+    first, second = buf.segments()
+    assert list(first) == [1.0, 2.0, 3.0] and len(second) == 0
+    buf.extend([4, 5])                              # перенос через край
+    first, second = buf.segments()
+    assert isinstance(first, memoryview)
+    assert list(first) + list(second) == [2.0, 3.0, 4.0, 5.0]
+    assert buf.mean() == 3.5
+    with pytest.raises(IndexError):
+        buf[4]
+    buf.clear()
+    assert len(buf) == 0 and buf.max() is None and buf.mean() is None
+    buf.append(-90)
+    assert buf.min() == buf.max() == -90.0
+    with pytest.raises(ValueError):
+        core.RingBuffer(0)
+
+
+def test_ring_buffer_feeds_signal_analysis():
+    buf = core.RingBuffer(6, [-120, -100, -100, -100, -90, -90, -90])
+    assert len(buf) == 6                           # -120 вытеснено
+    assert core.direction_delta(buf, lookback=3) == 10.0
+    assert core.jitter(core.RingBuffer(10, [-90, -95, -91, -92, -93])) == 5.0
+
+
+# =========================================================
+# Типизированная выборка (core.Sample)
+# =========================================================
+
+def test_sample_parses_fields_once():
+    sample = core.Sample(1.0, {
+        'rsrp': '-85dBm', 'sinr': '12dB', 'rsrq': '-9.5dB', 'rssi': None,
+        'CurrentDownloadRate': '125000', 'CurrentUploadRate': 25000,
+        'ConnectionTime': '3600', 'CurrentMonthDownload': '1048576',
+        'Earfcn': 1300, 'TAC': '7', 'dlMcs': '', 'dlmcs': 'mcsDownCarrier1:26',
+        'TxPower': 'PPusch:12dBm', 'TransMode': 'TM[3]'})
+    assert (sample.rsrp, sample.sinr, sample.rsrq) == (-85.0, 12.0, -9.5)
+    assert sample.rssi is None
+    assert (sample.dl_rate, sample.ul_rate) == (125000.0, 25000.0)
+    assert sample.uptime == 3600.0
+    assert sample.month_dl == 1048576.0 and sample.month_ul is None
+    assert sample.earfcn == 1300 and sample.tac == '7'
+    assert sample.dl_mcs == 'mcsDownCarrier1:26' and sample.ul_mcs is None
+    assert sample.txpower == 'PPusch:12dBm' and sample.mimo == 'TM[3]'
+    assert sample.data['rsrp'] == '-85dBm'          # сырой ответ сохранён
+
+
+def test_sample_is_slotted():
+    import pytest
+    sample = core.Sample(1.0, {'rsrp': -90})
+    assert not hasattr(sample, '__dict__')
+    with pytest.raises(AttributeError):
+        sample.extra = 1
+    for field_name in core.SAMPLE_ALIASES:
+        assert hasattr(sample, field_name)
+
+
+def test_poller_publishes_parsed_sample():
+    poller = core.Poller(lambda: _FakeClient(), interval=0.01)
+    got, done = _collect(poller, 1)
+    poller.start(_FakeClient())
+    assert done.wait(2.0)
+    poller.stop()
+    sample = got[0]
+    assert sample.rsrp is not None
+    assert sample.rsrp == core.extract_number(sample.data.get('rsrp'))
+    assert sample.sinr == core.extract_number(sample.data.get('sinr'))
+
+
+# =========================================================
+# Колоночный лог сессии (core.session)
+# =========================================================
+
+def test_session_store_round_trip():
+    store = core.SessionStore(chunk=3)
+    for i in range(7):                              # три блока: 3 + 3 + 1
+        store.append(core.Sample(
+            1000.0 + i,
+            {'rsrp': -90 - i, 'sinr': '12.5dB' if i % 2 else None,
+             'plmn': '25001', 'band': '3' if i < 4 else '7', 'pci': 101},
+            lateness=0.004))
+    assert len(store) == 7 and store
+    assert store.column('ts') == [1000.0 + i for i in range(7)]
+    assert store.column('rsrp') == [-90.0 - i for i in range(7)]
+    assert store.column('sinr')[:2] == [None, 12.5]
+    assert store.column('band') == ['3'] * 4 + ['7'] * 3
+    assert store.column('enodeb') == [''] * 7
+    rows = list(store.rows())
+    assert len(rows) == 7 and len(rows[0]) == len(core.SESSION_FIELDS)
+    assert rows[-1][core.SESSION_FIELDS.index('late_ms')] == 4
+    store.clear()
+    assert not store and list(store.rows()) == []
+
+
+def test_session_store_is_compact_and_uncapped():
+    store = core.SessionStore()
+    sample = core.Sample(1.0, {'rsrp': -85.0, 'rssi': -60, 'sinr': 10,
+                               'rsrq': -9, 'plmn': '25001', 'enodeb': 12345,
+                               'sector': 7, 'band': '3', 'pci': 101})
+    for _ in range(20_000):                         # больше старого предела
+        store.append(sample)
+    assert len(store) == 20_000
+    assert store.nbytes <= 20_000 * 40
+    assert store.column('enodeb')[-1] == '12345'
+
+
+def test_session_store_writes_csv():
+    import csv
+    import io
+    store = core.SessionStore()
+    store.append(core.Sample(1760000000.5, {'rsrp': -85, 'plmn': '25001'}))
+    buf = io.StringIO()
+    assert store.write_csv(buf) == 1
+    buf.seek(0)
+    rows = list(csv.DictReader(buf))
+    assert list(rows[0]) == list(core.SESSION_FIELDS)
+    assert rows[0]['rsrp'] == '-85.0' and rows[0]['sinr'] == ''
+    assert rows[0]['plmn'] == '25001' and rows[0]['ts'].endswith('.500')
+
+
+# =========================================================
+# Потоковая запись сессии (core.recorder)
+# =========================================================
+
+def test_session_recorder_batches_and_rotates(tmp_path):
+    import csv
+    import time
+    rec = core.SessionRecorder(str(tmp_path), flush_interval=0.01,
+                               fsync_interval=0.0, max_bytes=200)
+    rec.start()
+    for i in range(10):
+        rec.record(core.Sample(1000.0 + i, {'rsrp': -90, 'band': '3',
+                                            'plmn': '25001'}))
+        time.sleep(0.02)
+    rec.stop()
+    assert not rec.is_running and rec.records == 10
+    assert len(rec.files) > 1                       # ротация по размеру
+    rows = []
+    for path in rec.files:
+        with open(path, newline='', encoding='utf-8') as f:
+            rows.extend(csv.DictReader(f))
+    assert [float(r['ts']) for r in rows] == [1000.0 + i for i in range(10)]
+    assert rows[0]['rsrp'] == '-90' and rows[0]['sinr'] == ''
+    assert list(rows[0]) == list(core.SESSION_FIELDS)
+
+
+def test_session_recorder_record_does_not_block(tmp_path):
+    import time
+    rec = core.SessionRecorder(str(tmp_path), flush_interval=60.0)
+    rec.start()
+    started = time.monotonic()
+    for _ in range(1000):
+        rec.record(core.Sample(1.0, {'rsrp': -90}))
+    assert time.monotonic() - started < 0.5
+    rec.stop()                                      # дописывает очередь
+    with open(rec.path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1001
+
+
+def test_session_recorder_stop_timeout_leaves_file_to_writer(tmp_path):
+    import threading
+    release = threading.Event()
+
+    class SlowSink:
+        def write_batch(self, samples):
+            release.wait(5.0)               # диск «завис» посреди пачки
+    rec = core.SessionRecorder(str(tmp_path), flush_interval=60.0,
+                               sinks=[SlowSink()])
+    rec.start()
+    rec.record(core.Sample(1.0, {'rsrp': -90}))
+    writer = rec._thread
+    rec.stop(timeout=0.05)                  # не дождались — файл не трогаем
+    assert writer.is_alive() and rec._file is not None
+    release.set()
+    writer.join(5.0)
+    assert rec._file is None and rec.error is None
+    with open(rec.path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 2      # заголовок + дописанная пачка
+
+
+def test_session_recorders_started_in_same_second_get_own_files(tmp_path):
+    first = core.SessionRecorder(str(tmp_path))
+    second = core.SessionRecorder(str(tmp_path))
+    first.start()
+    second.start()
+    first.record(core.Sample(1.0, {'rsrp': -90}))
+    second.record(core.Sample(2.0, {'rsrp': -80}))
+    first.stop()
+    second.stop()
+    assert first.path != second.path
+    for rec in (first, second):
+        with open(rec.path, encoding='utf-8') as f:
+            assert len(f.readlines()) == 2      # один заголовок, своя строка
+
+
+def test_recover_recording_truncates_torn_tail(tmp_path):
+    path = tmp_path / "session-20260101-000000-001.csv"
+    path.write_bytes(b"ts,late_ms\n1.000,0\n2.000,0\n3.0")
+    assert core.recover_recording(str(path)) == 3
+    assert path.read_bytes() == b"ts,late_ms\n1.000,0\n2.000,0\n"
+    assert core.recover_recording(str(path)) == 0
+    torn = tmp_path / "session-20260101-000000-002.csv"
+    torn.write_bytes(b"ts,la")
+    rec = core.SessionRecorder(str(tmp_path))
+    rec.start()                                     # чинит старые файлы
+    rec.stop()
+    assert not torn.exists()
+    assert path.read_bytes().endswith(b"2.000,0\n")
+
+
+# =========================================================
+# Двоичный файл сессии (core.sessionfile)
+# =========================================================
+
+def _session_with(n, chunk=4096):
+    store = core.SessionStore(chunk=chunk)
+    for i in range(n):
+        store.append(core.Sample(
+            1000.0 + i, {'rsrp': -90 - i % 20, 'sinr': 10.5 if i % 3 else None,
+                         'plmn': '25001', 'enodeb': 100 + i // 500,
+                         'band': '3', 'pci': i % 7}, lateness=0.002))
+    return store
+
+
+def test_session_file_round_trip(tmp_path):
+    store = _session_with(2500)
+    path = str(tmp_path / "s.h4gs")
+    assert core.write_session_file(path, store.rows(), block_records=1000) == 2500
+    with core.SessionFile(path) as sf:
+        assert len(sf) == 2500 and sf.blocks == 3
+        assert sf.time_range == (1000.0, 3499.0)
+        assert list(sf.rows()) == list(store.rows())
+        assert sf.tables[core.SESSION_STRINGS.index('plmn')] == ['25001']
+
+
+def test_session_file_seeks_by_time(tmp_path, monkeypatch):
+    from core import sessionfile
+    store = _session_with(5000)
+    path = str(tmp_path / "s.h4gs")
+    core.write_session_file(path, store.rows(), block_records=500)
+    decoded = []
+    real = sessionfile.zlib.decompress
+    monkeypatch.setattr(sessionfile.zlib, 'decompress',
+                        lambda raw: decoded.append(1) or real(raw))
+    with core.SessionFile(path) as sf:
+        rows = list(sf.rows(start=2100.0, end=2200.0))
+        assert [r[0] for r in rows] == [2100.0 + i for i in range(101)]
+        assert len(decoded) == 1                    # один блок из десяти
+        assert sf.column('enodeb', 5990.0) == ['109'] * 10
+        assert list(sf.rows(start=9000.0)) == []
+
+
+def test_session_file_replays_samples_and_is_compact(tmp_path):
+    import os
+    store = _session_with(3000)
+    path = str(tmp_path / "s.h4gs")
+    core.write_session_file(path, store.rows())
+    assert os.path.getsize(path) < 3000 * core.sessionfile.RECORD.size / 2
+    with core.SessionFile(path) as sf:
+        first = next(sf.samples())
+    assert first.ts == 1000.0 and first.rsrp == -90.0 and first.sinr is None
+    assert first.data['enodeb'] == '100' and first.lateness == 0.002
+
+
+def test_session_file_truncates_long_strings_on_char_boundary(tmp_path):
+    path = str(tmp_path / "s.h4gs")
+    long = 'я' * 40000                  # 80 000 байт UTF-8, предел — 65 535
+    with core.SessionFileWriter(path) as w:
+        w.append(core.Sample(1.0, {'plmn': long, 'band': '3'}))
+    with core.SessionFile(path) as sf:
+        (row,) = sf.rows()
+    plmn = row[core.SESSION_FIELDS.index('plmn')]
+    assert plmn == 'я' * 32767          # целые символы, без обрывка
+    assert row[core.SESSION_FIELDS.index('band')] == '3'
+
+
+def test_session_file_from_recorder_csv_and_bad_files(tmp_path):
+    import csv
+    import pytest
+    rec = core.SessionRecorder(str(tmp_path))
+    rec.start()
+    rec.record(core.Sample(5.0, {'rsrp': -80, 'band': '7'}))
+    rec.stop()
+    with open(rec.path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        out = str(tmp_path / "r.h4gs")
+        assert core.write_session_file(out, reader) == 1
+    with core.SessionFile(out) as sf:
+        assert [s.rsrp for s in sf.samples()] == [-80.0]
+    torn = tmp_path / "torn.h4gs"
+    torn.write_bytes((tmp_path / "r.h4gs").read_bytes()[:-4])
+    with pytest.raises(ValueError):
+        core.SessionFile(str(torn))
+    (tmp_path / "empty.h4gs").write_bytes(b"")
+    with pytest.raises(ValueError):
+        core.SessionFile(str(tmp_path / "empty.h4gs"))
+
+
+# =========================================================
+# База сессий SQLite (core.sessiondb)
+# =========================================================
+
+def _db_samples():
+    # Сота A: SINR 10, 12, 30 (медиана 12); сота B: 14, 15 (медиана 14.5)
+    cells = [('100', '1', 10), ('100', '1', 30), ('200', '2', 14),
+             ('100', '1', 12), ('200', '2', 15)]
+    return [core.Sample(1000.0 + i, {'sinr': sinr, 'rsrp': -90,
+                                     'plmn': '25001', 'enodeb': enb,
+                                     'sector': sec, 'band': '3' if i else '7'})
+            for i, (enb, sec, sinr) in enumerate(cells)]
+
+
+def test_session_database_cell_medians(tmp_path):
+    with core.SessionDatabase(str(tmp_path / "s.db")) as db:
+        sink = db.sink('192.168.8.1')
+        sink.write_batch(_db_samples())
+        assert db.count() == 5 and db.time_range() == (1000.0, 1004.0)
+        best, second = db.cell_stats('sinr')
+        assert best.key == ('25001', '200', '2') and best.median == 14.5
+        assert second.key == ('25001', '100', '1') and second.median == 12.0
+        assert (second.count, second.min, second.max) == (3, 10.0, 30.0)
+        assert [g.key for g in db.cell_stats(min_count=3)] == [second.key]
+        assert [g.key for g in db.cell_stats(start=1002.0)] == [
+            best.key, second.key]
+        assert db.band_stats('sinr')[0].key == ('3',)
+        assert db.cell_stats(plmn='25002') == []
+
+
+def test_session_database_wal_indexes_and_bad_metric(tmp_path):
+    import pytest
+    import sqlite3
+    path = str(tmp_path / "s.db")
+    with core.SessionDatabase(path) as db, pytest.raises(ValueError):
+        db.cell_stats('sinr; DROP TABLE samples')
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    names = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {'idx_samples_ts', 'idx_samples_cell',
+            'idx_samples_band'} <= names
+    conn.close()
+
+
+def test_session_recorder_feeds_database_sink(tmp_path):
+    with core.SessionDatabase(str(tmp_path / "s.db")) as db:
+        rec = core.SessionRecorder(None, sinks=[db.sink()],
+                                   flush_interval=0.01)
+        rec.start()
+        for sample in _db_samples():
+            rec.record(sample)
+        rec.stop()
+        assert rec.files == [] and db.count() == 5
+
+
+# =========================================================
+# Прореживание истории графика (core.decimate)
+# =========================================================
+
+def test_decimator_keeps_short_dips():
+    lod = core.MinMaxDecimator(capacity=14400, columns=300)
+    values = [-90.0] * 14400
+    values[7001] = -125.0                           # провал в одну выборку
+    lod.extend(values)
+    pts = lod.points()
+    assert len(pts) <= 2 * 300
+    assert min(v for _, v in pts) == -125.0
+    assert (7001, -125.0) in pts
+    assert pts[0][0] == 0 and max(i for i, _ in pts) < 14400
+
+
+def test_decimator_is_lossless_when_window_fits():
+    lod = core.MinMaxDecimator(capacity=5, columns=100)
+    lod.extend([1, 2, 3, 4, 5, 6, 7])
+    assert lod.points() == [(0, 3.0), (1, 4.0), (2, 5.0), (3, 6.0), (4, 7.0)]
+    assert len(lod) == 5
+
+
+def test_decimator_syncs_incrementally_with_ring_buffer():
+    buf = core.RingBuffer(1000)
+    lod = core.MinMaxDecimator(1000, 100)
+    for i in range(2500):
+        buf.append(-100 + (i % 37))
+        lod.sync(buf)
+    # Окно то же, экстремумы совпадают.
+    assert len(lod) == len(buf)
+    assert min(v for _, v in lod.points()) == buf.min()
+    assert max(v for _, v in lod.points()) == buf.max()
+    buf.clear()
+    buf.append(-80)
+    lod.sync(buf)                                   # очищен — пересборка
+    assert lod.points() == [(0, -80.0)]
+    other = core.RingBuffer(1000, [-70])
+    lod.sync(other)                                 # другой буфер
+    assert lod.points() == [(0, -70.0)]
+
+
+def test_decimator_matches_true_min_max_of_each_column():
+    import random
+    rnd = random.Random(22)
+    for _ in range(60):
+        capacity = rnd.randint(1, 400)
+        lod = core.MinMaxDecimator(capacity, rnd.randint(1, 50))
+        buf = core.RingBuffer(capacity)
+        synced = rnd.random() < 0.5
+        values = []
+        for _ in range(rnd.randint(1, 3 * capacity)):
+            v = float(rnd.randint(-130, -40))
+            values.append(v)
+            if synced:
+                buf.append(v)
+                lod.sync(buf)
+            else:
+                lod.append(v)
+        window = values[-capacity:]
+        origin = len(values) - len(window)
+        pts = lod.points()
+        assert len(lod) == len(window)
+        assert all(window[i] == v for i, v in pts)
+        # Столбец — корзина decimator'а, обрезанная окном.
+        b = lod.bucket
+        for start in range(origin - origin % b, len(values), b):
+            lo = max(start, origin) - origin
+            hi = start + b - origin
+            column = window[lo:hi]
+            shown = [v for i, v in pts if lo <= i < hi]
+            assert min(shown) == min(column)
+            assert max(shown) == max(column)
+            assert len(shown) <= 2
+
+
+# =========================================================
+# LRU-кеш (core.lru)
+# =========================================================
+
+def test_lru_cache_reuses_and_evicts_least_recent():
+    import pytest
+    cache = core.LRUCache(2)
+    made = []
+
+    def make(key):
+        return lambda: made.append(key) or key.upper()
+    assert cache.get_or_create('a', make('a')) == 'A'
+    assert cache.get_or_create('b', make('b')) == 'B'
+    assert cache.get_or_create('a', make('a')) == 'A'   # попадание
+    cache.get_or_create('c', make('c'))                 # вытесняет 'b'
+    assert 'a' in cache and 'b' not in cache and len(cache) == 2
+    assert made == ['a', 'b', 'c']
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.clear()
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        core.LRUCache(0)
+
+
+# =========================================================
+# Слой представления (core.viewmodel)
+# =========================================================
+
+class _FakeLabel:
+    def __init__(self):
+        self.calls = []
+
+    def config(self, **kw):
+        self.calls.append(kw)
+
+
+def test_viewmodel_pushes_only_changed_props():
+    view = core.ViewModel()
+    lbl = _FakeLabel()
+    assert view.config(lbl, text="-80 dBm", fg='green')
+    assert not view.config(lbl, text="-80 dBm", fg='green')
+    assert view.config(lbl, text="-79 dBm", fg='green')
+    assert lbl.calls == [{'text': "-80 dBm", 'fg': 'green'},
+                         {'text': "-79 dBm"}]
+    assert (view.pushed, view.skipped) == (2, 1)
+    view.forget(lbl)
+    view.config(lbl, text="-79 dBm", fg='green')
+    assert lbl.calls[-1] == {'text': "-79 dBm", 'fg': 'green'}
+
+
+def test_viewmodel_assign_sets_attributes_per_widget():
+    view = core.ViewModel()
+    a, b = _FakeLabel(), _FakeLabel()
+    view.assign(a, text="1", color=(1, 0, 0, 1))
+    view.assign(b, text="1")
+    assert (a.text, a.color, b.text) == ("1", (1, 0, 0, 1), "1")
+    a.text = "изменено в обход"
+    assert not view.assign(a, text="1")     # запомнено последнее отправленное
+    view.forget()
+    assert view.assign(a, text="1") and a.text == "1"